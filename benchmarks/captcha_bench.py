@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+验证码识别基准测试
+采集验证码建立带标注的本地语料库，训练识别模型，并在多核上并行评测准确率、单张耗时和吞吐量
+
+语料库目录结构：
+    <corpus>/<标注>_<摘要>.jpg      已标注样本
+    <corpus>/unlabeled/<摘要>.jpg   待标注样本
+
+用法示例：
+    python benchmarks/captcha_bench.py collect --local --count 500 --corpus data/captcha_corpus
+    python benchmarks/captcha_bench.py collect --count 200 --corpus data/captcha_corpus
+    python benchmarks/captcha_bench.py label --corpus data/captcha_corpus
+    python benchmarks/captcha_bench.py train --corpus data/captcha_corpus
+    python benchmarks/captcha_bench.py bench --corpus data/captcha_corpus --json logs/captcha_bench.json --check
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import logging
+import argparse
+import threading
+from io import BytesIO
+from typing import List, Tuple, Optional, Dict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ProcessPoolExecutor
+
+# 以脚本方式运行时把项目根目录加入导入路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core import captcha_solver  # noqa: E402
+
+logger = logging.getLogger("captcha_bench")
+
+UNLABELED_DIR = "unlabeled"
+DEFAULT_CORPUS = os.path.join("data", "captcha_corpus")
+
+# 本地替身服务器生成的验证码字符集，去掉了容易混淆的字符
+LOCAL_CHARSET = "2345678abcdefhkmnpwxy"
+
+# ==================== 语料库 ====================
+
+def _digest(content: bytes) -> str:
+    return hashlib.sha1(content).hexdigest()[:12]
+
+def save_sample(corpus_dir: str, content: bytes, label: Optional[str] = None) -> str:
+    """保存一张验证码到语料库，label为空时放入待标注目录"""
+    if label:
+        target_dir = corpus_dir
+        filename = f"{label.lower()}_{_digest(content)}.jpg"
+    else:
+        target_dir = os.path.join(corpus_dir, UNLABELED_DIR)
+        filename = f"{_digest(content)}.jpg"
+    os.makedirs(target_dir, exist_ok=True)
+    path = os.path.join(target_dir, filename)
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+def load_corpus(corpus_dir: str) -> List[Tuple[str, str]]:
+    """读取已标注样本，返回 [(路径, 标注), ...]，按文件名排序保证可复现"""
+    samples = []
+    if not os.path.isdir(corpus_dir):
+        return samples
+    for name in sorted(os.listdir(corpus_dir)):
+        if not name.endswith(".jpg") or "_" not in name:
+            continue
+        label = name.rsplit("_", 1)[0]
+        samples.append((os.path.join(corpus_dir, name), label))
+    return samples
+
+def split_corpus(samples: List[Tuple[str, str]], holdout: float,
+                 seed: int = 0) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """按固定种子划分训练集和评测集"""
+    shuffled = list(samples)
+    random.Random(seed).shuffle(shuffled)
+    test_count = int(len(shuffled) * holdout)
+    return shuffled[test_count:], shuffled[:test_count]
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+# ==================== 本地替身服务器 ====================
+
+def render_captcha(text: str, rng: random.Random) -> bytes:
+    """生成与教务系统验证码风格相近的图片（干扰线、噪点、字符抖动）"""
+    from PIL import Image, ImageDraw, ImageFont
+
+    width, height = 120, 40
+    img = Image.new("RGB", (width, height), tuple(rng.randint(215, 250) for _ in range(3)))
+    draw = ImageDraw.Draw(img)
+    try:
+        font = ImageFont.load_default(size=28)
+    except TypeError:
+        font = ImageFont.load_default()
+
+    x = 8
+    for char in text:
+        color = tuple(rng.randint(0, 90) for _ in range(3))
+        draw.text((x + rng.randint(-2, 2), rng.randint(0, 6)), char, fill=color, font=font)
+        x += 27
+    for _ in range(3):
+        points = [(rng.randint(0, width), rng.randint(0, height)) for _ in range(2)]
+        draw.line(points, fill=tuple(rng.randint(100, 180) for _ in range(3)), width=1)
+    for _ in range(120):
+        draw.point((rng.randrange(width), rng.randrange(height)),
+                   fill=tuple(rng.randint(0, 255) for _ in range(3)))
+
+    buffer = BytesIO()
+    img.save(buffer, "JPEG", quality=95)
+    return buffer.getvalue()
+
+class LocalCaptchaServer:
+    """本地替身服务器，提供 /login 和 /img/captcha.jpg，并记录每张验证码的答案"""
+
+    def __init__(self, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.last_label: Optional[str] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._lock = threading.Lock()
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """启动服务器，返回BASE_URL"""
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/img/captcha.jpg"):
+                    with owner._lock:
+                        label = "".join(owner.rng.choice(LOCAL_CHARSET)
+                                        for _ in range(captcha_solver.CAPTCHA_LENGTH))
+                        body = render_captcha(label, owner.rng)
+                        owner.last_label = label
+                    content_type = "image/jpeg"
+                else:
+                    body = b'<html><input id="tokenValue" value="local"></html>'
+                    content_type = "text/html; charset=utf-8"
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+# ==================== 子命令 ====================
+
+def cmd_collect(args) -> int:
+    """通过CaptchaHandler采集验证码"""
+    from src.core.auth import CaptchaHandler
+
+    server = None
+    base_url = args.base_url
+    if args.local:
+        server = LocalCaptchaServer(seed=args.seed)
+        base_url = server.start()
+        logger.info(f"本地替身服务器: {base_url}")
+
+    handler = CaptchaHandler(base_url, debug_mode=False)
+    saved = 0
+    try:
+        for index in range(args.count):
+            content = handler.get_captcha(refresh=True, max_retries=3)
+            if not content:
+                logger.warning(f"第 {index + 1} 张验证码获取失败")
+                continue
+            # 本地服务器的验证码自带答案，真实服务器的验证码放入待标注目录
+            save_sample(args.corpus, content, server.last_label if server else None)
+            saved += 1
+            if args.interval:
+                time.sleep(args.interval)
+    finally:
+        if server:
+            server.stop()
+
+    logger.info(f"已采集 {saved}/{args.count} 张验证码到 {args.corpus}")
+    return 0 if saved else 1
+
+def cmd_label(args) -> int:
+    """人工标注待标注目录中的验证码，回车直接采用识别器给出的建议"""
+    from PIL import Image
+
+    unlabeled_dir = os.path.join(args.corpus, UNLABELED_DIR)
+    if not os.path.isdir(unlabeled_dir):
+        logger.info("没有待标注的验证码")
+        return 0
+
+    solver = captcha_solver.CaptchaSolver(args.model, min_confidence=0.0)
+    has_model = solver.is_ready()
+    names = sorted(n for n in os.listdir(unlabeled_dir) if n.endswith(".jpg"))
+    for index, name in enumerate(names):
+        path = os.path.join(unlabeled_dir, name)
+        content = _read(path)
+        suggestion = solver.solve(content) if has_model else None
+        Image.open(BytesIO(content)).show()
+        prompt = f"[{index + 1}/{len(names)}] {name}"
+        if suggestion:
+            prompt += f" (建议: {suggestion})"
+        answer = input(f"{prompt}，输入答案（s跳过，q退出）: ").strip().lower()
+        if answer == "q":
+            break
+        if answer == "s":
+            continue
+        label = answer or suggestion
+        if not label:
+            continue
+        save_sample(args.corpus, content, label)
+        os.remove(path)
+    return 0
+
+def cmd_train(args) -> int:
+    """用语料库训练识别模型"""
+    train_set, test_set = split_corpus(load_corpus(args.corpus), args.holdout, args.seed)
+    if not train_set:
+        logger.error(f"语料库中没有已标注样本: {args.corpus}")
+        return 1
+
+    start_time = time.perf_counter()
+    model, stats = captcha_solver.CaptchaModel.train((_read(path), label) for path, label in train_set)
+    model.save(args.model)
+    logger.info(f"训练完成，用时 {time.perf_counter() - start_time:.1f}s: {stats}")
+    logger.info(f"模型已保存到 {args.model}，保留 {len(test_set)} 张样本用于评测")
+    return 0
+
+# 评测进程内的识别器，由进程池初始化函数创建，避免每个任务重复加载模型
+_worker_solver: Optional[captcha_solver.CaptchaSolver] = None
+_worker_batch = False
+
+def _init_worker(model_path: str, batch: bool):
+    global _worker_solver, _worker_batch
+    _worker_solver = captcha_solver.CaptchaSolver(model_path, min_confidence=0.0)
+    _worker_solver.is_ready()
+    _worker_batch = batch
+
+def _solve_chunk(chunk: List[Tuple[str, str]]) -> List[Tuple[str, Optional[str], float]]:
+    """在评测进程中识别一批样本，返回 [(标注, 识别结果, 耗时秒), ...]
+
+    批量模式下整块一次预处理，每张的耗时取整块耗时的均摊值。
+    """
+    if not chunk:
+        return []
+    if _worker_batch:
+        contents = [_read(path) for path, _ in chunk]
+        start_time = time.perf_counter()
+        solved = _worker_solver.solve_batch(contents)
+        elapsed = (time.perf_counter() - start_time) / len(chunk)
+        return [(label, text, elapsed) for (_, label), (text, _) in zip(chunk, solved)]
+
+    results = []
+    for path, label in chunk:
+        content = _read(path)
+        start_time = time.perf_counter()
+        prediction = _worker_solver.solve(content)
+        results.append((label, prediction, time.perf_counter() - start_time))
+    return results
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def run_benchmark(samples: List[Tuple[str, str]], model_path: str, workers: int,
+                  batch_size: int = 0) -> Dict:
+    """并行评测识别器，返回评测报告
+
+    batch_size大于0时每个任务整批识别batch_size张验证码，否则逐张识别。
+    """
+    chunk_size = batch_size or max(1, len(samples) // (workers * 4))
+    chunks = [samples[i:i + chunk_size] for i in range(0, len(samples), chunk_size)]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_path, batch_size > 0)) as executor:
+        # 先让所有进程完成初始化，吞吐量只统计识别本身
+        list(executor.map(_solve_chunk, [[] for _ in range(workers)]))
+        start_time = time.perf_counter()
+        for chunk_results in executor.map(_solve_chunk, chunks):
+            results.extend(chunk_results)
+        wall_time = time.perf_counter() - start_time
+
+    correct = sum(1 for label, prediction, _ in results if prediction == label)
+    char_total = sum(len(label) for label, _, _ in results)
+    char_correct = sum(
+        sum(a == b for a, b in zip(label, prediction))
+        for label, prediction, _ in results if prediction and len(prediction) == len(label)
+    )
+    rejected = sum(1 for _, prediction, _ in results if prediction is None)
+    latencies = sorted(elapsed * 1000 for _, _, elapsed in results)
+    total = len(results)
+
+    return {
+        "samples": total,
+        "workers": workers,
+        "batch_size": batch_size,
+        "accuracy": round(correct / total, 4) if total else 0.0,
+        "char_accuracy": round(char_correct / char_total, 4) if char_total else 0.0,
+        "rejected": rejected,
+        "latency_ms": {
+            "mean": round(sum(latencies) / total, 3) if total else 0.0,
+            "p50": round(_percentile(latencies, 0.50), 3),
+            "p95": round(_percentile(latencies, 0.95), 3),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+        "throughput_per_sec": round(total / wall_time, 1) if wall_time > 0 else 0.0,
+        "target_accuracy": captcha_solver.TARGET_ACCURACY,
+        "target_latency_ms": captcha_solver.TARGET_LATENCY_MS,
+        "errors": [
+            {"label": label, "prediction": prediction}
+            for label, prediction, _ in results if prediction != label
+        ][:20],
+    }
+
+def cmd_bench(args) -> int:
+    """评测识别准确率、耗时和吞吐量"""
+    samples = load_corpus(args.corpus)
+    if args.holdout > 0:
+        _, samples = split_corpus(samples, args.holdout, args.seed)
+    if args.limit:
+        samples = samples[:args.limit]
+    if not samples:
+        logger.error(f"没有可评测的样本: {args.corpus}")
+        return 1
+    if not os.path.exists(args.model):
+        logger.error(f"模型不存在，请先运行 train: {args.model}")
+        return 1
+
+    report = run_benchmark(samples, args.model, args.workers, args.batch_size)
+    latency = report["latency_ms"]
+    print(f"样本数:     {report['samples']}（{report['workers']} 个进程）")
+    print(f"整体准确率: {report['accuracy']:.2%}（目标 {report['target_accuracy']:.0%}）")
+    print(f"字符准确率: {report['char_accuracy']:.2%}，拒识 {report['rejected']} 张")
+    print(f"单张耗时:   平均 {latency['mean']}ms，p50 {latency['p50']}ms，"
+          f"p95 {latency['p95']}ms（目标 {report['target_latency_ms']}ms）")
+    print(f"吞吐量:     {report['throughput_per_sec']} 张/秒")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"报告已写入 {args.json}")
+
+    if args.check:
+        passed = (report["accuracy"] >= captcha_solver.TARGET_ACCURACY and
+                  latency["p95"] <= captcha_solver.TARGET_LATENCY_MS)
+        print("达到目标" if passed else "未达到目标")
+        return 0 if passed else 1
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="验证码识别基准测试")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="语料库目录")
+    parser.add_argument("--model", default=None, help="模型文件，默认使用配置CAPTCHA_MODEL_FILE")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    collect = subparsers.add_parser("collect", help="采集验证码")
+    collect.add_argument("--count", type=int, default=100, help="采集数量")
+    collect.add_argument("--local", action="store_true", help="使用本地替身服务器（自动标注）")
+    collect.add_argument("--base-url", default=None, help="教务系统地址，默认使用配置BASE_URL")
+    collect.add_argument("--interval", type=float, default=0.0, help="真实服务器采集间隔（秒）")
+    collect.set_defaults(func=cmd_collect)
+
+    label = subparsers.add_parser("label", help="人工标注验证码")
+    label.set_defaults(func=cmd_label)
+
+    train = subparsers.add_parser("train", help="训练识别模型")
+    train.add_argument("--holdout", type=float, default=0.2, help="保留用于评测的样本比例")
+    train.set_defaults(func=cmd_train)
+
+    bench = subparsers.add_parser("bench", help="评测识别器")
+    bench.add_argument("--holdout", type=float, default=0.2,
+                       help="只评测训练时保留的样本（与train使用相同比例和种子），0表示全部")
+    bench.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="评测进程数")
+    bench.add_argument("--batch-size", type=int, default=0, help="整批识别的数量，0表示逐张识别")
+    bench.add_argument("--limit", type=int, default=0, help="最多评测的样本数")
+    bench.add_argument("--json", default=None, help="JSON报告输出路径")
+    bench.add_argument("--check", action="store_true", help="未达到准确率或耗时目标时返回非零退出码")
+    bench.set_defaults(func=cmd_bench)
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    args = build_parser().parse_args(argv)
+    if args.model is None:
+        from src.core.config import get_config
+        args.model = get_config("CAPTCHA_MODEL_FILE", "data/captcha_model.npz")
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
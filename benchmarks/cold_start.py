@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+冷启动基准测试
+在无界面环境中启动应用（SDL dummy 视频驱动 + Kivy mock GL 后端），测量从进程启动到
+MainScreen 首帧绘制完成的耗时，并按阶段拆分：
+
+    config_manager       导入配置模块（模块导入时创建 ConfigManager）
+    setup_logging        初始化日志管道
+    kivy_window          导入 Kivy 并创建窗口
+    imports              导入应用模块和主界面模块
+    init_fonts           注册字体
+    update_account_info  主界面首次更新账号信息
+    clean_history_files  清理历史文件（首帧之后在后台线程执行，不计入首帧耗时）
+
+每次测量在独立的子进程中以 python -X importtime 运行，导入耗时解析为模块树一并输出。
+
+用法示例：
+    python benchmarks/cold_start.py --runs 5 --json logs/cold_start.json
+    python benchmarks/cold_start.py --runs 5 --baseline logs/cold_start.json --max-regression 0.2
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import functools
+import importlib
+import statistics
+import subprocess
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Any
+
+# 以脚本方式运行时把项目根目录加入导入路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+logger = logging.getLogger("cold_start")
+
+# 无界面运行所需的环境变量
+HEADLESS_ENV = {
+    "SDL_VIDEODRIVER": "dummy",
+    "SDL_AUDIODRIVER": "dummy",
+    "KIVY_GL_BACKEND": "mock",
+    "KIVY_NO_ARGS": "1",
+    "KIVY_NO_CONSOLELOG": "1",
+    "KIVY_NO_FILELOG": "1",
+}
+
+# 回归检查时忽略的短阶段（毫秒），避免噪声误报
+MIN_CHECKED_PHASE_MS = 5.0
+
+# ==================== 导入耗时 ====================
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """把 -X importtime 的输出解析为模块树
+
+    输出按后序排列（子模块在父模块之前），模块名前的缩进表示嵌套层级。
+    返回根节点列表，节点为 {"module", "self_us", "cumulative_us", "children"}。
+    """
+    pending: Dict[int, List[Dict[str, Any]]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # 表头
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        node = {
+            "module": name.strip(),
+            "self_us": int(fields[0]),
+            "cumulative_us": int(fields[1]),
+            "children": pending.pop(depth + 1, []),
+        }
+        pending.setdefault(depth, []).append(node)
+    return pending.get(0, [])
+
+def prune_import_tree(nodes: List[Dict[str, Any]], min_us: int) -> List[Dict[str, Any]]:
+    """去掉累计耗时低于阈值的节点，子节点按累计耗时降序"""
+    pruned = []
+    for node in sorted(nodes, key=lambda n: n["cumulative_us"], reverse=True):
+        if node["cumulative_us"] < min_us:
+            continue
+        pruned.append(dict(node, children=prune_import_tree(node["children"], min_us)))
+    return pruned
+
+def top_imports(nodes: List[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+    """自身耗时最多的模块"""
+    flat = []
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        flat.append({"module": node["module"], "self_us": node["self_us"],
+                     "cumulative_us": node["cumulative_us"]})
+        stack.extend(node["children"])
+    return sorted(flat, key=lambda n: n["self_us"], reverse=True)[:count]
+
+# ==================== 子进程：启动应用并计时 ====================
+
+@contextmanager
+def _timed(phases: Dict[str, float], name: str):
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = (time.perf_counter() - start_time) * 1000
+
+def _time_first_call(owner, attr: str, phases: Dict[str, float], name: str):
+    """包装 owner.attr，记录第一次调用的耗时"""
+    original = getattr(owner, attr)
+
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        start_time = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            phases.setdefault(name, (time.perf_counter() - start_time) * 1000)
+
+    setattr(owner, attr, wrapper)
+
+def _record_requests(requests_log: List[Dict[str, Any]], startup):
+    """记录所有HTTP请求的开始时间（距进程启动）和耗时"""
+    import requests
+
+    original = requests.Session.request
+
+    @functools.wraps(original)
+    def request(session, method, url, *args, **kwargs):
+        started = startup.mark(f"request {method}")
+        start_time = time.perf_counter()
+        status = None
+        try:
+            response = original(session, method, url, *args, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            requests_log.append({
+                "method": method,
+                "url": url,
+                "status": status,
+                "start_ms": round(started * 1000, 1),
+                "duration_ms": round((time.perf_counter() - start_time) * 1000, 1),
+            })
+
+    requests.Session.request = request
+
+def run_child(output_path: str, settle: float) -> int:
+    """在当前进程中按 main.py 的顺序启动应用，首帧后退出并写出结果"""
+    import main as entry
+    from src.utils import startup
+
+    phases: Dict[str, float] = {}
+    requests_log: List[Dict[str, Any]] = []
+    entry.setup_environment()
+
+    # setup_logging 会读取配置，先单独计时配置模块导入
+    with _timed(phases, "config_manager"):
+        importlib.import_module("src.core.config")
+    with _timed(phases, "setup_logging"):
+        entry.setup_logging()
+    with _timed(phases, "kivy_window"):
+        from kivy.core.window import Window
+    with _timed(phases, "imports"):
+        app_module = importlib.import_module("src.app")
+        main_screen_module = importlib.import_module("src.ui.screens.main_screen")
+    startup.mark("imports")
+
+    _time_first_call(app_module, "init_fonts", phases, "init_fonts")
+    _time_first_call(app_module, "clean_history_files", phases, "clean_history_files")
+    _time_first_call(main_screen_module.MainScreen, "update_account_info", phases, "update_account_info")
+    _record_requests(requests_log, startup)
+
+    from kivy.clock import Clock
+
+    app = app_module.EducationSystemApp()
+    result: Dict[str, Any] = {}
+
+    def on_first_frame(*args):
+        Window.unbind(on_flip=on_first_frame)
+        result["first_frame_ms"] = round(startup.mark("benchmark_first_frame") * 1000, 1)
+        # 留出时间让首帧之后的延迟初始化完成
+        Clock.schedule_once(lambda dt: app.stop(), settle)
+
+    app.bind(on_start=lambda *args: Window.bind(on_flip=on_first_frame))
+    app.run()
+
+    for thread in threading.enumerate():
+        if thread.name == "clean-history":
+            thread.join(timeout=5)
+
+    result.update(
+        phases={name: round(ms, 2) for name, ms in phases.items()},
+        marks=[{"name": name, "ms": round(elapsed * 1000, 1)} for name, elapsed in startup.get_marks()],
+        requests=requests_log,
+    )
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False)
+    return 0 if "first_frame_ms" in result else 1
+
+# ==================== 父进程：多次测量并汇总 ====================
+
+def run_once(headless: bool, settle: float, timeout: float) -> Dict[str, Any]:
+    """在新进程中测量一次冷启动"""
+    env = dict(os.environ)
+    if headless:
+        env.update(HEADLESS_ENV)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = os.path.join(tmp_dir, "result.json")
+        command = [sys.executable, "-X", "importtime", os.path.abspath(__file__),
+                   "--child", output_path, "--settle", str(settle)]
+        wall_start = time.perf_counter()
+        proc = subprocess.run(command, cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL,
+                              stderr=subprocess.PIPE, text=True, timeout=timeout)
+        wall_ms = (time.perf_counter() - wall_start) * 1000
+        if not os.path.exists(output_path):
+            errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+            raise RuntimeError(f"子进程退出码 {proc.returncode}: " + "\n".join(errors[-20:]))
+        with open(output_path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+
+    result["process_wall_ms"] = round(wall_ms, 1)
+    result["import_tree"] = parse_importtime(proc.stderr)
+    return result
+
+def summarize(results: List[Dict[str, Any]], import_threshold_us: int, top_count: int) -> Dict[str, Any]:
+    """各阶段取中位数，导入树取最后一次测量"""
+    phase_names = []
+    for result in results:
+        for name in result["phases"]:
+            if name not in phase_names:
+                phase_names.append(name)
+
+    first_frames = [r["first_frame_ms"] for r in results if "first_frame_ms" in r]
+    import_tree = results[-1]["import_tree"]
+    return {
+        "runs": len(results),
+        "first_frame_ms": {
+            "median": round(statistics.median(first_frames), 1) if first_frames else None,
+            "min": min(first_frames, default=None),
+            "max": max(first_frames, default=None),
+        },
+        "phases_ms": {
+            name: round(statistics.median(r["phases"][name] for r in results if name in r["phases"]), 2)
+            for name in phase_names
+        },
+        "marks": results[-1]["marks"],
+        "requests": results[-1]["requests"],
+        "imports": {
+            "total_us": sum(node["cumulative_us"] for node in import_tree),
+            "top_self": top_imports(import_tree, top_count),
+            "tree": prune_import_tree(import_tree, import_threshold_us),
+        },
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+    }
+
+def find_regressions(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """与基线报告比较首帧耗时和各阶段耗时"""
+    regressions = []
+    checks = [("first_frame_ms", report["first_frame_ms"]["median"], baseline["first_frame_ms"]["median"])]
+    for name, value in report["phases_ms"].items():
+        checks.append((name, value, baseline.get("phases_ms", {}).get(name)))
+
+    for name, value, base in checks:
+        if value is None or not base or max(value, base) < MIN_CHECKED_PHASE_MS:
+            continue
+        if value > base * (1 + max_regression):
+            regressions.append(f"{name}: {base:.1f}ms -> {value:.1f}ms (+{(value / base - 1):.0%})")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="冷启动基准测试")
+    parser.add_argument("--runs", type=int, default=3, help="测量次数（每次一个新进程）")
+    parser.add_argument("--json", default=None, help="JSON报告输出路径，默认输出到标准输出")
+    parser.add_argument("--baseline", default=None, help="基线JSON报告，用于回归检查")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="允许的相对回归比例")
+    parser.add_argument("--window", action="store_true", help="使用真实窗口而不是无界面模式")
+    parser.add_argument("--settle", type=float, default=1.0, help="首帧之后等待延迟初始化的时间（秒）")
+    parser.add_argument("--timeout", type=float, default=120.0, help="单次测量超时（秒）")
+    parser.add_argument("--import-threshold-ms", type=float, default=1.0, help="导入树中保留的最小累计耗时")
+    parser.add_argument("--top", type=int, default=20, help="列出自身导入耗时最多的模块数")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        return run_child(args.child, args.settle)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    results = []
+    for index in range(args.runs):
+        result = run_once(not args.window, args.settle, args.timeout)
+        logger.info(f"第 {index + 1}/{args.runs} 次: 首帧 {result.get('first_frame_ms')}ms")
+        results.append(result)
+
+    report = summarize(results, int(args.import_threshold_ms * 1000), args.top)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(output)
+        logger.info(f"报告已写入 {args.json}")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report, baseline, args.max_regression)
+        for line in regressions:
+            logger.error(f"启动耗时回归: {line}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量重新登录基准测试
+模拟教务系统重启后所有会话失效：在临时目录中创建大量保存了凭据的账号，启动本地替身教务系统
+（登录页tokenValue、按会话记录答案的验证码、登录表单校验、成绩页），用离线识别器无人值守地
+恢复全部账号，统计总耗时、每分钟恢复的账号数和结果分布。
+
+替身服务器的每个请求可以附加固定延迟（--latency），近似真实服务器的响应时间；
+验证码模型在本地合成验证码上现场训练（见 captcha_bench.py），只用于测量编排器本身的吞吐量。
+
+用法示例：
+    python benchmarks/relogin_bench.py --accounts 300 --latency 50
+    python benchmarks/relogin_bench.py --accounts 300 --latency 50 --workers 4 --json logs/relogin_bench.json
+    python benchmarks/relogin_bench.py --accounts 300 --latency 50 --check --max-seconds 300
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+from urllib.parse import parse_qs
+from typing import List, Optional, Dict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 以脚本方式运行时把项目根目录加入导入路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+if BENCH_DIR not in sys.path:
+    sys.path.insert(0, BENCH_DIR)
+
+from captcha_bench import render_captcha, LOCAL_CHARSET  # noqa: E402
+from src.core import captcha_solver  # noqa: E402
+
+logger = logging.getLogger("relogin_bench")
+
+SCORES_PATH = "/student/integratedQuery/scoreQuery/thisTermScores/index"
+
+def account_password_md5(student_id: str) -> str:
+    """替身服务器上每个账号的密码摘要"""
+    return hashlib.md5(f"pw-{student_id}".encode("utf-8")).hexdigest()
+
+# ==================== 本地替身教务系统 ====================
+
+class LocalLoginServer:
+    """本地替身教务系统，按JSESSIONID记录验证码答案和登录状态"""
+
+    def __init__(self, latency: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.captchas: Dict[str, str] = {}
+        self.logged_in: Dict[str, str] = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """启动服务器，返回BASE_URL"""
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _session_id(self) -> Optional[str]:
+                for part in self.headers.get("Cookie", "").split(";"):
+                    name, _, value = part.strip().partition("=")
+                    if name == "JSESSIONID":
+                        return value
+                return None
+
+            def _reply(self, status: int, body: bytes = b"", content_type: str = "text/html; charset=utf-8",
+                       location: Optional[str] = None, new_session: Optional[str] = None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                if location:
+                    self.send_header("Location", location)
+                if new_session:
+                    self.send_header("Set-Cookie", f"JSESSIONID={new_session}; Path=/")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _begin(self):
+                with owner._lock:
+                    owner.requests += 1
+                if owner.latency:
+                    time.sleep(owner.latency)
+
+            def do_GET(self):
+                self._begin()
+                session_id = self._session_id()
+                if self.path.startswith("/login"):
+                    new_session = None
+                    if not session_id or session_id not in owner.captchas:
+                        new_session = session_id = os.urandom(8).hex()
+                        with owner._lock:
+                            owner.captchas[session_id] = ""
+                    body = b'<html><input id="tokenValue" value="local"></html>'
+                    self._reply(200, body, new_session=new_session)
+                elif self.path.startswith("/img/captcha.jpg"):
+                    with owner._lock:
+                        label = "".join(owner.rng.choice(LOCAL_CHARSET)
+                                        for _ in range(captcha_solver.CAPTCHA_LENGTH))
+                        body = render_captcha(label, owner.rng)
+                        if session_id:
+                            owner.captchas[session_id] = label
+                    self._reply(200, body, content_type="image/jpeg")
+                elif self.path.startswith(SCORES_PATH) and session_id in owner.logged_in:
+                    body = f'<html><span class="user-info">欢迎您，<br>学生{owner.logged_in[session_id][-3:]}</span></html>'
+                    self._reply(200, body.encode("utf-8"))
+                else:
+                    self._reply(302, location="/login")
+
+            def do_POST(self):
+                self._begin()
+                length = int(self.headers.get("Content-Length", 0))
+                form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+                session_id = self._session_id()
+                with owner._lock:
+                    expected = owner.captchas.get(session_id or "")
+                if not expected or form.get("j_captcha", "").lower() != expected:
+                    self._reply(302, location="/login?errorCode=badCaptcha")
+                elif form.get("j_password") != account_password_md5(form.get("j_username", "")):
+                    self._reply(302, location="/login?errorCode=badCredentials")
+                else:
+                    with owner._lock:
+                        owner.logged_in[session_id] = form["j_username"]
+                    self._reply(302, location="/index.jsp")
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+# ==================== 准备 ====================
+
+def train_local_model(path: str, samples: int, seed: int):
+    """在本地合成验证码上训练识别模型"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(samples):
+        label = "".join(rng.choice(LOCAL_CHARSET) for _ in range(captcha_solver.CAPTCHA_LENGTH))
+        corpus.append((render_captcha(label, rng), label))
+    model, stats = captcha_solver.CaptchaModel.train(corpus)
+    model.save(path)
+    logger.info(f"本地验证码模型已训练: {stats}")
+
+def configure(work_dir: str, base_url: str, model_path: str):
+    """把账号存储、凭据密钥和教务系统地址指向临时目录和替身服务器（只修改内存中的配置）"""
+    from src.core.config import update_config
+
+    update_config("ACCOUNTS_DB", os.path.join(work_dir, "accounts.db"))
+    update_config("CREDENTIAL_KEY_FILE", os.path.join(work_dir, "credential.key"))
+    update_config("SESSION_DIR", os.path.join(work_dir, "sessions"))
+    update_config("ACCOUNTS_FILE", os.path.join(work_dir, "accounts.json"))
+    update_config("CREDENTIALS_FILE", os.path.join(work_dir, "credentials.json"))
+    update_config("CAPTCHA_MODEL_FILE", model_path)
+    update_config("BASE_URL", base_url)
+    update_config("SCORES_URL", base_url + SCORES_PATH)
+
+def create_accounts(count: int) -> List[str]:
+    """创建保存了凭据、会话已失效的账号"""
+    from src.core.session import get_session_manager
+
+    manager = get_session_manager()
+    accounts = [f"2024{index:06d}" for index in range(count)]
+    for student_id in accounts:
+        manager.store.touch_login(student_id, {"cookies": [], "headers": {}})
+        manager.save_credentials(student_id, account_password_md5(student_id))
+    return accounts
+
+# ==================== 入口 ====================
+
+def run(args) -> Dict:
+    from src.core.relogin import ReloginOrchestrator
+
+    server = LocalLoginServer(latency=args.latency / 1000.0, seed=args.seed)
+    base_url = server.start()
+    try:
+        with tempfile.TemporaryDirectory(prefix="relogin_bench_") as work_dir:
+            model_path = os.path.join(work_dir, "captcha_model.npz")
+            train_local_model(model_path, args.train_samples, args.seed)
+            configure(work_dir, base_url, model_path)
+            accounts = create_accounts(args.accounts)
+
+            orchestrator = ReloginOrchestrator(
+                base_url=base_url, max_per_host=args.max_per_host,
+                io_workers=args.io_workers, cpu_workers=args.workers
+            )
+            start_time = time.perf_counter()
+            results = orchestrator.run(accounts, verify_first=True)
+            wall_time = time.perf_counter() - start_time
+    finally:
+        server.stop()
+
+    summary: Dict[str, int] = {}
+    for result in results.values():
+        summary[result] = summary.get(result, 0) + 1
+    recovered = summary.get("success", 0) + summary.get("still_valid", 0)
+    return {
+        "accounts": len(results),
+        "recovered": recovered,
+        "results": summary,
+        "wall_time_sec": round(wall_time, 2),
+        "accounts_per_min": round(recovered / wall_time * 60, 1) if wall_time > 0 else 0.0,
+        "server_requests": server.requests,
+        "latency_ms": args.latency,
+        "workers": args.workers,
+        "io_workers": args.io_workers,
+        "max_per_host": args.max_per_host,
+    }
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="批量重新登录基准测试")
+    parser.add_argument("--accounts", type=int, default=300, help="账号数量")
+    parser.add_argument("--latency", type=float, default=50.0, help="替身服务器每个请求的延迟（毫秒）")
+    parser.add_argument("--workers", type=int, default=0, help="验证码识别进程数，0表示在线程中识别")
+    parser.add_argument("--io-workers", type=int, default=32, help="HTTP线程数")
+    parser.add_argument("--max-per-host", type=int, default=8, help="每个主机的并发请求数")
+    parser.add_argument("--train-samples", type=int, default=400, help="训练验证码模型的合成样本数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--json", default=None, help="JSON报告输出路径")
+    parser.add_argument("--check", action="store_true", help="有账号未恢复或超时时返回非零退出码")
+    parser.add_argument("--max-seconds", type=float, default=300.0, help="--check 允许的最长总耗时（秒）")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+    logger.setLevel(logging.INFO)
+    args = build_parser().parse_args(argv)
+    report = run(args)
+
+    print(f"账号数:     {report['accounts']}，恢复 {report['recovered']}，结果 {report['results']}")
+    print(f"总耗时:     {report['wall_time_sec']}s（每分钟 {report['accounts_per_min']} 个账号）")
+    print(f"服务器请求: {report['server_requests']} 次，每次延迟 {report['latency_ms']}ms")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"报告已写入 {args.json}")
+
+    if args.check:
+        passed = report["recovered"] == report["accounts"] and report["wall_time_sec"] <= args.max_seconds
+        print("达到目标" if passed else "未达到目标")
+        return 0 if passed else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,7 +13,7 @@ package.domain = com.qqhru.education
 source.dir = .
 
 # (list) Source files to include (let empty to include all the files)
-source.include_exts = py,png,jpg,jpeg,kv,atlas,ttf,json
+source.include_exts = py,png,jpg,jpeg,kv,atlas,ttf,json,npz
 
 # (list) List of inclusions using pattern matching
 source.include_patterns = src/*,assets/*,data/*
@@ -22,7 +22,7 @@ source.include_patterns = src/*,assets/*,data/*
 source.exclude_exts = spec,md,txt,log
 
 # (list) List of directory to exclude (let empty to not exclude anything)
-source.exclude_dirs = tests, bin, venv, .venv, __pycache__, .git, logs, temp, .pytest_cache
+source.exclude_dirs = tests, benchmarks, bin, venv, .venv, __pycache__, .git, logs, temp, .pytest_cache
 
 # (list) List of exclusions using pattern matching
 # Do not prefix with './'
@@ -38,7 +38,7 @@ version = 2.0.0
 # (list) Application requirements
 # comma separated e.g. requirements = sqlite3,kivy
 # 版本固定以确保构建的可重现性
-requirements = python3,kivy==2.3.1,requests==2.32.3,beautifulsoup4==4.12.3,pillow==10.4.0,urllib3==2.2.2,chardet==5.2.0,idna==3.7,certifi==2024.7.4,charset-normalizer==3.3.2,lxml==5.2.2
+requirements = python3,sqlite3,kivy==2.3.1,requests==2.32.3,beautifulsoup4==4.12.3,pillow==10.4.0,numpy==1.26.4,urllib3==2.2.2,chardet==5.2.0,idna==3.7,certifi==2024.7.4,charset-normalizer==3.3.2,lxml==5.2.2
 
 # (str) Custom source folders for requirements
 # Sets custom source for any requirements with recipes
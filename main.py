@@ -12,6 +12,7 @@
 import os
 import sys
 import logging
+import importlib.util
 from pathlib import Path
 
 # 添加项目根目录到Python路径
@@ -19,37 +20,17 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 def setup_logging():
-    """设置日志系统"""
-    # 确保日志目录存在
-    log_dir = project_root / "logs"
-    log_dir.mkdir(exist_ok=True)
-
-    # 配置日志格式
-    log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-
-    # 配置日志处理器
-    handlers = [
-        logging.StreamHandler(sys.stdout),  # 控制台输出
-        logging.FileHandler(log_dir / "app.log", encoding='utf-8')  # 文件输出
-    ]
-
-    # 设置日志级别
-    log_level = logging.DEBUG if os.getenv('DEBUG', '').lower() == 'true' else logging.INFO
-
-    logging.basicConfig(
-        level=log_level,
-        format=log_format,
-        handlers=handlers
-    )
-
-    # 设置第三方库的日志级别
-    logging.getLogger('kivy').setLevel(logging.WARNING)
-    logging.getLogger('PIL').setLevel(logging.WARNING)
-    logging.getLogger('urllib3').setLevel(logging.WARNING)
-    logging.getLogger('requests').setLevel(logging.WARNING)
+    """设置日志系统
+
+    使用 src.utils.log_pipeline 的异步日志管道（队列+后台线程写文件、轮转和压缩），
+    src 包的导出是延迟导入的，导入日志管道不会加载 Kivy；Kivy 在之后导入应用时才加载。
+    """
+    from src.utils.log_pipeline import setup_logging as setup_log_pipeline
+
+    setup_log_pipeline()
 
 def check_dependencies():
-    """检查必要的依赖"""
+    """检查必要的依赖（只查找包，不导入，避免在启动时加载它们）"""
     required_packages = {
         'kivy': 'kivy',
         'requests': 'requests',
@@ -60,9 +41,7 @@ def check_dependencies():
     missing_packages = []
 
     for package_name, import_name in required_packages.items():
-        try:
-            __import__(import_name)
-        except ImportError:
+        if importlib.util.find_spec(import_name) is None:
             missing_packages.append(package_name)
 
     if missing_packages:
@@ -102,28 +81,29 @@ def main():
         # 打印横幅
         print_banner()
 
+        # 检查依赖（日志系统依赖已安装的包，此处直接输出到控制台）
+        check_dependencies()
+
+        # 设置环境（必须在导入Kivy之前）
+        setup_environment()
+
         # 设置日志
         setup_logging()
         logger = logging.getLogger(__name__)
 
+        from src.utils import startup
+        startup.mark("setup_logging")
+
         logger.info("=" * 60)
         logger.info("齐齐哈尔大学教务系统查询工具启动")
         logger.info("版本: 2.0.0 (重构版)")
         logger.info("=" * 60)
-
-        # 检查依赖
-        logger.info("检查依赖包...")
-        check_dependencies()
-        logger.info("依赖检查完成")
-
-        # 设置环境
-        logger.info("设置运行环境...")
-        setup_environment()
-        logger.info("环境设置完成")
+        logger.info("依赖检查和环境设置完成")
 
         # 导入并启动应用
         logger.info("正在启动应用...")
         from src import EducationSystemApp
+        startup.mark("import_app")
 
         app = EducationSystemApp()
         app.run()
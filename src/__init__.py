@@ -9,7 +9,11 @@ __version__ = "2.0.0"
 __author__ = "Education System Team"
 __description__ = "齐齐哈尔大学教务系统查询工具 - 重构版本"
 
-# 导出主要组件
-from .app import EducationSystemApp
+# 导出主要组件（延迟导入：导入 src 包本身不会加载 Kivy）
+from .utils.lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'EducationSystemApp': '.app',
+})
 
 __all__ = ['EducationSystemApp']
@@ -6,23 +6,18 @@
 """
 
 import os
-import sys
 import logging
-from typing import Optional
+import importlib
+import threading
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
 from kivy.core.window import Window
+from kivy.clock import Clock
 
-# 设置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('logs/app.log', encoding='utf-8')
-    ]
-)
+# 设置日志（异步日志管道，重复调用不会重复配置）
+from .utils.log_pipeline import setup_logging
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # 导入模块
@@ -30,8 +25,24 @@ from .core.config import ensure_directories, get_config
 from .utils.font_manager import init_fonts
 from .utils.memory_manager import get_memory_manager, optimize_memory
 from .utils.helpers import clean_history_files
-from .ui.screens import MainScreen, LoginScreen, QueryScoresScreen, SwitchAccountScreen, NetworkScreen, ConfigScreen
+from .utils.metrics import start_metrics_exporter, stop_metrics_exporter
+from .utils.tracing import shutdown_tracing
+from .utils.profiler import profiled
+from .utils import startup
+from .ui.screen_cache import ScreenCache
 from .ui.themes import set_theme, get_device_type
+from .core.session import get_session_manager
+
+def _screen_factory(app, module_name: str, class_name: str):
+    """界面创建函数：界面模块在第一次创建该界面时才导入"""
+    def factory():
+        module = importlib.import_module(f"{__package__}.ui.screens.{module_name}")
+        return getattr(module, class_name)(app)
+    return factory
+
+def _cached_screen(name: str):
+    """界面实例属性：返回缓存中已创建的界面，未创建或已淘汰时为None"""
+    return property(lambda self: self.screens.peek(name))
 
 class EducationSystemApp(App):
     """齐齐哈尔大学教务系统查询工具主应用"""
@@ -43,13 +54,19 @@ class EducationSystemApp(App):
         self.title = '齐齐哈尔大学教务系统查询工具'
         self.icon = 'assets/icons/app_icon.png' if os.path.exists('assets/icons/app_icon.png') else None
         
-        # 屏幕实例
-        self.main_screen: Optional[MainScreen] = None
-        self.login_screen: Optional[LoginScreen] = None
-        self.query_scores_screen: Optional[QueryScoresScreen] = None
-        self.switch_account_screen: Optional[SwitchAccountScreen] = None
-        self.network_screen: Optional[NetworkScreen] = None
-        self.config_screen: Optional[ConfigScreen] = None
+        # 屏幕实例缓存（LRU，主界面常驻）
+        self.screens = ScreenCache(
+            factories={
+                'main': _screen_factory(self, 'main_screen', 'MainScreen'),
+                'login': _screen_factory(self, 'login_screen', 'LoginScreen'),
+                'switch': _screen_factory(self, 'account_screen', 'SwitchAccountScreen'),
+                'query': _screen_factory(self, 'query_screen', 'QueryScoresScreen'),
+                'network': _screen_factory(self, 'network_screen', 'NetworkScreen'),
+                'config': _screen_factory(self, 'config_screen', 'ConfigScreen'),
+            },
+            max_screens=get_config("SCREEN_CACHE_SIZE", 4),
+            pinned=('main',)
+        )
         
         # 内存管理器
         self.memory_manager = get_memory_manager()
@@ -68,6 +85,7 @@ class EducationSystemApp(App):
             
             # 显示主界面
             self.show_main_screen()
+            startup.mark("main_screen")
             
             return self.root
             
@@ -85,6 +103,7 @@ class EducationSystemApp(App):
             error_layout.add_widget(error_label)
             return error_layout
     
+    @profiled("initialize_app")
     def _initialize_app(self):
         """初始化应用"""
         if self._initialized:
@@ -96,10 +115,7 @@ class EducationSystemApp(App):
             # 确保必要目录存在
             ensure_directories()
             
-            # 清理历史文件
-            clean_history_files()
-            
-            # 初始化字体
+            # 初始化字体（首帧就需要显示中文，不能推迟）
             font_success = init_fonts()
             if font_success:
                 logger.info("字体初始化成功")
@@ -116,16 +132,43 @@ class EducationSystemApp(App):
             # 根据设备类型设置主题（可以根据需要调整）
             set_theme(dark_mode=False)  # 默认使用亮色主题
             
-            # 优化内存设置
-            optimize_memory()
-            
+            # 清理历史文件、内存优化和指标导出在首帧之后进行（见 _run_deferred_startup）
             self._initialized = True
+            startup.mark("initialize_app")
             logger.info("应用初始化完成")
             
         except Exception as e:
             logger.error(f"应用初始化失败: {e}")
             raise
     
+    def on_start(self):
+        """应用启动：等待首帧绘制完成后再执行非必要的初始化"""
+        Window.bind(on_flip=self._on_first_frame)
+
+    def _on_first_frame(self, *args):
+        """首帧已绘制"""
+        Window.unbind(on_flip=self._on_first_frame)
+        startup.mark("first_frame")
+        startup.log_summary()
+        Clock.schedule_once(lambda dt: self._run_deferred_startup(), 0)
+
+    def _run_deferred_startup(self):
+        """首帧之后的初始化工作"""
+        try:
+            # 清理历史文件（文件IO，放到后台线程）
+            threading.Thread(target=clean_history_files, name="clean-history", daemon=True).start()
+
+            # 优化内存设置
+            optimize_memory()
+
+            # 启动指标导出端点（可选）
+            if get_config("METRICS_ENABLED", False):
+                start_metrics_exporter()
+
+            logger.debug("延迟初始化完成")
+        except Exception as e:
+            logger.error(f"延迟初始化失败: {e}")
+
     def _setup_window(self):
         """设置窗口属性"""
         try:
@@ -155,30 +198,30 @@ class EducationSystemApp(App):
         except Exception as e:
             logger.warning(f"设置窗口属性时出错: {e}")
     
+    # 各界面实例（由界面缓存管理）
+    main_screen = _cached_screen('main')
+    login_screen = _cached_screen('login')
+    switch_account_screen = _cached_screen('switch')
+    query_scores_screen = _cached_screen('query')
+    network_screen = _cached_screen('network')
+    config_screen = _cached_screen('config')
+
     def _ensure_screen(self, screen_name: str):
-        """确保指定界面已创建"""
+        """确保指定界面已创建，返回界面实例"""
         try:
-            if screen_name == 'main' and self.main_screen is None:
-                self.main_screen = MainScreen(self)
-                logger.debug("主界面已创建")
-            elif screen_name == 'login' and self.login_screen is None:
-                self.login_screen = LoginScreen(self)
-                logger.debug("登录界面已创建")
-            elif screen_name == 'switch' and self.switch_account_screen is None:
-                self.switch_account_screen = SwitchAccountScreen(self)
-                logger.debug("账号切换界面已创建")
-            elif screen_name == 'query' and self.query_scores_screen is None:
-                self.query_scores_screen = QueryScoresScreen(self)
-                logger.debug("成绩查询界面已创建")
-            elif screen_name == 'network' and self.network_screen is None:
-                self.network_screen = NetworkScreen(self)
-                logger.debug("网络设置界面已创建")
-            elif screen_name == 'config' and self.config_screen is None:
-                self.config_screen = ConfigScreen(self)
-                logger.debug("配置管理界面已创建")
+            return self.screens.get(screen_name)
         except Exception as e:
             logger.error(f"创建界面 {screen_name} 时出错: {e}")
             raise
+
+    def _prewarm_next_screens(self):
+        """空闲时预先创建主界面之后最可能打开的界面"""
+        if not get_config("SCREEN_PREWARM_ENABLED", True):
+            return
+        if get_session_manager().get_current_account():
+            self.screens.prewarm('query', 'switch')
+        else:
+            self.screens.prewarm('login')
     
     def show_main_screen(self):
         """显示主界面"""
@@ -188,8 +231,8 @@ class EducationSystemApp(App):
             self.root.clear_widgets()
             self.root.add_widget(self.main_screen)
             
-            # 清理内存
-            self.memory_manager.cleanup_textures()
+            # 内存由内存管理器定期清理，切换界面时不做垃圾回收
+            self._prewarm_next_screens()
             logger.debug("已显示主界面")
             
         except Exception as e:
@@ -202,6 +245,8 @@ class EducationSystemApp(App):
             self._ensure_screen('login')
             self.root.clear_widgets()
             self.root.add_widget(self.login_screen)
+            # 后台预取登录页token和验证码
+            self.login_screen.warmup()
             logger.debug("已显示登录界面")
             
         except Exception as e:
@@ -282,6 +327,9 @@ class EducationSystemApp(App):
         try:
             logger.info("正在清理应用资源...")
             
+            # 释放界面实例
+            self.screens.clear()
+
             # 清理内存管理器
             if hasattr(self, 'memory_manager'):
                 self.memory_manager.cleanup()
@@ -289,6 +337,12 @@ class EducationSystemApp(App):
             # 清理临时文件
             clean_history_files()
             
+            # 停止指标导出端点
+            stop_metrics_exporter()
+
+            # 刷新链路追踪数据
+            shutdown_tracing()
+            
             logger.info("应用资源清理完成")
             
         except Exception as e:
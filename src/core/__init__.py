@@ -6,9 +6,14 @@
 """
 
 from .config import CONFIG, get_config, update_config
-from .session import SessionManager, AutoSessionManager
-from .auth import CaptchaHandler, LoginManager
-from .api import make_request, query_scores, extract_student_name
+from ..utils.lazy import lazy_exports
+
+# 会话、认证和API模块依赖 requests/bs4/PIL，在首次访问时才导入
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'SessionManager': '.session', 'AutoSessionManager': '.session',
+    'CaptchaHandler': '.auth', 'LoginManager': '.auth',
+    'make_request': '.api', 'query_scores': '.api', 'extract_student_name': '.api',
+})
 
 __all__ = [
     'CONFIG', 'get_config', 'update_config',
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+账号状态模块
+为主界面提供当前账号的姓名和会话状态（stale-while-revalidate）：
+- get() 立即返回缓存的状态（内存中没有时从账号存储读取上次的结果）
+- refresh() 在后台线程请求成绩页检查会话并解析姓名，同一账号同时只有一个检查
+- 检查结果写回账号存储，并通过 Clock 在主线程通知订阅者
+"""
+
+import time
+import logging
+import threading
+from typing import NamedTuple, Optional, Callable, Dict, List
+
+from kivy.clock import Clock
+
+from .config import get_config
+from .session import get_session_manager
+from .store import get_account_store
+from .api import make_request, extract_student_name
+
+logger = logging.getLogger(__name__)
+
+# 会话状态
+STATE_VALID = 'valid'
+STATE_EXPIRED = 'expired'
+STATE_UNKNOWN = 'unknown'
+
+# 后台检查的请求参数：界面上已显示缓存状态，失败时不需要多次重试
+STATUS_REQUEST_TIMEOUT = 10
+STATUS_REQUEST_RETRIES = 1
+
+# 姓名保存在账号存储的元数据中
+_NAME_META_PREFIX = "student_name:"
+
+class AccountStatus(NamedTuple):
+    """账号状态"""
+    student_id: str
+    name: Optional[str]
+    state: str
+    checked_at: float       # 上次检查完成的时间戳，0表示从未检查
+    refreshing: bool        # 是否正在后台检查
+
+    def is_fresh(self, ttl: float) -> bool:
+        """检查结果是否在有效期内"""
+        return self.checked_at > 0 and time.time() - self.checked_at < ttl
+
+StatusCallback = Callable[[AccountStatus], None]
+
+class AccountStatusService:
+    """账号状态服务"""
+
+    def __init__(self):
+        self.session_manager = get_session_manager()
+        self.store = get_account_store()
+        self._statuses: Dict[str, AccountStatus] = {}
+        # 每个账号的缓存状态对应的会话保存时间，重新登录后会话改变，之前的状态随之作废
+        self._checked_sessions: Dict[str, Optional[float]] = {}
+        self._subscribers: List[StatusCallback] = []
+        self._lock = threading.Lock()
+
+    def get(self, student_id: str) -> AccountStatus:
+        """立即返回账号的缓存状态，不发起网络请求"""
+        with self._lock:
+            status = self._statuses.get(student_id)
+        if status is None:
+            status = self._load_cached(student_id)
+            session_saved = self._session_saved(student_id)
+            with self._lock:
+                if student_id not in self._statuses:
+                    self._statuses[student_id] = status
+                    self._checked_sessions[student_id] = session_saved
+                status = self._statuses[student_id]
+        return status
+
+    def refresh(self, student_id: str, force: bool = False) -> AccountStatus:
+        """在后台检查账号状态，返回当前的缓存状态
+
+        Args:
+            student_id: 学号
+            force: 忽略有效期，立即重新检查
+        """
+        self.get(student_id)
+        ttl = get_config("ACCOUNT_STATUS_TTL", 60)
+        session_saved = self._session_saved(student_id)
+        with self._lock:
+            status = self._statuses[student_id]
+            if self._checked_sessions.get(student_id) != session_saved:
+                # 登录后保存了新会话，之前的状态（例如已过期）不再适用
+                status = status._replace(state=STATE_UNKNOWN, checked_at=0.0)
+                self._statuses[student_id] = status
+                self._checked_sessions[student_id] = session_saved
+            if status.refreshing or (not force and status.is_fresh(ttl)):
+                return status
+            status = self._statuses[student_id] = status._replace(refreshing=True)
+
+        threading.Thread(
+            target=self._revalidate, args=(student_id,),
+            name=f"account-status-{student_id}", daemon=True
+        ).start()
+        return status
+
+    def invalidate(self, student_id: Optional[str] = None):
+        """作废缓存的检查结果（登录、切换账号后调用），状态变为未知直到重新检查，保留已显示的姓名"""
+        with self._lock:
+            for key, status in list(self._statuses.items()):
+                if student_id is None or key == student_id:
+                    self._statuses[key] = status._replace(state=STATE_UNKNOWN, checked_at=0.0)
+
+    def subscribe(self, callback: StatusCallback):
+        """订阅状态更新（在主线程回调）"""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: StatusCallback):
+        """取消订阅"""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _load_cached(self, student_id: str) -> AccountStatus:
+        """从账号存储读取上次的检查结果"""
+        name = None
+        state = STATE_UNKNOWN
+        try:
+            name = self.store.get_meta(_NAME_META_PREFIX + student_id)
+            account = self.store.get_account(student_id)
+            if account and account.get("session_valid") is not None:
+                state = STATE_VALID if account["session_valid"] else STATE_EXPIRED
+        except Exception as e:
+            logger.debug(f"读取账号 {student_id} 的缓存状态失败: {e}")
+        # 上次运行的结果只用于立即显示，checked_at为0使首次refresh总是重新检查
+        return AccountStatus(student_id, name, state, 0.0, False)
+
+    def _session_saved(self, student_id: str) -> Optional[float]:
+        """账号会话的保存时间（登录时更新）"""
+        try:
+            account = self.store.get_account(student_id)
+            return account.get("session_saved") if account else None
+        except Exception:
+            return None
+
+    def _revalidate(self, student_id: str):
+        """后台线程：请求成绩页检查会话并解析姓名"""
+        previous = self.get(student_id)
+        name = previous.name
+        session_saved = self._session_saved(student_id)
+        try:
+            resp = make_request(get_config("SCORES_URL"), timeout=STATUS_REQUEST_TIMEOUT,
+                                max_retries=STATUS_REQUEST_RETRIES)
+            if resp is not None and resp.status_code == 200 and "login" not in resp.url:
+                state = STATE_VALID
+                name = extract_student_name(resp.text) or name
+            elif resp is not None:
+                state = STATE_EXPIRED
+            else:
+                state = STATE_UNKNOWN
+        except Exception as e:
+            logger.error(f"检查账号 {student_id} 状态失败: {e}")
+            state = STATE_UNKNOWN
+
+        if self.session_manager.get_current_account() != student_id:
+            # 检查期间切换了账号，请求使用的已经不是这个账号的会话
+            logger.debug(f"账号 {student_id} 已不是当前账号，丢弃检查结果")
+            with self._lock:
+                self._statuses[student_id] = previous._replace(refreshing=False)
+            return
+
+        status = AccountStatus(student_id, name, state, time.time(), False)
+        with self._lock:
+            self._statuses[student_id] = status
+            self._checked_sessions[student_id] = session_saved
+        self._persist(status, previous)
+        Clock.schedule_once(lambda dt: self._notify(status), 0)
+
+    def _persist(self, status: AccountStatus, previous: AccountStatus):
+        """把检查结果写回账号存储，供下次启动时立即显示"""
+        try:
+            if status.name and status.name != previous.name:
+                self.store.set_meta(_NAME_META_PREFIX + status.student_id, status.name)
+            if status.state == STATE_VALID:
+                self.store.update_account(status.student_id, session_valid=1, last_verified=status.checked_at)
+            elif status.state == STATE_EXPIRED:
+                self.store.update_account(status.student_id, session_valid=0)
+        except Exception as e:
+            logger.debug(f"保存账号 {status.student_id} 状态失败: {e}")
+
+    def _notify(self, status: AccountStatus):
+        for callback in list(self._subscribers):
+            try:
+                callback(status)
+            except Exception as e:
+                logger.error(f"账号状态回调出错: {e}")
+
+# 全局账号状态服务实例
+_account_status_service = None
+
+def get_account_status_service() -> AccountStatusService:
+    """获取账号状态服务实例"""
+    global _account_status_service
+    if _account_status_service is None:
+        _account_status_service = AccountStatusService()
+    return _account_status_service
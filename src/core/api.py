@@ -8,16 +8,27 @@ API模块
 import re
 import time
 import json
+import hashlib
 import logging
 import requests
-from typing import Optional, Dict, Any, List
-from bs4 import BeautifulSoup
+from typing import Optional, Dict, Any, List, TYPE_CHECKING
 
 from .config import get_config
-from .session import get_session
+from .session import get_session, get_session_manager
+from ..utils.metrics import observe_request, endpoint_of, SCORE_CHANGE_EVENTS
+from ..utils.tracing import span
+from ..utils.profiler import profiled
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
 logger = logging.getLogger(__name__)
 
+def parse_html(html: str) -> "BeautifulSoup":
+    """解析HTML（bs4在首次解析时才导入，不占用启动时间）"""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, 'html.parser')
+
 # 全局请求头
 GLOBAL_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -30,7 +41,8 @@ GLOBAL_HEADERS = {
 
 def make_request(url: str, method: str = "GET", data: Optional[Dict] = None, 
                 headers: Optional[Dict] = None, allow_redirects: bool = True, 
-                timeout: int = 10, max_retries: int = 3) -> Optional[requests.Response]:
+                timeout: int = 10, max_retries: int = 3,
+                session: Optional[requests.Session] = None) -> Optional[requests.Response]:
     """统一处理HTTP请求，简化错误处理和日志记录，添加智能重试机制
     
     Args:
@@ -41,11 +53,21 @@ def make_request(url: str, method: str = "GET", data: Optional[Dict] = None,
         allow_redirects: 是否允许重定向
         timeout: 超时时间
         max_retries: 最大重试次数
+        session: 使用的会话，默认使用全局会话（批量重新登录时每个账号各用一个）
         
     Returns:
         响应对象，失败返回None
     """
-    current_session = get_session()
+    with span("http.request", method=method.upper(), endpoint=endpoint_of(url)) as request_span:
+        return _make_request(url, method, data, headers, allow_redirects, timeout, max_retries,
+                             request_span, session)
+
+def _make_request(url: str, method: str, data: Optional[Dict], headers: Optional[Dict],
+                  allow_redirects: bool, timeout: int, max_retries: int,
+                  request_span, session: Optional[requests.Session] = None) -> Optional[requests.Response]:
+    """make_request 的实现，request_span 用于记录状态码和重试次数"""
+    current_session = session or get_session()
+    start_time = time.perf_counter()
     
     for attempt in range(max_retries):
         try:
@@ -78,7 +100,15 @@ def make_request(url: str, method: str = "GET", data: Optional[Dict] = None,
                 return None
                 
             # 记录请求结果
-            logger.debug(f"{method} {url} - 状态码: {response.status_code}")
+            elapsed = time.perf_counter() - start_time
+            outcome = f"{response.status_code // 100}xx"
+            logger.debug(f"{method} {url} - 状态码: {response.status_code}", extra={
+                "method": method.upper(), "endpoint": endpoint_of(url), "status_code": response.status_code,
+                "latency_ms": round(elapsed * 1000, 1), "outcome": outcome
+            })
+            request_span.set_attribute("status_code", response.status_code)
+            request_span.set_attribute("attempts", attempt + 1)
+            observe_request(method, url, elapsed, outcome)
             
             return response
         except requests.exceptions.Timeout:
@@ -88,6 +118,8 @@ def make_request(url: str, method: str = "GET", data: Optional[Dict] = None,
                 time.sleep(wait_time)
             else:
                 logger.error(f"请求超时: {url}，已达最大尝试次数")
+                observe_request(method, url, time.perf_counter() - start_time, "timeout")
+                request_span.set_status("timeout")
                 return None
         except requests.exceptions.ConnectionError:
             wait_time = 2 ** attempt  # 指数退避策略
@@ -96,9 +128,13 @@ def make_request(url: str, method: str = "GET", data: Optional[Dict] = None,
                 time.sleep(wait_time)
             else:
                 logger.error(f"连接错误: {url}，已达最大尝试次数")
+                observe_request(method, url, time.perf_counter() - start_time, "connection_error")
+                request_span.set_status("connection_error")
                 return None
         except Exception as e:
             logger.error(f"请求异常: {url}, 错误: {str(e)}")
+            observe_request(method, url, time.perf_counter() - start_time, "error")
+            request_span.set_status("error")
             return None
     
     return None
@@ -113,7 +149,7 @@ def extract_student_name(html_content: str) -> Optional[str]:
         学生姓名，失败返回None
     """
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = parse_html(html_content)
         user_info_span = soup.find('span', class_='user-info')
         
         if user_info_span:
@@ -216,7 +252,7 @@ class TempFileManager:
         
         self.temp_files.clear()
 
-def get_scores_from_api(soup: BeautifulSoup, temp_manager: TempFileManager, 
+def get_scores_from_api(soup: "BeautifulSoup", temp_manager: TempFileManager, 
                        debug_mode: bool = False) -> List[List[str]]:
     """从API获取成绩数据
     
@@ -246,7 +282,7 @@ def get_scores_from_api(soup: BeautifulSoup, temp_manager: TempFileManager,
     
     # 构建完整URL
     full_data_url = f"{get_config('BASE_URL')}{data_url}"
-    logger.info(f"获取成绩数据URL: {full_data_url}")
+    logger.debug(f"获取成绩数据URL: {full_data_url}", extra={"endpoint": endpoint_of(full_data_url)})
     
     # 请求成绩数据
     try:
@@ -268,7 +304,9 @@ def get_scores_from_api(soup: BeautifulSoup, temp_manager: TempFileManager,
                 if score_data and len(score_data) > 0 and 'list' in score_data[0]:
                     score_list = score_data[0]['list']
                     if score_list and len(score_list) > 0:
-                        logger.info(f"成功获取到 {len(score_list)} 条成绩记录")
+                        logger.info(f"成功获取到 {len(score_list)} 条成绩记录", extra={
+                            "endpoint": endpoint_of(full_data_url), "outcome": "ok", "count": len(score_list)
+                        })
                         
                         # 转换为表格行格式
                         rows = []
@@ -312,7 +350,7 @@ def get_scores_from_api(soup: BeautifulSoup, temp_manager: TempFileManager,
     
     return []
 
-def get_scores_from_html(soup: BeautifulSoup) -> List[List[str]]:
+def get_scores_from_html(soup: "BeautifulSoup") -> List[List[str]]:
     """从HTML解析成绩表格
 
     Args:
@@ -492,7 +530,7 @@ def query_scores(debug_mode: bool = False) -> bool:
                 logger.debug(f"已保存页面内容到: {debug_file}")
 
         # 解析HTML
-        soup = BeautifulSoup(scores_resp.text, 'html.parser')
+        soup = parse_html(scores_resp.text)
 
         # 提取学生姓名
         student_name = extract_student_name(scores_resp.text)
@@ -567,6 +605,26 @@ def convert_rows_to_dict(score_rows: List[List[str]]) -> List[dict]:
     return dict_scores
 
 
+# 各账号上次查询到的成绩指纹，用于检测成绩变化
+_score_fingerprints: Dict[str, str] = {}
+
+def _track_score_changes(score_dicts: List[dict]):
+    """比较成绩指纹，发生变化时记录成绩变化事件"""
+    try:
+        account = get_session_manager().get_current_account() or "unknown"
+        payload = json.dumps(score_dicts, ensure_ascii=False, sort_keys=True)
+        fingerprint = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+        previous = _score_fingerprints.get(account)
+        _score_fingerprints[account] = fingerprint
+        if previous is not None and previous != fingerprint:
+            SCORE_CHANGE_EVENTS.inc(account=account)
+            logger.info(f"检测到账号 {account} 的成绩发生变化")
+    except Exception as e:
+        logger.debug(f"记录成绩变化失败: {e}")
+
+
+@profiled("get_scores_data")
 def get_scores_data(debug_mode: bool = False) -> tuple[bool, list, str]:
     """获取本学期成绩数据
 
@@ -592,7 +650,7 @@ def get_scores_data(debug_mode: bool = False) -> tuple[bool, list, str]:
             return False, [], ""
 
         # 解析HTML
-        soup = BeautifulSoup(scores_resp.text, 'html.parser')
+        soup = parse_html(scores_resp.text)
 
         # 提取学生姓名
         student_name = extract_student_name(scores_resp.text)
@@ -613,6 +671,9 @@ def get_scores_data(debug_mode: bool = False) -> tuple[bool, list, str]:
         # 转换为字典格式
         score_dicts = convert_rows_to_dict(score_rows)
 
+        # 记录成绩变化
+        _track_score_changes(score_dicts)
+
         # 清理临时文件
         temp_manager.clean_all()
 
@@ -6,18 +6,103 @@
 """
 
 import os
+import re
 import time
 import hashlib
 import logging
+from io import BytesIO
 from typing import Optional, Tuple
-from PIL import Image
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
 
 from .config import get_config
 from .session import get_session
+from .api import parse_html
+from ..utils.metrics import CAPTCHA_ATTEMPTS, LOGIN_ATTEMPTS
+from ..utils.tracing import span, traced, wrap_context
+from ..utils.profiler import profiled
 
 logger = logging.getLogger(__name__)
 
+# 预取的tokenValue有效期（秒），超过后提交前重新获取
+TOKEN_MAX_AGE = 300
+
+def hash_password(password: str) -> str:
+    """计算登录表单提交的密码摘要（教务系统要求MD5）"""
+    return hashlib.md5(password.encode('utf-8')).hexdigest()
+
+def build_login_form(student_id: str, password_md5: str, captcha_code: str, token_value: str) -> dict:
+    """构造登录表单"""
+    return {
+        "j_username": student_id,
+        "j_password": password_md5,
+        "j_captcha": captcha_code,
+        "tokenValue": token_value
+    }
+
+# 以下解析函数只依赖字符串和基本类型，可以放到进程池中执行（见relogin模块）
+
+def parse_token_value(html: str) -> Optional[str]:
+    """从登录页HTML中提取tokenValue，未找到返回None"""
+    soup = parse_html(html)
+    token_input = soup.find('input', id='tokenValue')
+    if token_input:
+        return token_input.get('value', '')
+    return None
+
+def extract_error_message(soup) -> Optional[str]:
+    """从HTML中提取错误信息"""
+    try:
+        # 查找JavaScript中的alert信息
+        scripts = soup.find_all('script')
+        for script in scripts:
+            if script.string:
+                script_content = script.string
+                if 'alert(' in script_content:
+                    # 提取alert中的信息
+                    alert_match = re.search(r'alert\(["\']([^"\']+)["\']', script_content)
+                    if alert_match:
+                        return alert_match.group(1)
+
+        # 查找错误提示div
+        error_divs = soup.find_all('div', class_=['error', 'alert', 'message'])
+        for div in error_divs:
+            if div.get_text(strip=True):
+                return div.get_text(strip=True)
+
+        return None
+    except Exception as e:
+        logger.debug(f"提取错误信息失败: {e}")
+        return None
+
+def classify_login_response(status_code: int, location: str, html: str) -> Tuple[str, Optional[str]]:
+    """根据响应状态码、Location和页面内容判断登录结果
+
+    Returns:
+        (结果, 页面中的错误提示)，结果取值：
+        "success": 登录成功
+        "captcha_error": 验证码错误
+        "credential_error": 用户名或密码错误
+        "unknown": 未知错误
+    """
+    if status_code == 302:
+        if "errorCode=badCaptcha" in location or location.endswith("/login?errorCode=badCaptcha"):
+            return "captcha_error", None
+        elif location.endswith("/login?errorCode=badCredentials"):
+            return "credential_error", None
+        else:
+            return "success", None
+
+    # 解析HTML查找错误信息
+    error_msg = extract_error_message(parse_html(html))
+    if error_msg:
+        # 根据错误信息判断错误类型
+        if "验证码" in error_msg or "captcha" in error_msg.lower():
+            return "captcha_error", error_msg
+        elif "用户名" in error_msg or "密码" in error_msg or "credential" in error_msg.lower():
+            return "credential_error", error_msg
+
+    return "unknown", error_msg
+
 class TempFileManager:
     """临时文件管理器"""
     
@@ -64,14 +149,20 @@ class TempFileManager:
         self.temp_files.clear()
 
 class CaptchaHandler:
-    """验证码处理类，管理验证码的获取、显示和清理"""
+    """验证码处理类，管理验证码的获取、显示和清理
+
+    验证码以字节形式保存在内存中，只有调试模式下才会额外写入TEMP_DIR便于排查。
+    """
     
-    def __init__(self, base_url: Optional[str] = None):
+    def __init__(self, base_url: Optional[str] = None, debug_mode: Optional[bool] = None):
         """初始化验证码处理器"""
         self.base_url = base_url or get_config("BASE_URL")
-        self.current_captcha_path = None
-        # 清理所有历史验证码图片
-        self._clean_old_captchas()
+        self.debug_mode = get_config("DEBUG_MODE", False) if debug_mode is None else debug_mode
+        self.current_captcha: Optional[bytes] = None
+        self.current_captcha_path = None  # 仅调试模式下有值
+        # 调试模式下才会落盘，只有此时需要清理历史验证码图片
+        if self.debug_mode:
+            self._clean_old_captchas()
     
     def _clean_old_captchas(self):
         """清理所有历史验证码图片"""
@@ -89,26 +180,50 @@ class CaptchaHandler:
         except Exception as e:
             logger.debug(f"清理验证码目录时出错: {str(e)}")
     
+    @staticmethod
+    def validate_image(content: bytes) -> bool:
+        """在内存中校验验证码图片完整性"""
+        try:
+            from PIL import Image
+            Image.open(BytesIO(content)).verify()
+            return True
+        except Exception as img_error:
+            logger.error(f"验证码图片损坏: {img_error}")
+            return False
+    
+    def _save_debug_copy(self, content: bytes, timestamp: int, student_id: Optional[str]):
+        """调试模式下保存验证码副本，文件名中包含学号信息"""
+        try:
+            temp_dir = get_config("TEMP_DIR")
+            os.makedirs(temp_dir, exist_ok=True)
+            file_prefix = f"captcha_{student_id}_" if student_id else "captcha_"
+            captcha_path = os.path.join(temp_dir, f"{file_prefix}{timestamp}.jpg")
+            with open(captcha_path, "wb") as f:
+                f.write(content)
+            self.current_captcha_path = captcha_path
+            logger.debug(f"验证码图片已保存: {captcha_path}")
+        except Exception as e:
+            logger.debug(f"保存验证码副本失败: {e}")
+    
+    @traced("captcha.fetch")
     def get_captcha(self, refresh: bool = False, max_retries: int = 10, 
-                   delay: float = 0.5, student_id: Optional[str] = None) -> Optional[str]:
+                   delay: float = 0.5, student_id: Optional[str] = None) -> Optional[bytes]:
         """获取验证码，可选择是否刷新
         
         Args:
             refresh: 是否强制刷新验证码
             max_retries: 最大重试次数
             delay: 重试延迟时间(秒)
-            student_id: 学号，用于在文件名中标识
+            student_id: 学号，调试模式下用于在文件名中标识
             
         Returns:
-            验证码图片路径，失败返回None
+            验证码图片字节（JPEG），失败返回None
         """
-        # 如果请求刷新或当前没有验证码，则删除旧的验证码
-        if refresh or not self.current_captcha_path:
-            self.delete_current()
-        
         # 如果已有验证码且不需要刷新，则直接返回
-        if not refresh and self.current_captcha_path and os.path.exists(self.current_captcha_path):
-            return self.current_captcha_path
+        if not refresh and self.current_captcha:
+            return self.current_captcha
+        
+        self.delete_current()
             
         # 带重试机制获取新验证码
         for attempt in range(max_retries):
@@ -129,93 +244,84 @@ class CaptchaHandler:
                 # 检查响应是否有效
                 if not resp or resp.status_code != 200:
                     logger.warning(f"验证码请求失败，状态码: {resp.status_code if resp else 'None'}")
+                    CAPTCHA_ATTEMPTS.inc(result="http_error")
                     time.sleep(delay * (attempt + 1))
                     continue
                     
-                if len(resp.content) < 1024:  # 1024字节作为最小图片大小
-                    logger.warning(f"验证码图片过小: {len(resp.content)}字节")
+                content = resp.content
+                if len(content) < 1024:  # 1024字节作为最小图片大小
+                    logger.warning(f"验证码图片过小: {len(content)}字节")
+                    CAPTCHA_ATTEMPTS.inc(result="too_small")
                     time.sleep(delay * (attempt + 1))
                     continue
                 
-                # 保存验证码图片，文件名中包含学号信息
-                file_prefix = f"captcha_{student_id}_" if student_id else "captcha_"
-                captcha_path = os.path.join(get_config("TEMP_DIR"), f"{file_prefix}{timestamp}.jpg")
-                with open(captcha_path, "wb") as f:
-                    f.write(resp.content)
-                
-                # 尝试打开图片
-                try:
-                    img = Image.open(captcha_path)
-                    img.verify()  # 验证图片完整性
-                    
-                    # 不自动显示图片，避免UI卡死
-                    # self._show_captcha(captcha_path)  # 注释掉自动显示
-                    logger.info(f"验证码图片已保存: {captcha_path}")
-                    
-                    # 更新当前验证码路径
-                    self.current_captcha_path = captcha_path
-                    return captcha_path
-                except Exception as img_error:
-                    logger.error(f"验证码图片损坏: {img_error}")
-                    if os.path.exists(captcha_path):
-                        os.remove(captcha_path)
+                # 在内存中校验图片完整性
+                if not self.validate_image(content):
+                    CAPTCHA_ATTEMPTS.inc(result="corrupt")
                     time.sleep(delay)
                     continue
                 
+                self.current_captcha = content
+                if self.debug_mode:
+                    self._save_debug_copy(content, timestamp, student_id)
+                
+                logger.info(f"验证码已获取: {len(content)}字节")
+                CAPTCHA_ATTEMPTS.inc(result="ok")
+                return content
+                
             except Exception as e:
                 logger.error(f"获取验证码尝试 {attempt+1}/{max_retries} 失败: {str(e)}")
+                CAPTCHA_ATTEMPTS.inc(result="error")
                 time.sleep(delay * (attempt + 1))  # 指数退避策略
         
         logger.error("多次尝试后仍无法获取有效验证码")
         return None
     
-    def _show_captcha(self, image_path: str) -> bool:
-        """更可靠的方式显示验证码图片"""
+    def _show_captcha(self, content: Optional[bytes] = None) -> bool:
+        """用系统图片查看器显示验证码（命令行模式）"""
+        content = content or self.current_captcha
+        if not content:
+            return False
         try:
-            # 先尝试使用PIL显示
-            img = Image.open(image_path)
-            img.show()
+            from PIL import Image
+            Image.open(BytesIO(content)).show()
             return True
         except Exception as e:
-            logger.warning(f"PIL显示图片失败: {str(e)}，尝试使用系统命令")
-            
-            try:
-                # 根据操作系统选择不同的命令
-                if os.name == 'nt':  # Windows
-                    os.startfile(image_path)
-                elif os.name == 'posix':  # Linux/Mac
-                    import subprocess
-                    # 尝试使用系统默认图片查看器
-                    if os.system('which xdg-open > /dev/null') == 0:
-                        subprocess.run(['xdg-open', image_path])
-                    elif os.system('which open > /dev/null') == 0:  # MacOS
-                        subprocess.run(['open', image_path])
-                    else:
-                        logger.warning("无法找到合适的图片查看器")
-                        return False
-                return True
-            except Exception as e2:
-                logger.error(f"系统命令显示图片失败: {str(e2)}")
-                return False
+            logger.warning(f"PIL显示图片失败: {str(e)}")
+            return False
     
-    def refresh(self, student_id: Optional[str] = None) -> Optional[str]:
+    def solve_current(self) -> Optional[str]:
+        """用离线识别器识别当前验证码，模型不可用或置信度不足时返回None"""
+        if not self.current_captcha:
+            return None
+        try:
+            # 延迟导入，只有无人值守登录才需要NumPy
+            from .captcha_solver import get_captcha_solver
+            return get_captcha_solver().solve(self.current_captcha)
+        except Exception as e:
+            logger.error(f"验证码识别失败: {str(e)}")
+            return None
+
+    def refresh(self, student_id: Optional[str] = None) -> Optional[bytes]:
         """刷新验证码"""
         return self.get_captcha(refresh=True, student_id=student_id)
     
     def delete_current(self):
-        """删除当前验证码图片"""
+        """丢弃当前验证码（调试模式下同时删除图片文件）"""
+        self.current_captcha = None
         if self.current_captcha_path and os.path.exists(self.current_captcha_path):
             try:
                 os.remove(self.current_captcha_path)
                 logger.debug(f"已删除验证码图片: {self.current_captcha_path}")
             except Exception as e:
                 logger.error(f"删除验证码图片失败: {str(e)}")
-            self.current_captcha_path = None
+        self.current_captcha_path = None
     
     def cleanup(self):
         """清理资源"""
         self.delete_current()
-        self._clean_old_captchas()
+        if self.debug_mode:
+            self._clean_old_captchas()
 
 class LoginManager:
     """登录管理类，处理登录相关操作"""
@@ -226,12 +332,14 @@ class LoginManager:
         self.base_url = base_url or get_config("BASE_URL")
         self.login_page_url = f"{self.base_url}/login"
         self.login_post_url = f"{self.base_url}/j_spring_security_check"
-        self.captcha_handler = captcha_handler or CaptchaHandler(self.base_url)
+        self.captcha_handler = captcha_handler or CaptchaHandler(self.base_url, debug_mode=debug_mode)
         self.session_manager = session_manager
         self.token_value = ""
+        self._token_fetched_at = 0.0  # 最近一次获取tokenValue的时间，0表示已使用或未获取
         self.temp_manager = TempFileManager()
         self.temp_manager.set_debug_mode(debug_mode)
 
+    @traced("login.init_session")
     def init_session(self) -> bool:
         """初始化会话，获取必要的cookie和token"""
         logger.info("正在初始化会话...")
@@ -253,14 +361,14 @@ class LoginManager:
             logger.warning("警告: 未获取到JSESSIONID cookie")
 
         # 解析HTML，提取tokenValue
-        soup = BeautifulSoup(init_resp.text, 'html.parser')
-        token_input = soup.find('input', id='tokenValue')
-        if token_input:
-            self.token_value = token_input.get('value', '')
+        token_value = parse_token_value(init_resp.text)
+        if token_value is not None:
+            self.token_value = token_value
             logger.info(f"获取到tokenValue: {self.token_value}")
         else:
             logger.warning("警告: 未找到tokenValue，使用空值")
             self.token_value = ''
+        self._token_fetched_at = time.time()
 
         # 只在调试模式下保存登录页面
         if self.temp_manager.debug_mode:
@@ -272,8 +380,11 @@ class LoginManager:
 
         return True
 
+    @traced("login")
+    @profiled("login")
     def login(self, student_id: str, password: str, max_attempts: int = 3,
-              save_session: bool = True, captcha_code: Optional[str] = None) -> bool:
+              save_session: bool = True, captcha_code: Optional[str] = None,
+              auto_captcha: bool = False, password_hashed: bool = False) -> bool:
         """执行登录流程
 
         Args:
@@ -282,42 +393,49 @@ class LoginManager:
             max_attempts: 最大尝试次数
             save_session: 是否保存会话
             captcha_code: 验证码（如果提供则不会重新获取）
+            auto_captcha: 是否用离线识别器自动识别验证码（无人值守登录）
+            password_hashed: password是否已经是hash_password的结果
 
         Returns:
             登录是否成功
         """
-        # 初始化会话
-        if not self.init_session():
+        # 初始化会话（已预热且token未使用时跳过）
+        if not self.has_fresh_token() and not self.init_session():
             return False
 
         # 登录尝试
         for attempt in range(max_attempts):
             logger.info(f"\n--- 登录尝试 {attempt+1}/{max_attempts} ---")
 
+            # 上一次提交已用掉tokenValue，重试前重新获取
+            if attempt > 0 and not self.has_fresh_token() and not self.init_session():
+                return False
+
             # 获取验证码（如果没有提供）
             if not captcha_code:
-                captcha_path = self.captcha_handler.refresh(student_id=student_id)
-                if not captcha_path:
+                captcha_image = self.captcha_handler.refresh(student_id=student_id)
+                if not captcha_image:
                     logger.error("无法获取验证码，终止登录")
                     return False
 
+                if auto_captcha:
+                    # 无人值守登录，识别不出来就换一张
+                    captcha_code = self.captcha_handler.solve_current()
+                    if not captcha_code:
+                        logger.info("验证码无法识别，更换验证码")
+                        continue
                 # 在GUI模式下，验证码由外部提供
                 # 在命令行模式下，需要用户输入
-                if not hasattr(self, '_gui_mode') or not self._gui_mode:
+                elif not hasattr(self, '_gui_mode') or not self._gui_mode:
                     captcha_code = self._get_captcha_input(student_id)
                     if not captcha_code:
                         return False
 
             # 对密码进行MD5加密
-            md5_password = hashlib.md5(password.encode('utf-8')).hexdigest()
+            md5_password = password if password_hashed else hash_password(password)
 
             # 构造表单数据
-            form_data = {
-                "j_username": student_id,
-                "j_password": md5_password,
-                "j_captcha": captcha_code,
-                "tokenValue": self.token_value
-            }
+            form_data = build_login_form(student_id, md5_password, captcha_code, self.token_value)
 
             # 发送登录请求
             logger.info("正在提交登录请求...")
@@ -326,14 +444,16 @@ class LoginManager:
             # 延迟导入避免循环导入
             from .api import make_request
 
-            response = make_request(
-                self.login_post_url,
-                method="POST",
-                data=form_data,
-                headers=login_headers,
-                allow_redirects=False,
-                timeout=15
-            )
+            with span("login.post", account=student_id, attempt=attempt + 1):
+                response = make_request(
+                    self.login_post_url,
+                    method="POST",
+                    data=form_data,
+                    headers=login_headers,
+                    allow_redirects=False,
+                    timeout=15
+                )
+            self.consume_token()
 
             # 检测登录结果
             login_result = self._check_login_response(response)
@@ -365,8 +485,52 @@ class LoginManager:
         self.temp_manager.clean_all()
         return False
 
+    def has_fresh_token(self) -> bool:
+        """是否持有预取且尚未使用的tokenValue"""
+        return self._token_fetched_at > 0 and time.time() - self._token_fetched_at < TOKEN_MAX_AGE
+
+    def consume_token(self):
+        """提交登录表单后标记tokenValue已使用"""
+        self._token_fetched_at = 0.0
+
+    @traced("login.warmup")
+    def warmup(self, student_id: Optional[str] = None) -> Optional[bytes]:
+        """预热登录：获取登录页tokenValue并预取验证码
+
+        验证码绑定在服务端会话上，因此会话还没有JSESSIONID时先访问登录页建立会话，
+        已有会话时两个请求并行发出。
+
+        Returns:
+            预取的验证码图片字节，失败返回None
+        """
+        if 'JSESSIONID' not in get_session().cookies:
+            if not self.init_session():
+                return None
+            return self.captcha_handler.get_captcha(refresh=True, student_id=student_id)
+        return self._fetch_token_and_captcha(student_id)
+
+    def refresh_after_captcha_error(self, student_id: Optional[str] = None) -> Optional[bytes]:
+        """验证码错误后立即并行换取新的tokenValue和验证码"""
+        return self._fetch_token_and_captcha(student_id)
+
+    def _fetch_token_and_captcha(self, student_id: Optional[str]) -> Optional[bytes]:
+        """在同一会话上并行获取登录页tokenValue和验证码"""
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="login-warmup") as executor:
+            token_future = executor.submit(wrap_context(self.init_session))
+            captcha_future = executor.submit(
+                wrap_context(self.captcha_handler.get_captcha), refresh=True, student_id=student_id
+            )
+            token_ok = token_future.result()
+            captcha = captcha_future.result()
+
+        if not token_ok:
+            logger.warning("预取tokenValue失败，提交登录前会重新获取")
+        return captcha
+
     def _get_captcha_input(self, student_id: str) -> Optional[str]:
         """获取验证码输入（命令行模式）"""
+        # 验证码不再落盘，直接从内存交给系统图片查看器显示
+        self.captcha_handler._show_captcha()
         while True:
             action = input("请选择: 1.输入验证码  2.刷新验证码  3.取消登录\n").strip()
 
@@ -379,9 +543,11 @@ class LoginManager:
                     logger.warning("验证码不能为空，请重新输入")
             elif action == '2':
                 # 刷新验证码，传递学号参数
-                captcha_path = self.captcha_handler.refresh(student_id=student_id)
-                if not captcha_path:
+                captcha_image = self.captcha_handler.refresh(student_id=student_id)
+                if not captcha_image:
                     logger.error("刷新验证码失败，请重试")
+                else:
+                    self.captcha_handler._show_captcha(captcha_image)
             elif action == '3':
                 logger.info("取消登录")
                 self.captcha_handler.delete_current()
@@ -390,7 +556,15 @@ class LoginManager:
                 logger.warning("无效选项，请重新输入")
 
     def _check_login_response(self, response) -> str:
-        """检查登录响应的状态
+        """检查登录响应的状态，并记录登录结果指标"""
+        with span("login.check_response") as check_span:
+            result = self._classify_login_response(response)
+            check_span.set_attribute("result", result)
+        LOGIN_ATTEMPTS.inc(result=result)
+        return result
+
+    def _classify_login_response(self, response) -> str:
+        """判断登录响应的状态
 
         Returns:
             "success": 登录成功
@@ -402,16 +576,7 @@ class LoginManager:
             logger.error("登录请求失败")
             return "unknown"
 
-        if response.status_code == 302:
-            location = response.headers.get("Location", "")
-            if "errorCode=badCaptcha" in location or location.endswith("/login?errorCode=badCaptcha"):
-                return "captcha_error"
-            elif location.endswith("/login?errorCode=badCredentials"):
-                return "credential_error"
-            else:
-                return "success"
-        else:
-            # 分析响应内容
+        if response.status_code != 302:
             logger.error(f"登录失败，状态码：{response.status_code}")
 
             # 保存响应内容用于调试
@@ -423,47 +588,14 @@ class LoginManager:
             if debug_file:
                 logger.debug(f"已保存失败响应到: {debug_file}")
 
-            # 解析HTML查找错误信息
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # 查找JavaScript错误提示
-            error_msg = self._extract_error_message(soup)
-            if error_msg:
-                logger.warning(f"错误信息: {error_msg}")
-
-                # 根据错误信息判断错误类型
-                if "验证码" in error_msg or "captcha" in error_msg.lower():
-                    return "captcha_error"
-                elif "用户名" in error_msg or "密码" in error_msg or "credential" in error_msg.lower():
-                    return "credential_error"
-
-            return "unknown"
-
-    def _extract_error_message(self, soup) -> Optional[str]:
-        """从HTML中提取错误信息"""
-        try:
-            # 查找JavaScript中的alert信息
-            scripts = soup.find_all('script')
-            for script in scripts:
-                if script.string:
-                    script_content = script.string
-                    if 'alert(' in script_content:
-                        # 提取alert中的信息
-                        import re
-                        alert_match = re.search(r'alert\(["\']([^"\']+)["\']', script_content)
-                        if alert_match:
-                            return alert_match.group(1)
-
-            # 查找错误提示div
-            error_divs = soup.find_all('div', class_=['error', 'alert', 'message'])
-            for div in error_divs:
-                if div.get_text(strip=True):
-                    return div.get_text(strip=True)
-
-            return None
-        except Exception as e:
-            logger.debug(f"提取错误信息失败: {e}")
-            return None
+        result, error_msg = classify_login_response(
+            response.status_code,
+            response.headers.get("Location", ""),
+            response.text if response.status_code != 302 else ""
+        )
+        if error_msg:
+            logger.warning(f"错误信息: {error_msg}")
+        return result
 
     def set_gui_mode(self, gui_mode: bool = True):
         """设置GUI模式"""
@@ -5,6 +5,7 @@
 处理自动登录功能的启用、禁用和状态检查
 """
 
+import os
 import time
 import logging
 import threading
@@ -12,9 +13,10 @@ from typing import Optional, Dict, Any
 from kivy.clock import Clock
 
 from .config import get_config, update_config, save_config
-from .session import get_session_manager
+from .session import get_session_manager, get_session
 from .auth import LoginManager
 from .api import make_request, extract_student_name
+from ..utils.metrics import POLL_CYCLE_DURATION
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +25,7 @@ class AutoLoginManager:
     
     def __init__(self):
         self.session_manager = get_session_manager()
-        self.login_manager = LoginManager()
+        self.login_manager = LoginManager(session_manager=self.session_manager)
         self._check_thread: Optional[threading.Thread] = None
         self._stop_checking = False
         self._is_checking = False
@@ -36,6 +38,10 @@ class AutoLoginManager:
     def is_enabled(self) -> bool:
         """检查自动登录是否启用"""
         return get_config("AUTO_LOGIN_ENABLED", False)
+
+    def has_captcha_model(self) -> bool:
+        """是否有验证码识别模型（应用不附带模型，需要用教务系统的真实验证码训练）"""
+        return os.path.exists(get_config("CAPTCHA_MODEL_FILE", "data/captcha_model.npz"))
     
     def enable_auto_login(self) -> bool:
         """启用自动登录"""
@@ -45,6 +51,11 @@ class AutoLoginManager:
             if not current_account:
                 logger.warning("没有当前账号，无法启用自动登录")
                 return False
+
+            # 没有模型时无法识别验证码，会话过期后只能手动登录
+            if not self.has_captcha_model():
+                logger.warning("没有验证码识别模型，无法启用自动登录")
+                return False
             
             # 检查当前账号是否有有效会话
             if not self.session_manager.is_session_valid():
@@ -97,17 +108,24 @@ class AutoLoginManager:
             return self.enable_auto_login()
     
     def check_status(self) -> Dict[str, Any]:
-        """检查自动登录状态"""
+        """检查自动登录状态（会话状态取自账号状态服务的缓存，不发起网络请求，可在主线程调用）"""
         try:
+            # 延迟导入避免循环导入
+            from .account_status import get_account_status_service, STATE_VALID, STATE_EXPIRED
+
             current_account = self.session_manager.get_current_account()
             is_enabled = self.is_enabled()
-            is_session_valid = self.session_manager.is_session_valid() if current_account else False
+            session_state = get_account_status_service().get(current_account).state if current_account else None
+            is_session_valid = session_state == STATE_VALID
+            has_model = self.has_captcha_model()
             last_check_time = get_config("LAST_AUTO_LOGIN_TIME", 0)
             
             status = {
                 "enabled": is_enabled,
                 "current_account": current_account,
                 "session_valid": is_session_valid,
+                "session_state": session_state,
+                "captcha_model": has_model,
                 "last_check_time": last_check_time,
                 "is_checking": self._is_checking,
                 "check_interval": get_config("AUTO_LOGIN_CHECK_INTERVAL", 300)
@@ -117,10 +135,13 @@ class AutoLoginManager:
             if not current_account:
                 status["description"] = "未登录"
                 status["status_type"] = "warning"
+            elif not has_model:
+                status["description"] = "需要验证码模型"
+                status["status_type"] = "warning"
             elif not is_enabled:
                 status["description"] = "未启用"
                 status["status_type"] = "info"
-            elif not is_session_valid:
+            elif session_state == STATE_EXPIRED:
                 status["description"] = "会话无效"
                 status["status_type"] = "error"
             elif self._is_checking:
@@ -165,14 +186,15 @@ class AutoLoginManager:
         
         while not self._stop_checking and self.is_enabled():
             try:
-                # 检查会话是否有效
-                if not self.session_manager.is_session_valid():
-                    logger.info("检测到会话失效，尝试自动重新登录")
-                    self._attempt_auto_login()
-                
-                # 更新最后检查时间
-                update_config("LAST_AUTO_LOGIN_TIME", int(time.time()))
-                save_config()
+                with POLL_CYCLE_DURATION.time():
+                    # 检查会话是否有效
+                    if not self.session_manager.is_session_valid():
+                        logger.info("检测到会话失效，尝试自动重新登录")
+                        self._attempt_auto_login()
+                    
+                    # 更新最后检查时间
+                    update_config("LAST_AUTO_LOGIN_TIME", int(time.time()))
+                    save_config()
                 
                 # 等待下次检查
                 check_interval = get_config("AUTO_LOGIN_CHECK_INTERVAL", 300)
@@ -196,6 +218,12 @@ class AutoLoginManager:
                 logger.warning("没有当前账号，无法自动登录")
                 return False
             
+            if not self.has_captcha_model():
+                logger.warning("没有验证码识别模型，跳过无人值守重新登录，需要手动登录")
+                if self.on_login_failed:
+                    Clock.schedule_once(lambda dt: self.on_login_failed(), 0)
+                return False
+
             # 获取保存的凭据
             credentials = self.session_manager.get_saved_credentials(current_account)
             if not credentials:
@@ -208,12 +236,11 @@ class AutoLoginManager:
                 try:
                     logger.info(f"自动登录尝试 {attempt + 1}/{retry_count}")
                     
-                    # 这里需要实现自动获取验证码和登录的逻辑
-                    # 暂时只检查会话状态
                     success = self._try_login_with_credentials(credentials)
                     
                     if success:
                         logger.info("自动登录成功")
+                        self._recover_other_accounts(current_account)
                         if self.on_login_success:
                             Clock.schedule_once(lambda dt: self.on_login_success(), 0)
                         return True
@@ -235,23 +262,51 @@ class AutoLoginManager:
             logger.error(f"自动登录过程出错: {e}")
             return False
     
+    def _recover_other_accounts(self, current_account: str):
+        """当前会话失效通常意味着服务器重启，其他保存了凭据的账号也一并恢复"""
+        if not get_config("RELOGIN_FLEET_ENABLED", True):
+            return
+        others = [
+            student_id for student_id in self.session_manager.list_accounts()
+            if student_id != current_account and self.session_manager.get_saved_credentials(student_id)
+        ]
+        if not others:
+            return
+        try:
+            from .relogin import relogin_accounts
+            logger.info(f"开始恢复其他 {len(others)} 个账号的会话")
+            relogin_accounts(others)
+        except Exception as e:
+            logger.error(f"批量恢复账号会话失败: {e}")
+
     def _try_login_with_credentials(self, credentials: Dict[str, str]) -> bool:
-        """使用凭据尝试登录"""
+        """使用凭据尝试登录（离线识别验证码，无需人工介入）"""
         try:
-            # 这里应该实现完整的登录逻辑
-            # 包括获取验证码、提交登录表单等
-            # 暂时只返回False，表示需要手动登录
-            
-            # TODO: 实现自动验证码识别和登录
-            logger.info("自动登录功能需要验证码识别，暂时返回失败")
-            return False
-            
+            # 延迟导入，只有无人值守登录才需要NumPy
+            from .captcha_solver import get_captcha_solver
+
+            if not get_captcha_solver().is_ready():
+                logger.warning("验证码识别模型不可用，需要手动登录")
+                return False
+
+            # 过期会话的cookie已无用，清空后由登录页重新分配JSESSIONID
+            get_session().cookies.clear()
+            self.login_manager.consume_token()
+
+            return self.login_manager.login(
+                credentials["student_id"],
+                credentials["password_md5"],
+                max_attempts=get_config("AUTO_LOGIN_CAPTCHA_ATTEMPTS", 8),
+                auto_captcha=True,
+                password_hashed=True
+            )
+
         except Exception as e:
             logger.error(f"使用凭据登录失败: {e}")
             return False
     
     def force_check_now(self):
-        """立即执行一次状态检查"""
+        """立即在后台重新检查会话状态，结果通过账号状态服务通知界面"""
         try:
             if not self.is_enabled():
                 logger.info("自动登录未启用，跳过检查")
@@ -262,12 +317,10 @@ class AutoLoginManager:
                 logger.warning("没有当前账号")
                 return
             
-            # 检查会话状态
-            is_valid = self.session_manager.is_session_valid()
-            logger.info(f"当前会话状态: {'有效' if is_valid else '无效'}")
-            
-            if not is_valid:
-                logger.info("会话无效，建议重新登录")
+            # 检查会话状态（后台线程，不阻塞调用方）
+            from .account_status import get_account_status_service
+            get_account_status_service().refresh(current_account, force=True)
+            logger.info(f"已开始检查账号 {current_account} 的会话状态")
             
             # 更新检查时间
             update_config("LAST_AUTO_LOGIN_TIME", int(time.time()))
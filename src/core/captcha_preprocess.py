@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+验证码预处理模块
+对堆叠成 (N, 高, 宽) 数组的一批验证码整体做NumPy向量化处理：
+灰度化、基于积分图的自适应阈值、去除细干扰线、连通域去噪、按列投影切分字符和字形归一化
+"""
+
+import logging
+from io import BytesIO
+from typing import List, Tuple, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 字符归一化尺寸（高, 宽）
+GLYPH_SHAPE = (20, 16)
+
+# ITU-R BT.601 灰度系数
+_GRAY_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+def decode_batch(images: Sequence[bytes]) -> np.ndarray:
+    """解码一批验证码为 (N, 高, 宽, 3) 的uint8数组
+
+    尺寸不一致时以第一张为准裁剪或用白色填充。
+    """
+    from PIL import Image
+
+    arrays = []
+    for content in images:
+        with Image.open(BytesIO(content)) as img:
+            arrays.append(np.asarray(img.convert("RGB"), dtype=np.uint8))
+    if not arrays:
+        return np.zeros((0, 0, 0, 3), dtype=np.uint8)
+
+    height, width = arrays[0].shape[:2]
+    batch = np.full((len(arrays), height, width, 3), 255, dtype=np.uint8)
+    for i, array in enumerate(arrays):
+        h, w = min(height, array.shape[0]), min(width, array.shape[1])
+        batch[i, :h, :w] = array[:h, :w]
+    return batch
+
+def to_grayscale(batch: np.ndarray) -> np.ndarray:
+    """(N, 高, 宽, 3) 转为 (N, 高, 宽) 灰度"""
+    if batch.ndim == 3:
+        return batch
+    return (batch.astype(np.float32) @ _GRAY_WEIGHTS).astype(np.uint8)
+
+def adaptive_threshold(gray: np.ndarray, block_size: int = 15, offset: float = 12.0) -> np.ndarray:
+    """自适应阈值：像素比邻域均值暗offset以上视为字符
+
+    邻域均值用积分图计算，整批一次完成，复杂度与窗口大小无关。
+
+    Returns:
+        (N, 高, 宽) 布尔数组，字符像素为True
+    """
+    n, h, w = gray.shape
+    radius = block_size // 2
+    padded = np.pad(gray.astype(np.float64), ((0, 0), (radius + 1, radius), (radius + 1, radius)), mode="edge")
+    integral = padded.cumsum(axis=1).cumsum(axis=2)
+    window_sum = (
+        integral[:, block_size:block_size + h, block_size:block_size + w]
+        - integral[:, 0:h, block_size:block_size + w]
+        - integral[:, block_size:block_size + h, 0:w]
+        + integral[:, 0:h, 0:w]
+    )
+    local_mean = window_sum / (block_size * block_size)
+    return gray < local_mean - offset
+
+def _shift(binary: np.ndarray, dy: int, dx: int) -> np.ndarray:
+    """整批平移一个像素，越界部分填充False"""
+    padded = np.pad(binary, ((0, 0), (1, 1), (1, 1)))
+    h, w = binary.shape[1:]
+    return padded[:, 1 + dy:1 + dy + h, 1 + dx:1 + dx + w]
+
+def remove_thin_lines(binary: np.ndarray) -> np.ndarray:
+    """去除单像素宽的干扰线：只保留在水平和竖直方向上都有相邻前景的像素"""
+    vertical = _shift(binary, -1, 0) | _shift(binary, 1, 0)
+    horizontal = _shift(binary, 0, -1) | _shift(binary, 0, 1)
+    return binary & vertical & horizontal
+
+def label_components(binary: np.ndarray) -> np.ndarray:
+    """8连通域标记
+
+    每个前景像素以自身的扁平下标为初始标签，反复取邻域最小标签并做指针跳跃，
+    直到标签不再变化；整批验证码同时迭代。
+
+    Returns:
+        与binary同形状的int64数组，背景为-1，同一连通域的像素标签相同
+    """
+    size = binary.size
+    sentinel = size  # 背景标签，比任何有效下标都大
+    labels = np.where(binary.ravel(), np.arange(size), sentinel).reshape(binary.shape)
+    padded = np.full((binary.shape[0], binary.shape[1] + 2, binary.shape[2] + 2), sentinel, dtype=np.int64)
+    h, w = binary.shape[1:]
+    # 末尾追加哨兵，指针跳跃时背景像素指向自身
+    flat_parent = np.empty(size + 1, dtype=np.int64)
+
+    while True:
+        padded[:, 1:h + 1, 1:w + 1] = labels
+        neighbor_min = labels
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                if dy or dx:
+                    neighbor_min = np.minimum(neighbor_min, padded[:, 1 + dy:1 + dy + h, 1 + dx:1 + dx + w])
+        updated = np.where(binary, neighbor_min, sentinel)
+
+        # 指针跳跃：标签指向的像素的标签，加速长笔画上的传播
+        flat_parent[:size] = updated.ravel()
+        flat_parent[size] = sentinel
+        for _ in range(4):
+            flat_parent[:size] = flat_parent[flat_parent[:size]]
+        updated = flat_parent[:size].reshape(binary.shape)
+
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+
+    return np.where(binary, labels, -1)
+
+def remove_small_components(binary: np.ndarray, min_size: int = 12) -> np.ndarray:
+    """去除像素数少于min_size的连通域（噪点和干扰线碎片）"""
+    if not binary.any():
+        return binary
+    labels = label_components(binary)
+    foreground = labels >= 0
+    sizes = np.bincount(labels[foreground], minlength=binary.size)
+    keep = np.zeros_like(binary)
+    keep[foreground] = sizes[labels[foreground]] >= min_size
+    return keep
+
+def clean_batch(gray: np.ndarray, block_size: int = 15, offset: float = 12.0,
+                min_component: int = 12) -> np.ndarray:
+    """整批二值化和去噪"""
+    binary = adaptive_threshold(gray, block_size, offset)
+    binary = remove_thin_lines(binary)
+    return remove_small_components(binary, min_component)
+
+def segment_columns(binary: np.ndarray, count: int, min_width: int = 2) -> List[Tuple[int, int]]:
+    """按列投影切分单张验证码，返回 [(起始列, 结束列), ...]
+
+    段数过多时合并间距最小的相邻段，段数不足时在最宽段内投影最小处拆分（粘连字符）。
+    """
+    projection = binary.sum(axis=0)
+    ink = (projection > 0).astype(np.int8)
+    edges = np.diff(np.concatenate(([0], ink, [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    segments = [(int(s), int(e)) for s, e in zip(starts, ends) if e - s >= min_width]
+    if not segments:
+        return []
+
+    while len(segments) > count:
+        gaps = [segments[i + 1][0] - segments[i][1] for i in range(len(segments) - 1)]
+        i = int(np.argmin(gaps))
+        segments[i:i + 2] = [(segments[i][0], segments[i + 1][1])]
+
+    while len(segments) < count:
+        widths = [e - s for s, e in segments]
+        i = int(np.argmax(widths))
+        s, e = segments[i]
+        if e - s < 2 * min_width:
+            break
+        remaining = count - len(segments) + 1
+        # 按平均字符宽度估计这一段里粘连了几个字符
+        average_width = sum(widths) / count
+        pieces = int(min(remaining, max(2, round((e - s) / average_width))))
+        cut_points = []
+        for k in range(1, pieces):
+            center = s + (e - s) * k // pieces
+            lo, hi = max(s + min_width, center - 3), min(e - min_width, center + 4)
+            if hi <= lo:
+                cut_points.append(center)
+            else:
+                cut_points.append(lo + int(np.argmin(projection[lo:hi])))
+        bounds = [s] + cut_points + [e]
+        segments[i:i + 1] = [(bounds[k], bounds[k + 1]) for k in range(len(bounds) - 1)]
+
+    return segments
+
+def resample_glyph(glyph: np.ndarray, shape: Tuple[int, int] = GLYPH_SHAPE) -> np.ndarray:
+    """裁掉空白行后最近邻缩放到固定尺寸"""
+    rows = np.flatnonzero(glyph.any(axis=1))
+    if rows.size:
+        glyph = glyph[rows[0]:rows[-1] + 1]
+    h, w = glyph.shape
+    row_index = (np.arange(shape[0]) * h // shape[0]).clip(0, h - 1)
+    col_index = (np.arange(shape[1]) * w // shape[1]).clip(0, w - 1)
+    return glyph[row_index[:, None], col_index[None, :]]
+
+def to_features(glyphs: np.ndarray) -> np.ndarray:
+    """字形转为零均值、单位范数的特征向量（最后两维展平），便于用点积计算相关性"""
+    features = glyphs.reshape(glyphs.shape[:-2] + (-1,)).astype(np.float32)
+    features -= features.mean(axis=-1, keepdims=True)
+    norms = np.linalg.norm(features, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return features / norms
+
+def preprocess_batch(images: Sequence[bytes], count: int,
+                     shape: Tuple[int, int] = GLYPH_SHAPE) -> Tuple[np.ndarray, np.ndarray]:
+    """整批预处理验证码并切分字符
+
+    Args:
+        images: 验证码图片字节列表
+        count: 每张验证码的字符数
+        shape: 字形归一化尺寸
+
+    Returns:
+        (特征数组 (N, count, 高*宽), 切分成功标记 (N,))，切分失败的行特征为0
+    """
+    features = np.zeros((len(images), count, shape[0] * shape[1]), dtype=np.float32)
+    ok = np.zeros(len(images), dtype=bool)
+    if not images:
+        return features, ok
+
+    binary = clean_batch(to_grayscale(decode_batch(images)))
+    for i in range(len(images)):
+        segments = segment_columns(binary[i], count)
+        if len(segments) != count:
+            continue
+        glyphs = np.stack([resample_glyph(binary[i, :, s:e], shape) for s, e in segments])
+        features[i] = to_features(glyphs)
+        ok[i] = True
+    return features, ok
+
+def preprocess_one(image: bytes, count: int) -> Optional[np.ndarray]:
+    """预处理单张验证码，切分失败返回None"""
+    features, ok = preprocess_batch([image], count)
+    return features[0] if ok[0] else None
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+验证码识别模块
+纯CPU的离线验证码识别：批量向量化预处理（见captcha_preprocess）加模板相关性分类，
+用于会话过期后的无人值守自动重新登录
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Optional, List, Tuple, Iterable, Dict
+
+import numpy as np
+
+from .config import get_config
+from .captcha_preprocess import GLYPH_SHAPE, preprocess_batch, preprocess_one
+from ..utils.metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+# 验证码字符数和字符集（教务系统验证码不区分大小写）
+CAPTCHA_LENGTH = 4
+CHARSET = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+# 每个字符最多保留的样本模板数量
+MAX_TEMPLATES_PER_CHAR = 40
+
+# 识别目标：整张验证码准确率和单张识别耗时（单核），由 benchmarks/captcha_bench.py 度量
+TARGET_ACCURACY = 0.85
+TARGET_LATENCY_MS = 20.0
+
+MODEL_VERSION = 2
+
+# 训练时每批预处理的样本数
+TRAIN_BATCH_SIZE = 128
+
+CAPTCHA_SOLVE_DURATION = get_registry().histogram(
+    "qqhru_captcha_solve_duration_seconds", "验证码识别耗时", ("outcome",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25)
+)
+
+def extract_glyphs(image_bytes: bytes, count: int = CAPTCHA_LENGTH) -> Optional[np.ndarray]:
+    """预处理验证码并切分为字符特征矩阵（count x 特征维度），失败返回None"""
+    return preprocess_one(image_bytes, count)
+
+class CaptchaModel:
+    """模板相关性分类模型"""
+
+    def __init__(self, templates: np.ndarray, labels: np.ndarray):
+        self.templates = templates.astype(np.float32)
+        self.labels = labels
+
+    def predict(self, features: np.ndarray) -> Tuple[List[str], np.ndarray]:
+        """对字符特征分类，返回(字符列表, 每个字符的相关系数)"""
+        similarity = features @ self.templates.T
+        best = similarity.argmax(axis=1)
+        scores = similarity[np.arange(len(best)), best]
+        return [str(self.labels[i]) for i in best], scores
+
+    @classmethod
+    def train(cls, samples: Iterable[Tuple[bytes, str]]) -> Tuple["CaptchaModel", Dict[str, int]]:
+        """用(图片字节, 标注文本)样本训练模型
+
+        Returns:
+            (模型, 训练统计)
+        """
+        per_char: Dict[str, List[np.ndarray]] = {}
+        stats = {"samples": 0, "used": 0, "skipped": 0}
+
+        def consume(batch: List[Tuple[bytes, str]]):
+            try:
+                features, ok = preprocess_batch([image for image, _ in batch], len(batch[0][1]))
+            except Exception as e:
+                logger.debug(f"训练样本解析失败: {e}")
+                features, ok = None, np.zeros(len(batch), dtype=bool)
+            for i, (_, label) in enumerate(batch):
+                if not ok[i]:
+                    stats["skipped"] += 1
+                    continue
+                stats["used"] += 1
+                for char, feature in zip(label, features[i]):
+                    per_char.setdefault(char, []).append(feature)
+
+        # 按标注长度分组成批，整批做预处理
+        pending: Dict[int, List[Tuple[bytes, str]]] = {}
+        for image_bytes, label in samples:
+            stats["samples"] += 1
+            label = label.strip().lower()
+            batch = pending.setdefault(len(label), [])
+            batch.append((image_bytes, label))
+            if len(batch) >= TRAIN_BATCH_SIZE:
+                consume(batch)
+                pending[len(label)] = []
+        for batch in pending.values():
+            if batch:
+                consume(batch)
+
+        if not per_char:
+            raise ValueError("没有可用的训练样本")
+
+        templates, labels = [], []
+        for char, vectors in sorted(per_char.items()):
+            stacked = np.stack(vectors)
+            # 类均值模板加上部分原始样本，兼顾稳定性和字形变化
+            mean = stacked.mean(axis=0)
+            templates.append(mean / (np.linalg.norm(mean) or 1.0))
+            labels.append(char)
+            for vector in stacked[:MAX_TEMPLATES_PER_CHAR]:
+                templates.append(vector)
+                labels.append(char)
+
+        stats["chars"] = len(per_char)
+        stats["templates"] = len(templates)
+        return cls(np.stack(templates), np.array(labels)), stats
+
+    def save(self, path: str):
+        """保存模型到npz文件"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(
+            path, templates=self.templates, labels=self.labels,
+            glyph_shape=np.array(GLYPH_SHAPE), version=np.array(MODEL_VERSION)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CaptchaModel":
+        """从npz文件加载模型"""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != MODEL_VERSION or tuple(data["glyph_shape"]) != GLYPH_SHAPE:
+                raise ValueError("验证码模型版本不匹配，请重新训练")
+            return cls(data["templates"], data["labels"])
+
+class CaptchaSolver:
+    """验证码识别器"""
+
+    def __init__(self, model_path: Optional[str] = None, min_confidence: Optional[float] = None):
+        self.model_path = model_path or get_config("CAPTCHA_MODEL_FILE", "data/captcha_model.npz")
+        self.min_confidence = (get_config("CAPTCHA_MIN_CONFIDENCE", 0.6)
+                               if min_confidence is None else min_confidence)
+        self.model: Optional[CaptchaModel] = None
+        self._load_lock = threading.Lock()
+        self._load_attempted = False
+
+    def _ensure_model(self) -> bool:
+        """首次使用时加载模型"""
+        if self.model is not None:
+            return True
+        with self._load_lock:
+            if self.model is None and not self._load_attempted:
+                self._load_attempted = True
+                if os.path.exists(self.model_path):
+                    try:
+                        self.model = CaptchaModel.load(self.model_path)
+                        logger.info(f"已加载验证码模型: {self.model_path} ({len(self.model.labels)} 个模板)")
+                    except Exception as e:
+                        logger.error(f"加载验证码模型失败: {e}")
+                else:
+                    logger.warning(f"验证码模型不存在: {self.model_path}")
+        return self.model is not None
+
+    def is_ready(self) -> bool:
+        """模型是否可用"""
+        return self._ensure_model()
+
+    def set_model(self, model: CaptchaModel):
+        """替换当前模型（训练后或基准测试时使用）"""
+        self.model = model
+        self._load_attempted = True
+
+    def solve_with_confidence(self, image_bytes: bytes) -> Tuple[Optional[str], float]:
+        """识别验证码，返回(文本, 置信度)，无法切分时文本为None"""
+        if not self._ensure_model():
+            return None, 0.0
+
+        start_time = time.perf_counter()
+        try:
+            features = extract_glyphs(image_bytes)
+        except Exception as e:
+            logger.error(f"验证码预处理失败: {e}")
+            features = None
+        if features is None:
+            CAPTCHA_SOLVE_DURATION.observe(time.perf_counter() - start_time, outcome="unsegmented")
+            return None, 0.0
+
+        chars, scores = self.model.predict(features)
+        confidence = float(scores.min())
+        CAPTCHA_SOLVE_DURATION.observe(time.perf_counter() - start_time, outcome="ok")
+        return "".join(chars), confidence
+
+    def solve_batch(self, images: List[bytes]) -> List[Tuple[Optional[str], float]]:
+        """整批识别验证码，返回与输入顺序一致的 [(文本, 置信度), ...]"""
+        if not images or not self._ensure_model():
+            return [(None, 0.0)] * len(images)
+
+        start_time = time.perf_counter()
+        try:
+            features, ok = preprocess_batch(images, CAPTCHA_LENGTH)
+        except Exception as e:
+            logger.error(f"验证码批量预处理失败: {e}")
+            return [(None, 0.0)] * len(images)
+
+        results: List[Tuple[Optional[str], float]] = [(None, 0.0)] * len(images)
+        if ok.any():
+            chars, scores = self.model.predict(features[ok].reshape(-1, features.shape[-1]))
+            scores = scores.reshape(-1, CAPTCHA_LENGTH)
+            for row, index in enumerate(np.flatnonzero(ok)):
+                text = "".join(chars[row * CAPTCHA_LENGTH:(row + 1) * CAPTCHA_LENGTH])
+                results[index] = (text, float(scores[row].min()))
+        CAPTCHA_SOLVE_DURATION.observe((time.perf_counter() - start_time) / len(images), outcome="batch")
+        return results
+
+    def solve(self, image_bytes: bytes) -> Optional[str]:
+        """识别验证码，置信度不足时返回None（调用方应换一张验证码）"""
+        text, confidence = self.solve_with_confidence(image_bytes)
+        if text is None:
+            return None
+        if confidence < self.min_confidence:
+            logger.info(f"验证码识别置信度不足: {text} ({confidence:.2f})")
+            return None
+        logger.debug(f"验证码识别结果: {text} ({confidence:.2f})")
+        return text
+
+# 全局验证码识别器实例
+_captcha_solver = None
+
+def get_captcha_solver() -> CaptchaSolver:
+    """获取验证码识别器实例"""
+    global _captcha_solver
+    if _captcha_solver is None:
+        _captcha_solver = CaptchaSolver()
+    return _captcha_solver
@@ -63,8 +63,12 @@ DEFAULT_CONFIG = {
     "SESSION_DIR": "data/sessions",
     "ACCOUNTS_FILE": "data/accounts.json",
     "CREDENTIALS_FILE": "data/credentials.json",
+    "ACCOUNTS_DB": "data/accounts.db",  # 账号、会话和凭据的统一存储（旧版JSON文件会自动迁移）
+    "CREDENTIAL_KEY_FILE": "data/credential.key",  # 自动登录凭据的本机加密密钥（删除后需重新保存凭据）
     "LOGS_DIR": "logs",
     "TEMP_DIR": "temp",
+    "CAPTCHA_MODEL_FILE": "data/captcha_model.npz",
+    "FONT_CACHE_FILE": "data/font_cache.json",  # 字体路径和字形覆盖缓存（删除后重新探测字体）
     
     # 应用配置
     "DEBUG_MODE": False,
@@ -72,18 +76,44 @@ DEFAULT_CONFIG = {
     "AUTO_LOGIN_CHECK_INTERVAL": 300,  # 自动登录检查间隔（秒）
     "SESSION_EXPIRE_THRESHOLD": 600,   # 会话过期阈值（秒）
     "AUTO_LOGIN_RETRY_COUNT": 3,       # 自动登录重试次数
+    "AUTO_LOGIN_CAPTCHA_ATTEMPTS": 8,  # 每次自动登录最多尝试的验证码数量
+    "CAPTCHA_MIN_CONFIDENCE": 0.6,     # 验证码识别最低置信度，低于该值换一张
+    "RELOGIN_FLEET_ENABLED": True,     # 当前会话失效时是否同时恢复其他保存了凭据的账号
+    "RELOGIN_MAX_PER_HOST": 8,         # 批量重新登录时每个主机的并发请求数
+    "RELOGIN_IO_WORKERS": 32,          # 批量重新登录的HTTP线程数
+    "RELOGIN_CPU_WORKERS": 0,          # 无界面批量重新登录的验证码识别进程数，0表示在线程中执行（应用内总是使用线程）
     "LAST_AUTO_LOGIN_TIME": 0,         # 上次自动登录时间戳
+    "ACCOUNT_STATUS_TTL": 60,          # 主界面账号状态的有效期（秒），过期后在后台重新检查
     
     # UI配置
     "WINDOW_WIDTH": 400,
     "WINDOW_HEIGHT": 600,
     "MIN_WINDOW_WIDTH": 350,
     "MIN_WINDOW_HEIGHT": 500,
+    "SCREEN_CACHE_SIZE": 4,
+    "SCREEN_PREWARM_ENABLED": True,
+    "GC_RSS_GROWTH_MB": 32,            # 内存比上次完整回收时增长超过该值时，在空闲时回收
+    "MEMORY_SOFT_LIMIT_MB": 256,       # 内存软上限，超过后回收并清空纹理缓存
+    "TEXTURE_CACHE_MB": 16,            # 纹理缓存的显存预算（MB），超过后淘汰最久未使用的纹理
     
     # 网络配置
     "REQUEST_TIMEOUT": 30,
     "MAX_RETRIES": 3,
     "RETRY_DELAY": 1.0,
+
+    # 监控与诊断配置
+    "METRICS_ENABLED": False,          # 是否启用本地指标导出端点
+    "METRICS_HOST": "127.0.0.1",       # 指标端点监听地址
+    "METRICS_PORT": 9464,              # 指标端点监听端口
+    "TRACING_ENABLED": False,          # 是否记录登录/查询链路追踪（写入logs/traces.jsonl）
+    "LOG_MAX_BYTES": 5242880,          # 单个日志文件最大字节数，超过后轮转
+    "LOG_BACKUP_COUNT": 5,             # 保留的历史日志文件数量
+    "LOG_ROTATE_WHEN": "midnight",     # 按时间轮转的周期（S/M/H/D/midnight）
+    "LOG_QUEUE_SIZE": 10000,           # 日志队列容量，满时丢弃低级别日志
+    "LOG_COMPRESS": True,              # 是否gzip压缩轮转出的日志
+    "LOG_FORMAT": "text",              # 日志文件格式：text 或 json（JSONL，写入logs/app.jsonl）
+    "LOG_SAMPLING": {},                # 按日志器采样比例，如 {"src.core.api": 0.01}，警告及以上始终保留
+    "PROFILING_ENABLED": False,        # 是否对关键入口进行cProfile分析（也可用环境变量PROFILE=true开启）
 }
 
 class ConfigManager:
@@ -218,10 +248,14 @@ class ConfigManager:
         dir_configs = [
             ("DATA_DIR", "数据存储目录"),
             ("SESSION_DIR", "会话文件目录"),
-            ("ACCOUNTS_FILE", "账号信息文件"),
-            ("CREDENTIALS_FILE", "凭据文件"),
+            ("ACCOUNTS_FILE", "旧版账号信息文件（仅用于迁移）"),
+            ("CREDENTIALS_FILE", "旧版凭据文件（仅用于迁移）"),
+            ("ACCOUNTS_DB", "账号存储数据库（旧版JSON文件会自动迁移）"),
+            ("CREDENTIAL_KEY_FILE", "自动登录凭据的本机加密密钥（删除后需重新保存凭据）"),
             ("LOGS_DIR", "日志文件目录"),
-            ("TEMP_DIR", "临时文件目录")
+            ("TEMP_DIR", "临时文件目录"),
+            ("CAPTCHA_MODEL_FILE", "验证码识别模型文件"),
+            ("FONT_CACHE_FILE", "字体路径和字形覆盖缓存（删除后重新探测字体）")
         ]
 
         lines.append('  // ==================== 目录和文件配置 ====================')
@@ -238,7 +272,14 @@ class ConfigManager:
             ("AUTO_LOGIN_CHECK_INTERVAL", "自动登录检查间隔（秒）"),
             ("SESSION_EXPIRE_THRESHOLD", "会话过期阈值（秒）"),
             ("AUTO_LOGIN_RETRY_COUNT", "自动登录重试次数"),
-            ("LAST_AUTO_LOGIN_TIME", "上次自动登录时间戳")
+            ("AUTO_LOGIN_CAPTCHA_ATTEMPTS", "每次自动登录最多尝试的验证码数量"),
+            ("CAPTCHA_MIN_CONFIDENCE", "验证码识别最低置信度，低于该值换一张"),
+            ("RELOGIN_FLEET_ENABLED", "当前会话失效时是否同时恢复其他保存了凭据的账号"),
+            ("RELOGIN_MAX_PER_HOST", "批量重新登录时每个主机的并发请求数"),
+            ("RELOGIN_IO_WORKERS", "批量重新登录的HTTP线程数"),
+            ("RELOGIN_CPU_WORKERS", "无界面批量重新登录的验证码识别进程数，0表示在线程中执行（应用内总是使用线程）"),
+            ("LAST_AUTO_LOGIN_TIME", "上次自动登录时间戳"),
+            ("ACCOUNT_STATUS_TTL", "主界面账号状态的有效期（秒），过期后在后台重新检查")
         ]
 
         lines.append('  // ==================== 应用功能配置 ====================')
@@ -257,14 +298,20 @@ class ConfigManager:
             ("WINDOW_WIDTH", "窗口宽度"),
             ("WINDOW_HEIGHT", "窗口高度"),
             ("MIN_WINDOW_WIDTH", "最小窗口宽度"),
-            ("MIN_WINDOW_HEIGHT", "最小窗口高度")
+            ("MIN_WINDOW_HEIGHT", "最小窗口高度"),
+            ("SCREEN_CACHE_SIZE", "最多保留的界面实例数量（主界面常驻）"),
+            ("SCREEN_PREWARM_ENABLED", "空闲时预先创建接下来可能打开的界面"),
+            ("GC_RSS_GROWTH_MB", "内存比上次完整回收时增长超过该值（MB）时，在空闲时回收"),
+            ("MEMORY_SOFT_LIMIT_MB", "内存软上限（MB），超过后回收并清空纹理缓存"),
+            ("TEXTURE_CACHE_MB", "纹理缓存的显存预算（MB），超过后淘汰最久未使用的纹理")
         ]
 
         lines.append('  // ==================== 界面配置 ====================')
         lines.append('  // 应用窗口大小配置')
         for key, desc in ui_configs:
             if key in self._config:
-                lines.append(f'  "{key}": {self._config[key]},  // {desc}')
+                value_str = json.dumps(self._config[key], ensure_ascii=False)
+                lines.append(f'  "{key}": {value_str},  // {desc}')
         lines.append('')
 
         # 网络配置
@@ -279,6 +326,30 @@ class ConfigManager:
         for key, desc in net_configs:
             if key in self._config:
                 lines.append(f'  "{key}": {self._config[key]},  // {desc}')
+        lines.append('')
+
+        # 监控与诊断配置
+        diag_configs = [
+            ("METRICS_ENABLED", "是否启用本地指标导出端点（OpenMetrics格式）"),
+            ("METRICS_HOST", "指标端点监听地址"),
+            ("METRICS_PORT", "指标端点监听端口"),
+            ("TRACING_ENABLED", "是否记录链路追踪，结果写入日志目录下的traces.jsonl"),
+            ("LOG_MAX_BYTES", "单个日志文件最大字节数，超过后轮转"),
+            ("LOG_BACKUP_COUNT", "保留的历史日志文件数量"),
+            ("LOG_ROTATE_WHEN", "按时间轮转的周期（S/M/H/D/midnight）"),
+            ("LOG_QUEUE_SIZE", "日志队列容量，队列满时丢弃低级别日志"),
+            ("LOG_COMPRESS", "是否gzip压缩轮转出的历史日志"),
+            ("LOG_FORMAT", "日志文件格式：text 或 json（结构化JSONL）"),
+            ("LOG_SAMPLING", "按日志器采样比例，如 {\"src.core.api\": 0.01}，警告及以上始终保留"),
+            ("PROFILING_ENABLED", "是否对关键入口进行性能分析，结果写入日志目录下的profiles")
+        ]
+
+        lines.append('  // ==================== 监控与诊断配置 ====================')
+        lines.append('  // 性能监控、日志和诊断相关配置，默认关闭')
+        for key, desc in diag_configs:
+            if key in self._config:
+                value_str = json.dumps(self._config[key], ensure_ascii=False)
+                lines.append(f'  "{key}": {value_str},  // {desc}')
 
         # 移除最后一个逗号
         if lines and lines[-1].endswith(','):
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+凭据加密模块
+自动登录保存的密码摘要就是登录表单提交的j_password，拿到即可重放登录，不能明文存放。
+本模块用每次安装随机生成的密钥（只有当前用户可读的密钥文件）加密后再写入账号存储：
+只拷走账号数据库（备份、同步盘等）无法还原摘要。
+
+加密方式：HMAC-SHA256计数器模式生成密钥流异或明文，再用HMAC-SHA256校验（先加密后认证），
+只依赖标准库，Android上同样可用。
+"""
+
+import os
+import hmac
+import base64
+import hashlib
+import logging
+import threading
+from typing import Optional
+
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+
+# 加密值的前缀（格式版本），没有前缀的是旧版明文摘要
+TOKEN_PREFIX = "v1:"
+
+KEY_SIZE = 32
+NONCE_SIZE = 16
+TAG_SIZE = 16
+
+_key: Optional[bytes] = None
+_key_lock = threading.Lock()
+
+def _read_or_create_key(path: str) -> bytes:
+    """读取安装密钥，不存在时生成（文件权限0600）"""
+    try:
+        with open(path, 'rb') as f:
+            key = f.read()
+        if len(key) == KEY_SIZE:
+            return key
+        raise ValueError(f"密钥文件长度错误: {path}")
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    key = os.urandom(KEY_SIZE)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # 其他线程或进程刚刚创建了密钥
+        return _read_or_create_key(path)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    logger.info(f"已生成凭据加密密钥: {path}")
+    return key
+
+def _get_key() -> bytes:
+    global _key
+    with _key_lock:
+        if _key is None:
+            _key = _read_or_create_key(get_config("CREDENTIAL_KEY_FILE", "data/credential.key"))
+        return _key
+
+def _subkey(key: bytes, purpose: bytes) -> bytes:
+    return hmac.new(key, purpose, hashlib.sha256).digest()
+
+def _keystream(key: bytes, nonce: bytes, length: int) -> bytes:
+    enc_key = _subkey(key, b"enc")
+    blocks = []
+    for counter in range((length + 31) // 32):
+        blocks.append(hmac.new(enc_key, nonce + counter.to_bytes(8, 'big'), hashlib.sha256).digest())
+    return b"".join(blocks)[:length]
+
+def encrypt_credential(value: str) -> str:
+    """加密凭据，返回可存入数据库的文本"""
+    key = _get_key()
+    data = value.encode('utf-8')
+    nonce = os.urandom(NONCE_SIZE)
+    cipher = bytes(a ^ b for a, b in zip(data, _keystream(key, nonce, len(data))))
+    tag = hmac.new(_subkey(key, b"mac"), nonce + cipher, hashlib.sha256).digest()[:TAG_SIZE]
+    return TOKEN_PREFIX + base64.b64encode(nonce + cipher + tag).decode('ascii')
+
+def decrypt_credential(token: str) -> Optional[str]:
+    """解密凭据，密钥不匹配或数据损坏时返回None"""
+    if not is_encrypted(token):
+        return None
+    try:
+        raw = base64.b64decode(token[len(TOKEN_PREFIX):])
+        if len(raw) < NONCE_SIZE + TAG_SIZE:
+            return None
+        key = _get_key()
+        nonce, cipher, tag = raw[:NONCE_SIZE], raw[NONCE_SIZE:-TAG_SIZE], raw[-TAG_SIZE:]
+        expected = hmac.new(_subkey(key, b"mac"), nonce + cipher, hashlib.sha256).digest()[:TAG_SIZE]
+        if not hmac.compare_digest(tag, expected):
+            logger.warning("凭据校验失败（密钥已更换或数据损坏）")
+            return None
+        data = bytes(a ^ b for a, b in zip(cipher, _keystream(key, nonce, len(cipher))))
+        return data.decode('utf-8')
+    except Exception as e:
+        logger.error(f"解密凭据失败: {e}")
+        return None
+
+def is_encrypted(value: Optional[str]) -> bool:
+    """是否为加密后的凭据（旧版数据库中是明文摘要）"""
+    return bool(value) and value.startswith(TOKEN_PREFIX)
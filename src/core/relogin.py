@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量重新登录模块
+教务系统重启后所有保存的会话会同时失效。本模块按LoginManager.login的流程为大量账号并行恢复会话：
+HTTP请求在asyncio事件循环中调度、由线程池执行，并按主机限制并发；
+HTML解析在I/O线程中执行，验证码识别在CPU执行器中执行。
+无界面（命令行）运行时CPU执行器可以是spawn方式的进程池；应用内不创建子进程，
+fork会复制Kivy和日志队列的状态（子进程的日志没有监听线程处理），Android也不支持进程池。
+
+命令行入口： python -m src.core.relogin --workers 4
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import functools
+import multiprocessing
+from urllib.parse import urlsplit
+from typing import Optional, Dict, List, Tuple
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+
+import requests
+
+from .config import get_config
+from .session import get_session_manager, set_session, new_session
+from .auth import build_login_form, parse_token_value, classify_login_response
+from .api import make_request, extract_student_name
+from ..utils.metrics import get_registry, LOGIN_ATTEMPTS
+from ..utils.tracing import span, wrap_context
+
+logger = logging.getLogger(__name__)
+
+RELOGIN_RESULTS = get_registry().counter(
+    "qqhru_relogin_results", "批量重新登录结果", ("result",)
+)
+
+# 批量重新登录结果
+RESULT_SUCCESS = "success"
+RESULT_STILL_VALID = "still_valid"
+RESULT_NO_CREDENTIALS = "no_credentials"
+RESULT_CREDENTIAL_ERROR = "credential_error"
+RESULT_CAPTCHA_EXHAUSTED = "captcha_exhausted"
+RESULT_NETWORK_ERROR = "network_error"
+RESULT_ERROR = "error"
+
+# ==================== 进程池中执行的函数 ====================
+
+_worker_solver = None
+
+def _init_cpu_worker(model_path: str):
+    """进程池初始化：每个进程只加载一次验证码模型"""
+    global _worker_solver
+    from .captcha_solver import CaptchaSolver
+    _worker_solver = CaptchaSolver(model_path, min_confidence=0.0)
+    _worker_solver.is_ready()
+
+def _solve_captcha(image: bytes) -> Tuple[Optional[str], float]:
+    """识别验证码，返回(文本, 置信度)"""
+    global _worker_solver
+    if _worker_solver is None:
+        # 未使用进程池（CPU工作线程模式）时使用全局识别器
+        from .captcha_solver import get_captcha_solver
+        _worker_solver = get_captcha_solver()
+    return _worker_solver.solve_with_confidence(image)
+
+def _running_in_app() -> bool:
+    """是否在Kivy应用进程中运行"""
+    app_module = sys.modules.get("kivy.app")
+    return app_module is not None and app_module.App.get_running_app() is not None
+
+# ==================== 编排器 ====================
+
+class ReloginOrchestrator:
+    """批量重新登录编排器"""
+
+    def __init__(self, session_manager=None, base_url: Optional[str] = None,
+                 max_per_host: Optional[int] = None, io_workers: Optional[int] = None,
+                 cpu_workers: Optional[int] = None, captcha_attempts: Optional[int] = None):
+        """初始化编排器
+
+        Args:
+            session_manager: 会话管理器
+            base_url: 教务系统地址
+            max_per_host: 每个主机同时进行的HTTP请求数
+            io_workers: 执行HTTP请求的线程数
+            cpu_workers: 执行验证码识别的进程数，0表示在线程中执行；应用内运行时总是使用线程
+            captcha_attempts: 每个账号最多尝试的验证码数量
+        """
+        self.session_manager = session_manager or get_session_manager()
+        self.base_url = base_url or get_config("BASE_URL")
+        self.max_per_host = max_per_host or get_config("RELOGIN_MAX_PER_HOST", 8)
+        self.io_workers = io_workers or get_config("RELOGIN_IO_WORKERS", 32)
+        self.cpu_workers = (get_config("RELOGIN_CPU_WORKERS", 0)
+                            if cpu_workers is None else cpu_workers)
+        self.captcha_attempts = captcha_attempts or get_config("AUTO_LOGIN_CAPTCHA_ATTEMPTS", 8)
+        self.min_confidence = get_config("CAPTCHA_MIN_CONFIDENCE", 0.6)
+
+        self._io_executor: Optional[Executor] = None
+        self._cpu_executor: Optional[Executor] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def run(self, accounts: Optional[List[str]] = None, verify_first: bool = True) -> Dict[str, str]:
+        """同步入口，恢复指定账号（默认为所有保存了凭据的账号）
+
+        Returns:
+            {学号: 结果}
+        """
+        return asyncio.run(self.run_async(accounts, verify_first))
+
+    async def run_async(self, accounts: Optional[List[str]] = None,
+                        verify_first: bool = True) -> Dict[str, str]:
+        """恢复指定账号，返回 {学号: 结果}"""
+        if accounts is None:
+            accounts = list(self.session_manager.list_accounts().keys())
+        if not accounts:
+            return {}
+
+        start_time = time.perf_counter()
+        self._io_executor = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="relogin-io")
+        self._cpu_executor = self._create_cpu_executor()
+
+        try:
+            with span("relogin.fleet", accounts=len(accounts)):
+                outcomes = await asyncio.gather(
+                    *(self._recover_account(student_id, verify_first) for student_id in accounts)
+                )
+        finally:
+            self._io_executor.shutdown(wait=True)
+            self._cpu_executor.shutdown(wait=True)
+            self._io_executor = self._cpu_executor = None
+            self._host_limits.clear()
+
+        results = dict(zip(accounts, outcomes))
+        summary: Dict[str, int] = {}
+        for outcome in outcomes:
+            summary[outcome] = summary.get(outcome, 0) + 1
+        logger.info(f"批量重新登录完成: {len(accounts)} 个账号，用时 {time.perf_counter() - start_time:.1f}s，"
+                    f"结果 {summary}", extra={"count": len(accounts)})
+        return results
+
+    def _create_cpu_executor(self) -> Executor:
+        """创建验证码识别执行器：无界面运行且配置了进程数时使用spawn进程池，否则使用线程"""
+        if self.cpu_workers > 0 and not _running_in_app():
+            try:
+                return ProcessPoolExecutor(
+                    max_workers=self.cpu_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_cpu_worker,
+                    initargs=(get_config("CAPTCHA_MODEL_FILE", "data/captcha_model.npz"),)
+                )
+            except (ImportError, OSError, NotImplementedError) as e:
+                # 没有sem_open等多进程支持的平台
+                logger.warning(f"无法创建识别进程池，改为在线程中识别验证码: {e}")
+        elif self.cpu_workers > 0:
+            logger.debug("应用内运行，验证码识别在线程中执行")
+        return ThreadPoolExecutor(max_workers=2, thread_name_prefix="relogin-cpu")
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        """获取主机的并发限制信号量"""
+        host = urlsplit(url).netloc
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return limit
+
+    async def _request(self, url: str, **kwargs) -> Optional[requests.Response]:
+        """在I/O线程池中发送请求，受主机并发限制"""
+        loop = asyncio.get_running_loop()
+        async with self._host_limit(url):
+            return await loop.run_in_executor(
+                self._io_executor, wrap_context(functools.partial(make_request, url, **kwargs))
+            )
+
+    async def _cpu(self, func, *args):
+        """在CPU执行器中运行函数（参数可能需要传给子进程，只传验证码图片等小数据）"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._cpu_executor, func, *args)
+
+    async def _parse(self, func, *args):
+        """在I/O线程中解析响应，页面HTML不需要复制到子进程"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_executor, func, *args)
+
+    async def _recover_account(self, student_id: str, verify_first: bool) -> str:
+        """恢复单个账号的会话"""
+        try:
+            with span("relogin.account", account=student_id) as account_span:
+                result = await self._do_recover(student_id, verify_first)
+                account_span.set_attribute("result", result)
+        except Exception as e:
+            logger.error(f"重新登录账号 {student_id} 出错: {e}")
+            result = RESULT_ERROR
+        RELOGIN_RESULTS.inc(result=result)
+        return result
+
+    async def _do_recover(self, student_id: str, verify_first: bool) -> str:
+        credentials = self.session_manager.get_saved_credentials(student_id)
+        if not credentials:
+            return RESULT_NO_CREDENTIALS
+
+        if verify_first:
+            saved_session = self.session_manager.read_session(student_id)
+            if saved_session is not None and await self._is_session_valid(saved_session):
+                return RESULT_STILL_VALID
+
+        session = new_session()
+        result = await self._login(session, student_id, credentials["password_md5"])
+        if result == RESULT_SUCCESS:
+            self.session_manager.save_session(student_id, session=session, make_current=False)
+            # 当前账号恢复后同时替换全局会话
+            if student_id == self.session_manager.get_current_account():
+                set_session(session)
+            logger.info(f"账号 {student_id} 已重新登录", extra={"account": student_id, "outcome": result})
+        else:
+            logger.warning(f"账号 {student_id} 重新登录失败: {result}",
+                           extra={"account": student_id, "outcome": result})
+        return result
+
+    async def _is_session_valid(self, session: requests.Session) -> bool:
+        """用账号自己的会话访问成绩页，判断会话是否仍然有效"""
+        resp = await self._request(get_config("SCORES_URL"), timeout=10, session=session)
+        if not resp or resp.status_code != 200 or "login" in resp.url:
+            return False
+        return bool(await self._parse(extract_student_name, resp.text))
+
+    async def _login(self, session: requests.Session, student_id: str, password_md5: str) -> str:
+        """按LoginManager.login的步骤登录：登录页tokenValue -> 验证码 -> 提交表单"""
+        login_page_url = f"{self.base_url}/login"
+        login_post_url = f"{self.base_url}/j_spring_security_check"
+        network_failures = 0
+
+        for attempt in range(self.captcha_attempts):
+            # 登录页（建立JSESSIONID并取得tokenValue）
+            page = await self._request(login_page_url, timeout=10, session=session)
+            if not page or page.status_code != 200:
+                network_failures += 1
+                if network_failures >= 3:
+                    return RESULT_NETWORK_ERROR
+                continue
+            token_value = await self._parse(parse_token_value, page.text)
+
+            # 验证码
+            captcha = await self._request(
+                f"{self.base_url}/img/captcha.jpg?{int(time.time() * 1000)}",
+                headers={"Referer": login_page_url}, session=session
+            )
+            if not captcha or captcha.status_code != 200:
+                network_failures += 1
+                if network_failures >= 3:
+                    return RESULT_NETWORK_ERROR
+                continue
+
+            captcha_code, confidence = await self._cpu(_solve_captcha, captcha.content)
+            if not captcha_code or confidence < self.min_confidence:
+                logger.debug(f"账号 {student_id} 验证码无法识别，更换验证码")
+                continue
+
+            # 提交登录表单
+            response = await self._request(
+                login_post_url,
+                method="POST",
+                data=build_login_form(student_id, password_md5, captcha_code, token_value or ""),
+                headers={"Origin": self.base_url, "Content-Type": "application/x-www-form-urlencoded"},
+                allow_redirects=False,
+                timeout=15,
+                session=session
+            )
+            if not response:
+                network_failures += 1
+                if network_failures >= 3:
+                    return RESULT_NETWORK_ERROR
+                continue
+
+            result, _ = await self._parse(
+                classify_login_response,
+                response.status_code,
+                response.headers.get("Location", ""),
+                response.text if response.status_code != 302 else ""
+            )
+            LOGIN_ATTEMPTS.inc(result=result)
+            if result == "success":
+                return RESULT_SUCCESS
+            if result == "credential_error":
+                return RESULT_CREDENTIAL_ERROR
+            logger.debug(f"账号 {student_id} 第 {attempt + 1} 次登录失败: {result}")
+
+        return RESULT_CAPTCHA_EXHAUSTED
+
+def relogin_accounts(accounts: Optional[List[str]] = None, verify_first: bool = True,
+                     **options) -> Dict[str, str]:
+    """批量恢复账号会话（便捷函数），options传给ReloginOrchestrator"""
+    return ReloginOrchestrator(**options).run(accounts, verify_first)
+
+# ==================== 命令行入口 ====================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """无界面批量重新登录，例如服务器重启后在命令行恢复所有账号：
+
+        python -m src.core.relogin --workers 4
+    """
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="批量恢复保存了凭据的账号会话")
+    parser.add_argument("accounts", nargs="*", help="要恢复的学号，默认为所有账号")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="验证码识别进程数，0表示在线程中识别")
+    parser.add_argument("--io-workers", type=int, default=None, help="HTTP线程数，默认使用配置RELOGIN_IO_WORKERS")
+    parser.add_argument("--max-per-host", type=int, default=None,
+                        help="每个主机的并发请求数，默认使用配置RELOGIN_MAX_PER_HOST")
+    parser.add_argument("--base-url", default=None, help="教务系统地址，默认使用配置BASE_URL")
+    parser.add_argument("--no-verify", action="store_true", help="不检查现有会话，直接重新登录")
+    parser.add_argument("--json", default=None, help="把 {学号: 结果} 写入JSON文件")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    results = relogin_accounts(
+        args.accounts or None, verify_first=not args.no_verify,
+        base_url=args.base_url, max_per_host=args.max_per_host,
+        io_workers=args.io_workers, cpu_workers=args.workers
+    )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    failed = [student_id for student_id, result in results.items()
+              if result not in (RESULT_SUCCESS, RESULT_STILL_VALID)]
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,21 +11,93 @@ import pickle
 import time
 import threading
 import logging
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 
 from .config import get_config
+from .store import get_account_store
+from .credentials import encrypt_credential, decrypt_credential, is_encrypted
+from ..utils.metrics import SESSION_VALID
+from ..utils.tracing import traced
+from ..utils.log_pipeline import set_log_account
 
 logger = logging.getLogger(__name__)
 
 # 全局会话对象
 session = None
 
+# 会话序列化格式版本（只保存cookie和自定义请求头）
+SESSION_FORMAT_VERSION = 1
+# 旧版会话文件后缀，启动时导入账号存储
+SESSION_FILE_SUFFIX = ".json"
+LEGACY_SESSION_SUFFIX = ".session"
+
+# 所有会话共享的连接池适配器，切换账号时无需重建连接池
+_shared_adapter = None
+
+def _get_shared_adapter():
+    """获取共享的连接池适配器"""
+    global _shared_adapter
+    if _shared_adapter is None:
+        from requests.adapters import HTTPAdapter
+        _shared_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+    return _shared_adapter
+
+def new_session():
+    """创建挂载共享连接池的新会话"""
+    import requests
+    new = requests.Session()
+    adapter = _get_shared_adapter()
+    new.mount("http://", adapter)
+    new.mount("https://", adapter)
+    return new
+
+def serialize_session(target) -> Dict[str, Any]:
+    """把会话序列化为只包含cookie（含域名、路径、过期时间）和自定义请求头的字典"""
+    import requests
+
+    cookies = [
+        {
+            "name": cookie.name,
+            "value": cookie.value,
+            "domain": cookie.domain,
+            "path": cookie.path,
+            "expires": cookie.expires,
+            "secure": cookie.secure,
+        }
+        for cookie in target.cookies
+    ]
+    default_headers = requests.utils.default_headers()
+    headers = {
+        key: value for key, value in target.headers.items()
+        if default_headers.get(key) != value
+    }
+    return {"version": SESSION_FORMAT_VERSION, "cookies": cookies, "headers": headers}
+
+def build_session(data: Dict[str, Any]):
+    """从序列化数据重建会话（兼容自动登录旧版保存的 {名称: 值} 形式的cookie）"""
+    restored = new_session()
+    now = time.time()
+    cookies = data.get("cookies", [])
+    if isinstance(cookies, dict):
+        restored.cookies.update(cookies)
+    else:
+        for cookie in cookies:
+            expires = cookie.get("expires")
+            if expires is not None and expires < now:
+                continue
+            restored.cookies.set(
+                cookie["name"], cookie["value"],
+                domain=cookie.get("domain", ""), path=cookie.get("path", "/"),
+                expires=expires, secure=cookie.get("secure", False)
+            )
+    restored.headers.update(data.get("headers", {}))
+    return restored
+
 def get_session():
     """获取全局会话对象"""
     global session
     if session is None:
-        import requests
-        session = requests.Session()
+        session = new_session()
     return session
 
 def set_session(new_session):
@@ -33,6 +105,16 @@ def set_session(new_session):
     global session
     session = new_session
 
+def _read_json_file(path: Optional[str]) -> Dict[str, Any]:
+    """读取旧版JSON数据文件，不存在或损坏时返回空字典"""
+    if path and os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"读取文件失败 {path}: {str(e)}")
+    return {}
+
 class SessionManager:
     """会话管理类，处理会话的保存、加载和验证"""
 
@@ -52,81 +134,165 @@ class SessionManager:
 
         self.sessions_dir = get_config("SESSION_DIR")
         self.accounts_file = get_config("ACCOUNTS_FILE")
-        self.accounts = self._load_accounts()
+        self.store = get_account_store()
         self.current_account = None
+        # 已加载的会话序列化数据，切换回已加载过的账号时不再读取账号存储；
+        # 缓存快照而不是会话对象，之后对全局会话的修改（清空cookie、登录其他账号）不会影响缓存
+        self._session_cache: Dict[str, Dict[str, Any]] = {}
 
-        # 确保目录存在
-        os.makedirs(self.sessions_dir, exist_ok=True)
-        os.makedirs(os.path.dirname(self.accounts_file), exist_ok=True)
+        self._migrate_legacy_files()
 
         SessionManager._initialized = True
-    
-    def _load_accounts(self) -> Dict[str, Any]:
-        """加载保存的账号信息"""
-        if os.path.exists(self.accounts_file):
+
+    def _migrate_legacy_files(self):
+        """把旧版 accounts.json、credentials.json 和会话文件一次性导入账号存储
+
+        导入成功的账号的会话文件改名为 .migrated；有账号导入失败时保留失败账号的文件和两个JSON文件，
+        下次启动时重试（已在账号存储中的账号不再重复导入）。
+        """
+        if self.store.get_meta("legacy_files_migrated"):
+            return
+
+        credentials_file = get_config("CREDENTIALS_FILE")
+        accounts = _read_json_file(self.accounts_file)
+        tokens = _read_json_file(credentials_file)
+        session_files = self._list_legacy_session_files()
+        migrated = []
+        failed = 0
+
+        # 只有会话文件的账号（例如删除过accounts.json）也一并导入
+        for student_id in set(accounts) | set(tokens) | set(session_files):
+            if self.store.get_account(student_id) is not None:
+                # 上次迁移中途失败时已导入的账号
+                migrated.append(student_id)
+                continue
             try:
-                with open(self.accounts_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                info = accounts.get(student_id, {})
+                token_info = tokens.get(student_id, {})
+                session_data = self._read_legacy_session_data(student_id)
+                if session_data is None and 'cookies' in token_info:
+                    # 旧版自动登录在credentials.json里重复保存了cookie
+                    session_data = serialize_session(build_session(token_info))
+
+                self.store.touch_login(student_id, session_data)
+                fields = {
+                    "session_saved": token_info.get("last_saved"),
+                    "session_valid": token_info.get("session_valid"),
+                    "last_verified": token_info.get("last_verified"),
+                    "password_md5": encrypt_credential(info["password_md5"]) if info.get("password_md5") else None,
+                }
+                last_login = info.get("last_login")
+                if last_login:
+                    fields["last_login"] = last_login
+                    fields["last_login_ts"] = time.mktime(time.strptime(last_login, "%Y-%m-%d %H:%M:%S"))
+                self.store.update_account(student_id, **{k: v for k, v in fields.items() if v is not None})
+                migrated.append(student_id)
             except Exception as e:
-                logger.error(f"加载账号信息失败: {str(e)}")
-        return {}
-    
-    def _save_accounts(self):
-        """保存账号信息到文件"""
-        try:
-            with open(self.accounts_file, 'w', encoding='utf-8') as f:
-                json.dump(self.accounts, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.error(f"保存账号信息失败: {str(e)}")
-    
-    def save_session(self, student_id: str) -> bool:
-        """保存当前会话"""
+                failed += 1
+                logger.error(f"迁移账号 {student_id} 失败: {str(e)}")
+
+        # 已导入账号的旧文件改名为 .migrated，不删除
+        for student_id in migrated:
+            for path in session_files.get(student_id, ()):
+                try:
+                    os.replace(path, path + ".migrated")
+                except OSError as e:
+                    logger.error(f"重命名旧会话文件失败 {path}: {str(e)}")
+        if failed:
+            logger.warning(f"{failed} 个账号迁移失败，保留旧文件，下次启动时重试")
+            return
+        for path in (self.accounts_file, credentials_file):
+            if path and os.path.exists(path):
+                os.replace(path, path + ".migrated")
+
+        self.store.set_meta("legacy_files_migrated", str(int(time.time())))
+        if migrated:
+            logger.info(f"已将 {len(migrated)} 个账号迁移到账号存储")
+
+    def _list_legacy_session_files(self) -> Dict[str, List[str]]:
+        """列出旧版会话文件 {学号: [文件路径, ...]}"""
+        files: Dict[str, List[str]] = {}
+        if os.path.isdir(self.sessions_dir):
+            for name in os.listdir(self.sessions_dir):
+                for suffix in (SESSION_FILE_SUFFIX, LEGACY_SESSION_SUFFIX):
+                    if name.endswith(suffix):
+                        files.setdefault(name[:-len(suffix)], []).append(os.path.join(self.sessions_dir, name))
+        return files
+
+    def _read_legacy_session_data(self, student_id: str) -> Optional[Dict[str, Any]]:
+        """读取旧版会话文件（JSON或pickle格式），转换为序列化数据"""
+        json_file = os.path.join(self.sessions_dir, f"{student_id}{SESSION_FILE_SUFFIX}")
+        if os.path.exists(json_file):
+            return _read_json_file(json_file) or None
+        pickle_file = os.path.join(self.sessions_dir, f"{student_id}{LEGACY_SESSION_SUFFIX}")
+        if os.path.exists(pickle_file):
+            with open(pickle_file, 'rb') as f:
+                return serialize_session(pickle.load(f))
+        return None
+
+    @traced("session.save")
+    def save_session(self, student_id: str, session=None, make_current: bool = True) -> bool:
+        """保存会话
+
+        Args:
+            student_id: 学号
+            session: 要保存的会话，默认为全局会话
+            make_current: 是否同时切换为当前账号（批量重新登录其他账号时为False）
+        """
         if not student_id:
             logger.error("保存会话失败: 学号为空")
             return False
             
-        session_file = os.path.join(self.sessions_dir, f"{student_id}.session")
         try:
-            current_session = get_session()
-            with open(session_file, 'wb') as f:
-                pickle.dump(current_session, f)
+            current_session = session or get_session()
+            session_data = serialize_session(current_session)
+            # 登录时间和会话在同一事务中写入，只影响该账号
+            self.store.touch_login(student_id, session_data)
+            self._session_cache[student_id] = session_data
             logger.info(f"会话已保存: {student_id}")
             
-            # 更新账号列表
-            if student_id not in self.accounts:
-                self.accounts[student_id] = {"last_login": time.strftime("%Y-%m-%d %H:%M:%S")}
-            else:
-                self.accounts[student_id]["last_login"] = time.strftime("%Y-%m-%d %H:%M:%S")
-            
-            self._save_accounts()
-            self.current_account = student_id
+            if make_current:
+                self.current_account = student_id
+                set_log_account(student_id)
             return True
         except Exception as e:
             logger.error(f"保存会话失败: {str(e)}")
             return False
     
+    def read_session(self, student_id: str):
+        """读取指定学号保存的会话，不替换全局会话，失败返回None
+
+        每次返回新建的会话对象，优先使用内存中已加载的会话数据。
+        """
+        try:
+            session_data = self._session_cache.get(student_id)
+            if session_data is None:
+                session_data = self.store.load_session_data(student_id)
+                if session_data is None:
+                    return None
+                self._session_cache[student_id] = session_data
+            return build_session(session_data)
+        except Exception as e:
+            logger.error(f"读取会话失败: {str(e)}")
+            return None
+
     def load_session(self, student_id: str) -> bool:
         """加载指定学号的会话"""
-        session_file = os.path.join(self.sessions_dir, f"{student_id}.session")
-        if not os.path.exists(session_file):
+        loaded_session = self.read_session(student_id)
+        if loaded_session is None:
             logger.warning(f"会话文件不存在: {student_id}")
             return False
-            
-        try:
-            with open(session_file, 'rb') as f:
-                loaded_session = pickle.load(f)
-            
-            # 替换全局会话
-            set_session(loaded_session)
-            self.current_account = student_id
-            logger.info(f"已加载会话: {student_id}")
-            return True
-        except Exception as e:
-            logger.error(f"加载会话失败: {str(e)}")
-            return False
+
+        # 替换全局会话
+        set_session(loaded_session)
+        self.current_account = student_id
+        set_log_account(student_id)
+        logger.info(f"已加载会话: {student_id}")
+        return True
     
-    def verify_session(self, student_id: Optional[str] = None) -> bool:
-        """验证会话是否有效"""
+    @traced("session.verify")
+    def verify_session(self, student_id: Optional[str] = None, session=None) -> bool:
+        """验证会话是否有效（session为空时验证全局会话）"""
         if student_id is None:
             student_id = self.current_account
             
@@ -138,17 +304,21 @@ class SessionManager:
             # 延迟导入避免循环导入
             from .api import make_request, extract_student_name
 
-            resp = make_request(get_config("SCORES_URL"), timeout=10)
+            resp = make_request(get_config("SCORES_URL"), timeout=10, session=session)
             if resp and resp.status_code == 200 and "login" not in resp.url:
                 # 提取学生姓名以进一步验证
                 student_name = extract_student_name(resp.text)
                 if student_name:
-                    logger.info(f"会话有效，当前用户: {student_name}")
+                    logger.info(f"会话有效，当前用户: {student_name}",
+                                extra={"account": student_id, "outcome": "valid"})
+                    SESSION_VALID.set(1, account=student_id)
                     return True
-            logger.warning("会话已过期或无效")
+            logger.warning("会话已过期或无效", extra={"account": student_id, "outcome": "invalid"})
+            SESSION_VALID.set(0, account=student_id)
             return False
         except Exception as e:
             logger.error(f"验证会话时出错: {str(e)}")
+            SESSION_VALID.set(0, account=student_id)
             return False
 
     def is_session_valid(self, student_id: Optional[str] = None) -> bool:
@@ -156,29 +326,61 @@ class SessionManager:
         return self.verify_session(student_id)
 
     def list_accounts(self) -> Dict[str, Any]:
-        """获取所有保存的账号"""
-        return self.accounts.copy()
+        """获取所有保存的账号（按最近登录时间倒序）"""
+        return self.store.list_accounts()
     
+    def list_accounts_page(self, cursor: Optional[str] = None, limit: int = 20,
+                           prefix: Optional[str] = None):
+        """分页获取账号，返回(账号列表, 下一页游标)，见AccountStore.list_accounts_page"""
+        return self.store.list_accounts_page(cursor, limit, prefix)
+
+    def count_accounts(self, prefix: Optional[str] = None) -> int:
+        """统计账号数量"""
+        return self.store.count_accounts(prefix)
+
     def get_current_account(self) -> Optional[str]:
         """获取当前登录的账号"""
         return self.current_account
+
+    def save_credentials(self, student_id: str, password_md5: str) -> bool:
+        """保存自动登录用的凭据
+
+        保存的是登录表单提交的密码摘要（未加盐的MD5，可直接用于登录），
+        因此用本机安装密钥加密后再写入账号存储，见credentials模块。
+        """
+        if not self.store.update_account(student_id, password_md5=encrypt_credential(password_md5)):
+            logger.warning(f"保存凭据失败: 账号不存在 {student_id}")
+            return False
+        logger.info(f"已保存自动登录凭据: {student_id}")
+        return True
+
+    def get_saved_credentials(self, student_id: str) -> Optional[Dict[str, str]]:
+        """获取保存的自动登录凭据，没有时返回None"""
+        account = self.store.get_account(student_id)
+        stored = account.get("password_md5") if account else None
+        if not stored:
+            return None
+        if is_encrypted(stored):
+            password_md5 = decrypt_credential(stored)
+            if not password_md5:
+                return None
+        else:
+            # 旧版明文保存的摘要，读取时改为加密保存
+            password_md5 = stored
+            self.store.update_account(student_id, password_md5=encrypt_credential(password_md5))
+        return {"student_id": student_id, "password_md5": password_md5}
     
     def delete_account(self, student_id: str) -> bool:
         """删除指定账号的会话和信息"""
         try:
-            # 删除会话文件
-            session_file = os.path.join(self.sessions_dir, f"{student_id}.session")
-            if os.path.exists(session_file):
-                os.remove(session_file)
-            
-            # 从账号列表中移除
-            if student_id in self.accounts:
-                del self.accounts[student_id]
-                self._save_accounts()
+            # 账号和会话在同一行中，一并删除
+            self.store.delete_account(student_id)
+            self._session_cache.pop(student_id, None)
             
             # 如果删除的是当前账号，清空当前账号
             if self.current_account == student_id:
                 self.current_account = None
+                set_log_account(None)
             
             logger.info(f"已删除账号: {student_id}")
             return True
@@ -188,8 +390,8 @@ class SessionManager:
     
     def cleanup(self):
         """清理资源"""
-        # 保存账号信息
-        self._save_accounts()
+        # 账号信息在每次修改时已提交，这里只释放缓存的会话
+        self._session_cache.clear()
         logger.info("会话管理器已清理")
 
 class AutoSessionManager:
@@ -199,7 +401,6 @@ class AutoSessionManager:
         """初始化自动会话管理器"""
         self.session_manager = session_manager
         self.login_manager_class = login_manager_class
-        self.credentials_file = get_config("CREDENTIALS_FILE")
         self.check_interval = get_config("AUTO_LOGIN_CHECK_INTERVAL")
         self.expire_threshold = get_config("SESSION_EXPIRE_THRESHOLD")
 
@@ -210,51 +411,17 @@ class AutoSessionManager:
         self.last_check_time = 0
         self.login_in_progress = False
 
-        # Token和会话信息
-        self.session_tokens = {}  # 存储每个账号的token信息
-
-        # 加载保存的token信息
-        self.session_tokens = self._load_session_tokens()
-
-        # 确保目录存在
-        os.makedirs(os.path.dirname(self.credentials_file), exist_ok=True)
-    
-    def _load_session_tokens(self) -> Dict[str, Any]:
-        """加载保存的会话token信息"""
-        if os.path.exists(self.credentials_file):
-            try:
-                with open(self.credentials_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"加载会话token失败: {str(e)}")
-        return {}
-    
-    def _save_session_tokens(self):
-        """保存会话token信息"""
-        try:
-            with open(self.credentials_file, 'w', encoding='utf-8') as f:
-                json.dump(self.session_tokens, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.error(f"保存会话token失败: {str(e)}")
+        # 会话和验证状态保存在账号存储中
+        self.store = session_manager.store
     
     def save_session_info(self, student_id: str) -> bool:
-        """保存会话信息和token"""
+        """保存会话和验证状态"""
         try:
-            current_session = get_session()
-            if not current_session:
+            if not self.session_manager.save_session(student_id):
                 return False
             
-            # 提取会话中的重要信息
-            session_info = {
-                'cookies': dict(current_session.cookies),
-                'headers': dict(current_session.headers),
-                'last_saved': time.time(),
-                'session_valid': True,
-                'last_verified': time.time()
-            }
-            
-            self.session_tokens[student_id] = session_info
-            self._save_session_tokens()
+            now = time.time()
+            self.store.update_account(student_id, session_saved=now, session_valid=1, last_verified=now)
             logger.info(f"已保存会话token信息: {student_id}")
             return True
         except Exception as e:
@@ -262,18 +429,13 @@ class AutoSessionManager:
             return False
     
     def restore_session_from_tokens(self, student_id: str) -> bool:
-        """从保存的token恢复会话"""
-        if student_id not in self.session_tokens:
-            logger.warning(f"没有找到账号的token信息: {student_id}")
-            return False
-        
+        """从保存的会话恢复全局会话"""
         try:
-            session_info = self.session_tokens[student_id]
-            current_session = get_session()
-            
-            # 恢复cookies和headers
-            current_session.cookies.update(session_info.get('cookies', {}))
-            current_session.headers.update(session_info.get('headers', {}))
+            restored_session = self.session_manager.read_session(student_id)
+            if restored_session is None:
+                logger.warning(f"没有找到账号的会话信息: {student_id}")
+                return False
+            set_session(restored_session)
             
             logger.info(f"已从token恢复会话: {student_id}")
             return True
@@ -375,16 +537,13 @@ class AutoSessionManager:
                 if self.session_manager.verify_session(self.current_student_id):
                     logger.info(f"基于token的自动登录成功: {self.current_student_id}")
                     # 更新会话验证时间
-                    if self.current_student_id in self.session_tokens:
-                        self.session_tokens[self.current_student_id]['last_verified'] = time.time()
-                        self._save_session_tokens()
+                    self.store.update_account(self.current_student_id, session_valid=1,
+                                              last_verified=time.time())
                     success = True
                 else:
                     logger.warning(f"恢复的token会话无效: {self.current_student_id}")
-                    # 标记token为无效
-                    if self.current_student_id in self.session_tokens:
-                        self.session_tokens[self.current_student_id]['session_valid'] = False
-                        self._save_session_tokens()
+                    # 标记会话为无效
+                    self.store.update_account(self.current_student_id, session_valid=0)
             else:
                 logger.warning(f"无法恢复会话token: {self.current_student_id}")
 
@@ -398,7 +557,6 @@ class AutoSessionManager:
     def cleanup(self):
         """清理资源"""
         self.disable_auto_login()
-        self._save_session_tokens()
         logger.info("自动会话管理器已清理")
 
 
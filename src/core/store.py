@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+账号存储模块
+用一个SQLite数据库（WAL模式）统一保存账号、会话cookie、自动登录凭据和验证时间，
+取代 accounts.json、credentials.json 和每个账号一个的会话文件；每次修改只在事务中更新对应账号的一行
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Optional, Dict, Any, List, Tuple
+
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    student_id     TEXT PRIMARY KEY,
+    last_login     TEXT,
+    last_login_ts  REAL NOT NULL DEFAULT 0,
+    password_md5   TEXT,    -- 加密后的密码摘要（credentials模块）
+    session_data   TEXT,
+    session_saved  REAL,
+    session_valid  INTEGER,
+    last_verified  REAL
+);
+CREATE INDEX IF NOT EXISTS idx_accounts_last_login ON accounts (last_login_ts DESC, student_id DESC);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# 学号前缀搜索的上界后缀（按UTF-8字节比较时大于任何字符）
+_PREFIX_UPPER = "\U0010ffff"
+
+# 允许通过update_account修改的列
+ACCOUNT_COLUMNS = ("last_login", "last_login_ts", "password_md5", "session_data",
+                   "session_saved", "session_valid", "last_verified")
+
+def _restrict_permissions(db_path: str):
+    """把数据库及其WAL/共享内存文件的权限改为0600（旧版本创建的文件可能是0644）"""
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        try:
+            if os.path.exists(path):
+                os.chmod(path, 0o600)
+        except OSError as e:
+            logger.warning(f"修改文件权限失败 {path}: {e}")
+
+class AccountStore:
+    """账号存储"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """初始化账号存储
+
+        Args:
+            db_path: 数据库文件路径，默认使用配置ACCOUNTS_DB
+        """
+        self.db_path = db_path or get_config("ACCOUNTS_DB", "data/accounts.db")
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            # 数据库中有会话cookie和自动登录凭据，只允许当前用户读写（WAL文件沿用数据库文件的权限）
+            os.close(os.open(self.db_path, os.O_RDWR | os.O_CREAT, 0o600))
+            _restrict_permissions(self.db_path)
+        # 单连接加锁，界面线程、自动登录线程和批量重新登录共用
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.set_meta("schema_version", str(SCHEMA_VERSION))
+
+    def _transaction(self):
+        """事务上下文：成功提交，异常回滚"""
+        return _Transaction(self._conn, self._lock)
+
+    # ==================== 账号 ====================
+
+    def touch_login(self, student_id: str, session_data: Optional[Dict[str, Any]] = None):
+        """记录一次登录（不存在则创建账号），可同时保存会话"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO accounts (student_id, last_login, last_login_ts) VALUES (?, ?, ?) "
+                "ON CONFLICT(student_id) DO UPDATE SET last_login = excluded.last_login, "
+                "last_login_ts = excluded.last_login_ts",
+                (student_id, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)), now)
+            )
+            if session_data is not None:
+                conn.execute(
+                    "UPDATE accounts SET session_data = ?, session_saved = ? WHERE student_id = ?",
+                    (json.dumps(session_data, ensure_ascii=False, separators=(',', ':')), now, student_id)
+                )
+
+    def update_account(self, student_id: str, **fields) -> bool:
+        """更新账号的部分字段，账号不存在时返回False"""
+        unknown = set(fields) - set(ACCOUNT_COLUMNS)
+        if unknown:
+            raise ValueError(f"未知的账号字段: {', '.join(sorted(unknown))}")
+        if not fields:
+            return self.has_account(student_id)
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE accounts SET {assignments} WHERE student_id = ?",
+                (*fields.values(), student_id)
+            )
+            return cursor.rowcount > 0
+
+    def has_account(self, student_id: str) -> bool:
+        """账号是否存在"""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM accounts WHERE student_id = ?", (student_id,)).fetchone()
+        return row is not None
+
+    def get_account(self, student_id: str) -> Optional[Dict[str, Any]]:
+        """获取账号的全部字段（会话数据除外）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT student_id, last_login, last_login_ts, password_md5, session_saved, "
+                "session_valid, last_verified FROM accounts WHERE student_id = ?",
+                (student_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def list_accounts(self) -> Dict[str, Dict[str, Any]]:
+        """获取所有账号的概要信息，按最近登录时间倒序"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT student_id, last_login FROM accounts ORDER BY last_login_ts DESC"
+            ).fetchall()
+        return {row["student_id"]: {"last_login": row["last_login"]} for row in rows}
+
+    def list_accounts_page(self, cursor: Optional[str] = None, limit: int = 20,
+                           prefix: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """按最近登录时间倒序分页获取账号（键集分页，翻页代价与页码无关）
+
+        Args:
+            cursor: 上一页返回的游标，None表示第一页
+            limit: 每页数量
+            prefix: 学号前缀搜索
+
+        Returns:
+            (账号列表, 下一页游标)，没有更多时游标为None
+        """
+        conditions, params = [], []
+        if cursor:
+            last_ts, last_id = _decode_cursor(cursor)
+            conditions.append("(last_login_ts < ? OR (last_login_ts = ? AND student_id < ?))")
+            params.extend([last_ts, last_ts, last_id])
+        if prefix:
+            conditions.append("student_id >= ? AND student_id < ?")
+            params.extend([prefix, prefix + _PREFIX_UPPER])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT student_id, last_login, last_login_ts FROM accounts {where} "
+                f"ORDER BY last_login_ts DESC, student_id DESC LIMIT ?",
+                (*params, limit + 1)
+            ).fetchall()
+
+        page = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            next_cursor = _encode_cursor(last["last_login_ts"], last["student_id"])
+        return page, next_cursor
+
+    def count_accounts(self, prefix: Optional[str] = None) -> int:
+        """统计账号数量（可按学号前缀）"""
+        with self._lock:
+            if prefix:
+                row = self._conn.execute(
+                    "SELECT COUNT(*) FROM accounts WHERE student_id >= ? AND student_id < ?",
+                    (prefix, prefix + _PREFIX_UPPER)
+                ).fetchone()
+            else:
+                row = self._conn.execute("SELECT COUNT(*) FROM accounts").fetchone()
+        return row[0]
+
+    def list_student_ids(self) -> List[str]:
+        """获取所有学号"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT student_id FROM accounts")]
+
+    def delete_account(self, student_id: str) -> bool:
+        """删除账号及其会话"""
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM accounts WHERE student_id = ?", (student_id,)).rowcount > 0
+
+    # ==================== 会话 ====================
+
+    def load_session_data(self, student_id: str) -> Optional[Dict[str, Any]]:
+        """读取账号保存的会话数据"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT session_data FROM accounts WHERE student_id = ?", (student_id,)
+            ).fetchone()
+        if not row or not row[0]:
+            return None
+        return json.loads(row[0])
+
+    # ==================== 元数据 ====================
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+def _encode_cursor(last_login_ts: float, student_id: str) -> str:
+    """分页游标：最后一行的登录时间和学号"""
+    return f"{last_login_ts!r}|{student_id}"
+
+def _decode_cursor(cursor: str) -> Tuple[float, str]:
+    last_ts, _, student_id = cursor.partition("|")
+    return float(last_ts), student_id
+
+class _Transaction:
+    """BEGIN IMMEDIATE 事务，持有存储锁直到提交或回滚"""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.RLock):
+        self._conn = conn
+        self._lock = lock
+
+    def __enter__(self) -> sqlite3.Connection:
+        self._lock.acquire()
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self._lock.release()
+            raise
+        return self._conn
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self._lock.release()
+        return False
+
+# 全局账号存储实例
+_account_store = None
+_store_lock = threading.Lock()
+
+def get_account_store() -> AccountStore:
+    """获取账号存储实例"""
+    global _account_store
+    if _account_store is None:
+        with _store_lock:
+            if _account_store is None:
+                _account_store = AccountStore()
+    return _account_store
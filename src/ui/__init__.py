@@ -5,7 +5,7 @@ UI界面模块
 包含所有用户界面相关的组件和屏幕
 """
 
-from .screens import MainScreen, LoginScreen, QueryScoresScreen, SwitchAccountScreen
+from ..utils.lazy import lazy_exports
 from .themes import (
     THEME_COLORS, DARK_THEME_COLORS, get_theme_color, set_theme,
     is_dark_theme, apply_theme, get_device_type, responsive_size,
@@ -20,6 +20,12 @@ from .components import (
     show_popup, show_confirmation_dialog, show_loading_dialog
 )
 
+# 界面类延迟导入
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'MainScreen': '.screens', 'LoginScreen': '.screens',
+    'QueryScoresScreen': '.screens', 'SwitchAccountScreen': '.screens',
+})
+
 __all__ = [
     # 屏幕组件
     'MainScreen', 'LoginScreen', 'QueryScoresScreen', 'SwitchAccountScreen',
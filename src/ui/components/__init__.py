@@ -16,6 +16,7 @@ from .dialogs import (
     show_popup, show_confirmation_dialog, show_loading_dialog
 )
 from .cards import ModernCard
+from .score_table import TableRow, ScoreTable, ScoreRenderModel
 
 __all__ = [
     # 按钮组件
@@ -29,5 +30,8 @@ __all__ = [
     'show_popup', 'show_confirmation_dialog', 'show_loading_dialog',
 
     # 卡片组件
-    'ModernCard'
+    'ModernCard',
+
+    # 表格组件
+    'TableRow', 'ScoreTable', 'ScoreRenderModel'
 ]
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+成绩表格组件模块
+基于RecycleView的虚拟化成绩表：只为可见行创建控件，滚动时复用行控件并替换数据，
+每行只有一组画布指令，适合数百门课程的成绩单。
+列宽、单元格文本和颜色在工作线程中预先算成不可变的ScoreRenderModel，
+主线程按帧时间预算分批把行数据绑定到表格
+"""
+
+from functools import partial
+from typing import List, Sequence, Tuple, NamedTuple, Optional, Callable
+
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.label import Label
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.graphics import Color, Rectangle
+
+from ..themes import get_theme_color, responsive_size, responsive_spacing, responsive_font_size
+from ..incremental import IncrementalBuilder, FRAME_BUDGET
+
+# 行背景（交替显示）和边框颜色
+ROW_COLORS = ((1, 1, 1, 1), (0.98, 0.98, 0.98, 1))
+HEADER_COLOR = (0.95, 0.95, 0.95, 1)
+BORDER_COLOR = (0.9, 0.9, 0.9, 1)
+
+# 分批绑定时每步追加的行数（约为一屏）
+BIND_CHUNK_ROWS = 12
+
+# 单元格数据：(文本, 对齐方式, 颜色, 是否加粗)
+Cell = Tuple[str, str, Tuple[float, ...], bool]
+
+class ScoreRenderModel(NamedTuple):
+    """成绩表渲染模型：在工作线程中生成，主线程只读"""
+    title: str
+    columns: Tuple[Tuple[str, str], ...]
+    widths: Tuple[float, ...]
+    rows: Tuple[Tuple[Cell, ...], ...]
+    table_width: float
+    view_width: float
+
+class TableRow(RecycleDataViewBehavior, BoxLayout):
+    """表格行：固定数量的单元格标签，背景、列分隔线和底边框画在行自身的画布上"""
+
+    def __init__(self, columns: int = 4, font_size: float = None, bold: bool = False, **kwargs):
+        kwargs.setdefault('orientation', 'horizontal')
+        kwargs.setdefault('spacing', 0)
+        super(TableRow, self).__init__(**kwargs)
+        self.cell_padding = responsive_spacing(8)
+        self._font_size = font_size or responsive_font_size(10)
+        self._bold = bold
+        self.cells: List[Label] = []
+        self._separators: List[Rectangle] = []
+
+        with self.canvas.before:
+            self._bg_color = Color(*ROW_COLORS[0])
+            self._bg_rect = Rectangle(pos=self.pos, size=self.size)
+        with self.canvas.after:
+            Color(*BORDER_COLOR)
+            self._bottom_border = Rectangle()
+        self._set_columns(columns)
+
+        self.bind(pos=self._update_graphics, size=self._update_graphics)
+
+    def _set_columns(self, columns: int):
+        """增减单元格标签和列分隔线，使列数与数据一致"""
+        while len(self.cells) < columns:
+            cell = Label(
+                size_hint=(None, 1),
+                font_size=self._font_size,
+                color=get_theme_color('text'),
+                valign='middle',
+                bold=self._bold
+            )
+            self.cells.append(cell)
+            self.add_widget(cell)
+        while len(self.cells) > columns:
+            self.remove_widget(self.cells.pop())
+        while len(self._separators) < max(columns - 1, 0):
+            separator = Rectangle()
+            self.canvas.after.add(separator)
+            self._separators.append(separator)
+        while len(self._separators) > max(columns - 1, 0):
+            self.canvas.after.remove(self._separators.pop())
+
+    def set_cells(self, widths: Sequence[float], cells: Sequence[Cell]):
+        """设置列宽和单元格内容
+
+        Args:
+            widths: 每列宽度
+            cells: 每个单元格的 (文本, 对齐方式, 颜色, 是否加粗)
+        """
+        if len(cells) != len(self.cells):
+            self._set_columns(len(cells))
+        for label, width, (text, align, color, bold) in zip(self.cells, widths, cells):
+            label.width = width
+            label.text_size = (max(width - 2 * self.cell_padding, 0), None)
+            label.halign = align
+            label.color = color
+            label.bold = bold
+            label.text = text
+        self._update_graphics()
+
+    def set_background(self, color):
+        self._bg_color.rgba = color
+
+    def refresh_view_attrs(self, rv, index, data):
+        """RecycleView复用行控件时写入新数据
+
+        基类会把数据的每个键setattr到控件上，因此键名使用row_前缀，避免覆盖self.cells
+        """
+        self.set_cells(data['row_widths'], data['row_cells'])
+        self.set_background(ROW_COLORS[index % 2])
+        return super(TableRow, self).refresh_view_attrs(rv, index, data)
+
+    def _update_graphics(self, *args):
+        """更新背景和边框位置"""
+        self._bg_rect.pos = self.pos
+        self._bg_rect.size = self.size
+        self._bottom_border.pos = self.pos
+        self._bottom_border.size = (self.width, 1)
+        x = self.x
+        for separator, cell in zip(self._separators, self.cells):
+            x += cell.width
+            separator.pos = (x - 1, self.y)
+            separator.size = (1, self.height)
+
+class ScoreTable(BoxLayout):
+    """虚拟化成绩表：固定表头加RecycleView数据区，整体宽度为列宽之和"""
+
+    def __init__(self, columns: Sequence[Tuple[str, str]], widths: Sequence[float],
+                 row_height: float = None, header_height: float = None, **kwargs):
+        """初始化成绩表
+
+        Args:
+            columns: 每列的 (表头文本, 对齐方式)
+            widths: 每列宽度
+            row_height: 数据行高度
+            header_height: 表头高度
+        """
+        kwargs.setdefault('orientation', 'vertical')
+        kwargs.setdefault('spacing', 0)
+        super(ScoreTable, self).__init__(**kwargs)
+        self.columns = list(columns)
+        self.widths = tuple(widths)
+        self.row_height = row_height or responsive_size(44)
+        self.header_height = header_height or responsive_size(42)
+        self.size_hint_x = None
+        self.width = sum(self.widths)
+
+        self.header = TableRow(
+            columns=len(self.columns),
+            font_size=responsive_font_size(11),
+            bold=True,
+            size_hint=(None, None),
+            width=self.width,
+            height=self.header_height
+        )
+        self.header.set_background(HEADER_COLOR)
+        self.header.set_cells(self.widths, [
+            (text, align, get_theme_color('text'), True) for text, align in self.columns
+        ])
+
+        self.body = RecycleView(
+            size_hint=(None, 1),
+            width=self.width,
+            do_scroll_x=False,
+            do_scroll_y=True,
+            bar_width=responsive_size(8),
+            bar_color=get_theme_color('primary'),
+            bar_inactive_color=get_theme_color('text_secondary'),
+            scroll_type=['bars', 'content']
+        )
+        # 行控件按表格的列数创建（数据列数不同时set_cells也会自行调整）
+        self.body.viewclass = partial(TableRow, columns=len(self.columns))
+        self.layout_manager = RecycleBoxLayout(
+            orientation='vertical',
+            size_hint=(None, None),
+            width=self.width,
+            default_size=(self.width, self.row_height),
+            default_size_hint=(None, None)
+        )
+        self.layout_manager.bind(minimum_height=self.layout_manager.setter('height'))
+        self.body.add_widget(self.layout_manager)
+
+        self.add_widget(self.header)
+        self.add_widget(self.body)
+
+        self._builder: Optional[IncrementalBuilder] = None
+
+    def set_rows(self, rows: Sequence[Sequence[Cell]]):
+        """一次性设置表格数据，每行为各单元格的 (文本, 对齐方式, 颜色, 是否加粗)"""
+        self.cancel_binding()
+        self.body.data = [{'row_widths': self.widths, 'row_cells': cells} for cells in rows]
+        self.body.scroll_y = 1.0
+
+    def bind_rows(self, rows: Sequence[Sequence[Cell]], frame_budget: float = FRAME_BUDGET,
+                  on_complete: Optional[Callable[[], None]] = None):
+        """按帧分批绑定表格数据，首批（约一屏）在当前帧绑定"""
+        self.cancel_binding()
+        self.body.data = []
+        self.body.scroll_y = 1.0
+        self._builder = IncrementalBuilder(
+            self._bind_steps(rows), frame_budget=frame_budget,
+            total=(len(rows) + BIND_CHUNK_ROWS - 1) // BIND_CHUNK_ROWS,
+            on_complete=on_complete, name="score_table"
+        ).start()
+
+    def cancel_binding(self):
+        """取消未完成的分批绑定"""
+        if self._builder is not None:
+            self._builder.cancel()
+            self._builder = None
+
+    def _bind_steps(self, rows: Sequence[Sequence[Cell]]):
+        """每步向RecycleView追加一批行数据"""
+        for start in range(0, len(rows), BIND_CHUNK_ROWS):
+            self.body.data.extend(
+                {'row_widths': self.widths, 'row_cells': cells} for cells in rows[start:start + BIND_CHUNK_ROWS]
+            )
+            yield
+
+    def content_height(self, row_count: int) -> float:
+        """显示row_count行所需的总高度（含表头）"""
+        return self.header_height + row_count * self.row_height
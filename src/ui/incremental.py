@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量构建模块
+把一次性创建大量控件的工作拆成生成器中的多个步骤，通过Clock分摊到多帧执行：
+每帧在时间预算内尽量多地推进生成器，并报告进度，避免构建长列表时界面卡顿
+"""
+
+import time
+import logging
+from typing import Iterator, Optional, Callable, Any
+
+from kivy.clock import Clock
+
+logger = logging.getLogger(__name__)
+
+# 每帧用于构建的时间预算（秒），为60fps帧时间的一半
+FRAME_BUDGET = 0.008
+
+class IncrementalBuilder:
+    """增量构建器
+
+    steps 为生成器，每次 yield 之前完成一步控件创建（例如添加一行）。示例::
+
+        def steps():
+            for item in items:
+                layout.add_widget(create_row(item))
+                yield
+
+        self._builder = IncrementalBuilder(steps(), total=len(items)).start()
+    """
+
+    def __init__(self, steps: Iterator[Any], frame_budget: float = FRAME_BUDGET,
+                 total: Optional[int] = None,
+                 on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+                 on_complete: Optional[Callable[[], None]] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None,
+                 name: str = "incremental"):
+        """初始化增量构建器
+
+        Args:
+            steps: 构建步骤生成器
+            frame_budget: 每帧时间预算（秒）
+            total: 步骤总数（用于进度报告，可为None）
+            on_progress: 进度回调 (已完成步骤数, 步骤总数)，每帧调用一次
+            on_complete: 全部完成时的回调
+            on_error: 步骤抛出异常时的回调，之后停止构建
+            name: 名称（用于日志）
+        """
+        self._steps = iter(steps)
+        self.frame_budget = frame_budget
+        self.total = total
+        self.on_progress = on_progress
+        self.on_complete = on_complete
+        self.on_error = on_error
+        self.name = name
+
+        self.steps_done = 0
+        self.frames = 0
+        self.done = False
+        self.cancelled = False
+        self._event = None
+        self._start_time = 0.0
+
+    @property
+    def progress(self) -> Optional[float]:
+        """完成比例（0~1），总数未知时返回None"""
+        if self.done:
+            return 1.0
+        if not self.total:
+            return None
+        return min(1.0, self.steps_done / self.total)
+
+    def start(self, immediate: bool = True) -> "IncrementalBuilder":
+        """开始构建
+
+        Args:
+            immediate: 是否在当前帧立即执行第一批（首屏内容无需等待下一帧）
+        """
+        self._start_time = time.perf_counter()
+        if immediate and self._run_slice(0) is False:
+            return self
+        self._event = Clock.schedule_interval(self._run_slice, 0)
+        return self
+
+    def cancel(self):
+        """取消未完成的构建"""
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+        if not self.done:
+            self.cancelled = True
+            self.done = True
+
+    def _run_slice(self, dt) -> bool:
+        """在一帧的时间预算内推进生成器"""
+        if self.done:
+            return False
+
+        self.frames += 1
+        deadline = time.perf_counter() + self.frame_budget
+        try:
+            while True:
+                next(self._steps)
+                self.steps_done += 1
+                if time.perf_counter() >= deadline:
+                    break
+        except StopIteration:
+            self._finish()
+            if self.on_progress:
+                self.on_progress(self.steps_done, self.total)
+            if self.on_complete:
+                self.on_complete()
+            return False
+        except Exception as e:
+            logger.error(f"增量构建 {self.name} 出错: {e}")
+            self._finish()
+            if self.on_error:
+                self.on_error(e)
+            return False
+
+        if self.on_progress:
+            self.on_progress(self.steps_done, self.total)
+        return True
+
+    def _finish(self):
+        self.done = True
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+        logger.debug(f"增量构建 {self.name} 结束: {self.steps_done} 步，{self.frames} 帧，"
+                     f"用时 {(time.perf_counter() - self._start_time) * 1000:.1f}ms")
+
+def build_incrementally(steps: Iterator[Any], previous: Optional[IncrementalBuilder] = None,
+                        **kwargs) -> IncrementalBuilder:
+    """取消上一次未完成的构建并开始新的增量构建（便捷函数）"""
+    if previous is not None:
+        previous.cancel()
+    return IncrementalBuilder(steps, **kwargs).start()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+界面缓存模块
+按LRU保留有限数量的界面实例，并估算每个界面占用的内存；
+空闲帧中预先创建用户接下来可能打开的界面，使切换界面时不需要现场构建
+"""
+
+import time
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Iterable, List, Any
+
+from kivy.clock import Clock
+from kivy.uix.widget import Widget
+
+logger = logging.getLogger(__name__)
+
+# 每个控件的对象开销估算（字节，含属性存储和画布指令）
+WIDGET_OVERHEAD_BYTES = 2048
+
+# 预创建的调度间隔（秒）和判断为空闲帧的最长帧时间（秒）
+PREWARM_DELAY = 0.3
+IDLE_FRAME_TIME = 1 / 30
+
+def estimate_widget_memory(root: Widget) -> int:
+    """估算控件树占用的内存（字节）：控件对象开销加已生成纹理的RGBA像素"""
+    total = 0
+    for widget in root.walk(restrict=True):
+        total += WIDGET_OVERHEAD_BYTES
+        texture = getattr(widget, 'texture', None)
+        if texture is not None:
+            try:
+                width, height = texture.size
+                total += int(width) * int(height) * 4
+            except Exception:
+                pass
+    return total
+
+class ScreenCache:
+    """界面实例LRU缓存"""
+
+    def __init__(self, factories: Dict[str, Callable[[], Widget]], max_screens: int = 4,
+                 pinned: Iterable[str] = ('main',)):
+        """初始化界面缓存
+
+        Args:
+            factories: {界面名: 创建函数}
+            max_screens: 最多保留的界面数量（固定界面和当前界面不会被淘汰）
+            pinned: 常驻的界面
+        """
+        self.factories = factories
+        self.max_screens = max(1, max_screens)
+        self.pinned = set(pinned)
+        self.current: Optional[str] = None
+
+        self._screens: "OrderedDict[str, Widget]" = OrderedDict()
+        self._memory_estimates: Dict[str, int] = {}
+        self._stale_estimates = set()
+        self._prewarm_queue: List[str] = []
+        self._prewarm_event = None
+        self._trim_event = None
+        self.stats = {'hits': 0, 'builds': 0, 'prewarmed': 0, 'evictions': 0}
+
+    def get(self, name: str) -> Widget:
+        """获取界面实例（不存在时创建），并标记为当前界面"""
+        screen = self._screens.get(name)
+        if screen is not None:
+            self.stats['hits'] += 1
+            self._screens.move_to_end(name)
+        else:
+            screen = self._build(name)
+        if name in self._prewarm_queue:
+            self._prewarm_queue.remove(name)
+
+        if self.current is not None and self.current != name:
+            self._stale_estimates.add(self.current)
+        self.current = name
+        # 淘汰放到下一帧，不占用切换界面的这一帧
+        if self._trim_event is None:
+            self._trim_event = Clock.schedule_once(self._trim, 0)
+        return screen
+
+    def peek(self, name: str) -> Optional[Widget]:
+        """获取已创建的界面实例，不创建也不改变LRU顺序"""
+        return self._screens.get(name)
+
+    def prewarm(self, *names: str):
+        """在空闲帧中预先创建界面"""
+        for name in names:
+            if name in self.factories and name not in self._screens and name not in self._prewarm_queue:
+                self._prewarm_queue.append(name)
+        if self._prewarm_queue and self._prewarm_event is None:
+            self._prewarm_event = Clock.schedule_once(self._prewarm_step, PREWARM_DELAY)
+
+    def evict(self, name: str) -> bool:
+        """移除界面实例"""
+        screen = self._screens.pop(name, None)
+        if screen is None:
+            return False
+        estimate = self._memory_estimates.pop(name, 0)
+        if screen.parent is not None:
+            screen.parent.remove_widget(screen)
+        self.stats['evictions'] += 1
+        logger.debug(f"界面 {name} 已从缓存移除（约 {estimate / 1024:.0f}KB）")
+        return True
+
+    def clear(self):
+        """移除所有界面实例"""
+        for event in (self._prewarm_event, self._trim_event):
+            if event is not None:
+                event.cancel()
+        self._prewarm_event = self._trim_event = None
+        self._prewarm_queue.clear()
+        for name in list(self._screens):
+            self.evict(name)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计（包括每个界面的内存估算）"""
+        return dict(
+            self.stats,
+            screens=list(self._screens),
+            current=self.current,
+            memory_estimates=dict(self._memory_estimates),
+            memory_total=sum(self._memory_estimates.values())
+        )
+
+    def _build(self, name: str) -> Widget:
+        factory = self.factories.get(name)
+        if factory is None:
+            raise KeyError(f"未知的界面: {name}")
+        start_time = time.perf_counter()
+        screen = factory()
+        self._screens[name] = screen
+        self.stats['builds'] += 1
+        logger.debug(f"界面 {name} 已创建，用时 {(time.perf_counter() - start_time) * 1000:.1f}ms")
+        return screen
+
+    def _prewarm_step(self, dt):
+        """每个空闲帧最多预创建一个界面"""
+        self._prewarm_event = None
+        if not self._prewarm_queue:
+            return
+        if Clock.frametime > IDLE_FRAME_TIME:
+            # 当前帧较忙（动画、列表构建等），稍后再试
+            self._prewarm_event = Clock.schedule_once(self._prewarm_step, PREWARM_DELAY)
+            return
+
+        name = self._prewarm_queue.pop(0)
+        if name not in self._screens:
+            try:
+                self._build(name)
+                self.stats['prewarmed'] += 1
+                if self._trim_event is None:
+                    self._trim_event = Clock.schedule_once(self._trim, 0)
+            except Exception as e:
+                logger.error(f"预创建界面 {name} 失败: {e}")
+        if self._prewarm_queue:
+            self._prewarm_event = Clock.schedule_once(self._prewarm_step, PREWARM_DELAY)
+
+    def _trim(self, dt):
+        """更新内存估算并淘汰超出数量限制的界面"""
+        self._trim_event = None
+        # 只重新估算刚离开的界面和尚未估算的界面
+        for name, screen in self._screens.items():
+            if name in self._stale_estimates or name not in self._memory_estimates:
+                self._memory_estimates[name] = estimate_widget_memory(screen)
+        self._stale_estimates.clear()
+
+        evictable = [name for name in self._screens if name != self.current and name not in self.pinned]
+        while len(self._screens) > self.max_screens and evictable:
+            self.evict(evictable.pop(0))
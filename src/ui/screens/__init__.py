@@ -5,11 +5,16 @@ UI屏幕模块
 包含应用的各个界面屏幕
 """
 
-from .main_screen import MainScreen
-from .login_screen import LoginScreen
-from .query_screen import QueryScoresScreen
-from .account_screen import SwitchAccountScreen
-from .network_screen import NetworkScreen
-from .config_screen import ConfigScreen
+from ...utils.lazy import lazy_exports
+
+# 各界面模块在首次访问时才导入，启动时只加载主界面
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'MainScreen': '.main_screen',
+    'LoginScreen': '.login_screen',
+    'QueryScoresScreen': '.query_screen',
+    'SwitchAccountScreen': '.account_screen',
+    'NetworkScreen': '.network_screen',
+    'ConfigScreen': '.config_screen',
+})
 
 __all__ = ['MainScreen', 'LoginScreen', 'QueryScoresScreen', 'SwitchAccountScreen', 'NetworkScreen', 'ConfigScreen']
@@ -13,6 +13,7 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.label import Label
 from kivy.uix.widget import Widget
+from kivy.uix.textinput import TextInput
 from kivy.graphics import Color, Rectangle
 from kivy.clock import Clock
 
@@ -24,10 +25,18 @@ from ..components import (
     PrimaryButton, SecondaryButton, ErrorButton,
     show_popup, show_confirmation_dialog
 )
+from ..incremental import build_incrementally
 from ...core.session import get_session_manager
+from ...core.account_status import get_account_status_service
 
 logger = logging.getLogger(__name__)
 
+# 账号列表每页数量
+ACCOUNT_PAGE_SIZE = 20
+
+# 搜索输入防抖时间（秒）
+SEARCH_DEBOUNCE = 0.3
+
 class ModernCard(BoxLayout):
     """现代化卡片容器"""
     
@@ -119,6 +128,12 @@ class SwitchAccountScreen(BoxLayout):
         
         # 初始化会话管理器
         self.session_manager = get_session_manager()
+
+        # 分页状态
+        self._next_cursor = None
+        self._search_prefix = ''
+        self._search_event = None
+        self._page_builder = None
         
         # 设置背景色
         with self.canvas.before:
@@ -230,6 +245,33 @@ class SwitchAccountScreen(BoxLayout):
             bold=True,
             font_size=responsive_font_size(16)
         )
+
+        # 学号前缀搜索
+        search_row = BoxLayout(
+            orientation='horizontal',
+            size_hint=(1, None),
+            height=responsive_size(40),
+            spacing=responsive_spacing(8)
+        )
+        self.search_input = TextInput(
+            hint_text='按学号搜索',
+            multiline=False,
+            input_filter='int',
+            size_hint=(1, 1),
+            font_size=responsive_font_size(14),
+            padding=[responsive_spacing(10), responsive_spacing(10)]
+        )
+        self.search_input.bind(text=self._on_search_text)
+        self.count_label = StyledLabel(
+            text='',
+            size_hint=(None, 1),
+            width=responsive_size(80),
+            color=get_theme_color('text_secondary'),
+            font_size=responsive_font_size(12),
+            halign='right'
+        )
+        search_row.add_widget(self.search_input)
+        search_row.add_widget(self.count_label)
         
         # 账号列表滚动区域
         accounts_scroll = ScrollView(
@@ -246,9 +288,20 @@ class SwitchAccountScreen(BoxLayout):
         self.accounts_layout.bind(minimum_height=self.accounts_layout.setter('height'))
         
         accounts_scroll.add_widget(self.accounts_layout)
+
+        # 加载下一页
+        self.load_more_button = SecondaryButton(
+            text='加载更多',
+            size_hint=(1, None),
+            height=responsive_size(36),
+            disabled=True
+        )
+        self.load_more_button.bind(on_release=self.load_more_accounts)
         
         accounts_card.add_widget(title_label)
+        accounts_card.add_widget(search_row)
         accounts_card.add_widget(accounts_scroll)
+        accounts_card.add_widget(self.load_more_button)
         
         parent_layout.add_widget(accounts_card)
     
@@ -283,18 +336,29 @@ class SwitchAccountScreen(BoxLayout):
         parent_layout.add_widget(status_card)
     
     def refresh_accounts(self, instance=None):
-        """刷新账号列表"""
+        """刷新账号列表（只加载第一页）"""
+        if self._page_builder is not None:
+            self._page_builder.cancel()
         self.accounts_layout.clear_widgets()
-        accounts = self.session_manager.list_accounts()
-        
-        if not accounts:
+        self._next_cursor = None
+        prefix = self._search_prefix or None
+
+        try:
+            total = self.session_manager.count_accounts(prefix)
+        except Exception as e:
+            logger.error(f"统计账号数量失败: {e}")
+            total = 0
+        self.count_label.text = f'共 {total} 个' if total else ''
+
+        if not total:
             no_accounts_label = StyledLabel(
-                text='没有保存的账号',
+                text='没有匹配的账号' if prefix else '没有保存的账号',
                 size_hint=(1, None),
                 height=responsive_size(40),
                 halign='center'
             )
             self.accounts_layout.add_widget(no_accounts_label)
+            self.load_more_button.disabled = True
             return
         
         # 添加表头
@@ -321,54 +385,99 @@ class SwitchAccountScreen(BoxLayout):
         header.add_widget(Widget(size_hint=(0.2, 1)))  # 操作按钮占位
         
         self.accounts_layout.add_widget(header)
-        
-        # 添加账号行
-        for student_id, account_info in accounts.items():
-            last_login = account_info.get('last_login', '未知')
-            
-            account_layout = BackgroundBox(
-                size_hint=(1, None),
-                height=responsive_size(50),
-                background_color=get_theme_color('secondary')
-            )
-            
-            account_layout.add_widget(StyledLabel(
-                text=f"{student_id}",
-                size_hint=(0.5, 1),
-                halign='center'
-            ))
-            account_layout.add_widget(StyledLabel(
-                text=f"{last_login}",
-                size_hint=(0.3, 1),
-                halign='center'
-            ))
-            
-            buttons_box = BoxLayout(
-                size_hint=(0.2, 1),
-                spacing=responsive_spacing(5)
-            )
-            
-            switch_button = PrimaryButton(
-                text='切换',
-                size_hint=(0.5, 0.8),
-                pos_hint={'center_y': 0.5},
-                font_size=responsive_font_size(10)
-            )
-            switch_button.bind(on_release=partial(self.switch_account, student_id))
-            
-            delete_button = ErrorButton(
-                text='删除',
-                size_hint=(0.5, 0.8),
-                pos_hint={'center_y': 0.5},
-                font_size=responsive_font_size(10)
+        self._load_page()
+
+    def load_more_accounts(self, instance=None):
+        """加载下一页账号"""
+        if self._next_cursor and (self._page_builder is None or self._page_builder.done):
+            self._load_page(self._next_cursor)
+
+    def _load_page(self, cursor=None):
+        """查询一页账号并追加到列表"""
+        try:
+            accounts, self._next_cursor = self.session_manager.list_accounts_page(
+                cursor, ACCOUNT_PAGE_SIZE, self._search_prefix or None
             )
-            delete_button.bind(on_release=partial(self.delete_account, student_id))
-            
-            buttons_box.add_widget(switch_button)
-            buttons_box.add_widget(delete_button)
-            account_layout.add_widget(buttons_box)
-            
-            self.accounts_layout.add_widget(account_layout)
+        except Exception as e:
+            logger.error(f"加载账号列表失败: {e}")
+            accounts, self._next_cursor = [], None
+            self._update_status('加载账号列表失败', 'error')
+
+        def build_rows():
+            for account in accounts:
+                self.accounts_layout.add_widget(
+                    self._create_account_row(account['student_id'], account.get('last_login') or '未知')
+                )
+                yield
+
+        # 行控件分帧创建，全部创建完成后才允许加载下一页
+        self.load_more_button.disabled = True
+        self._page_builder = build_incrementally(
+            build_rows(), previous=self._page_builder, total=len(accounts),
+            on_complete=self._on_page_built, name="account_page"
+        )
+
+    def _on_page_built(self):
+        self.load_more_button.disabled = self._next_cursor is None
+
+    def _create_account_row(self, student_id: str, last_login: str) -> BoxLayout:
+        """创建一行账号"""
+        account_layout = BackgroundBox(
+            size_hint=(1, None),
+            height=responsive_size(50),
+            background_color=get_theme_color('secondary')
+        )
+        
+        account_layout.add_widget(StyledLabel(
+            text=f"{student_id}",
+            size_hint=(0.5, 1),
+            halign='center'
+        ))
+        account_layout.add_widget(StyledLabel(
+            text=f"{last_login}",
+            size_hint=(0.3, 1),
+            halign='center'
+        ))
+        
+        buttons_box = BoxLayout(
+            size_hint=(0.2, 1),
+            spacing=responsive_spacing(5)
+        )
+        
+        switch_button = PrimaryButton(
+            text='切换',
+            size_hint=(0.5, 0.8),
+            pos_hint={'center_y': 0.5},
+            font_size=responsive_font_size(10)
+        )
+        switch_button.bind(on_release=partial(self.switch_account, student_id))
+        
+        delete_button = ErrorButton(
+            text='删除',
+            size_hint=(0.5, 0.8),
+            pos_hint={'center_y': 0.5},
+            font_size=responsive_font_size(10)
+        )
+        delete_button.bind(on_release=partial(self.delete_account, student_id))
+        
+        buttons_box.add_widget(switch_button)
+        buttons_box.add_widget(delete_button)
+        account_layout.add_widget(buttons_box)
+        return account_layout
+
+    def _on_search_text(self, instance, value):
+        """搜索框输入变化，防抖后刷新列表"""
+        if self._search_event is not None:
+            self._search_event.cancel()
+        self._search_event = Clock.schedule_once(partial(self._apply_search, value.strip()), SEARCH_DEBOUNCE)
+
+    def _apply_search(self, prefix: str, dt):
+        """按学号前缀重新加载"""
+        self._search_event = None
+        if prefix == self._search_prefix:
+            return
+        self._search_prefix = prefix
+        self.refresh_accounts()
 
     def switch_account(self, student_id, instance):
         """切换到指定账号"""
@@ -381,6 +490,7 @@ class SwitchAccountScreen(BoxLayout):
         """后台切换账号线程"""
         try:
             if self.session_manager.load_session(student_id):
+                get_account_status_service().invalidate(student_id)
                 # 验证会话有效性
                 if self.session_manager.verify_session(student_id):
                     Clock.schedule_once(lambda dt: self.switch_success(student_id), 0)
@@ -22,6 +22,7 @@ from ..components import (
     PrimaryButton, SecondaryButton, AccentButton,
     ModernCard, show_popup, show_confirmation_dialog
 )
+from ..incremental import build_incrementally
 from ...core.config import (
     get_config_file_info, delete_config_file, backup_config,
     reset_config, get_config_file_path
@@ -44,6 +45,7 @@ class ConfigInfoCard(ModernCard):
         self.spacing = responsive_spacing(12)
         self.size_hint = (1, None)
         self.height = responsive_size(200)
+        self._info_builder = None
         
         self._create_content()
         self._update_info()
@@ -89,51 +91,67 @@ class ConfigInfoCard(ModernCard):
                 ("修改时间", info.get("modified_time", "未知"))
             ]
             
-            for label_text, value_text in info_items:
-                item_layout = BoxLayout(
-                    orientation='horizontal',
-                    size_hint=(1, None),
-                    height=responsive_size(25)
-                )
-                
-                # 标签
-                label = Label(
-                    text=f"{label_text}:",
-                    font_size=responsive_font_size(12),
-                    color=get_theme_color('text_secondary'),
-                    size_hint=(0.3, 1),
-                    halign='left',
-                    valign='middle'
-                )
-                label.bind(size=label.setter('text_size'))
-                item_layout.add_widget(label)
-                
-                # 值
-                value = Label(
-                    text=str(value_text),
-                    font_size=responsive_font_size(12),
-                    color=get_theme_color('text'),
-                    size_hint=(0.7, 1),
-                    halign='left',
-                    valign='middle'
-                )
-                value.bind(size=value.setter('text_size'))
-                item_layout.add_widget(value)
-                
-                self.info_layout.add_widget(item_layout)
+            self._info_builder = build_incrementally(
+                self._build_info_items(info_items),
+                previous=self._info_builder,
+                total=len(info_items),
+                on_error=self._show_info_error,
+                name="config_info"
+            )
             
         except Exception as e:
             logger.error(f"更新配置信息失败: {e}")
-            error_label = Label(
-                text=f"获取配置信息失败: {str(e)}",
+            self._show_info_error(e)
+
+    def _build_info_items(self, info_items):
+        """信息行的构建步骤，每步创建一行"""
+        for label_text, value_text in info_items:
+            item_layout = BoxLayout(
+                orientation='horizontal',
+                size_hint=(1, None),
+                height=responsive_size(25)
+            )
+            
+            # 标签
+            label = Label(
+                text=f"{label_text}:",
+                font_size=responsive_font_size(12),
+                color=get_theme_color('text_secondary'),
+                size_hint=(0.3, 1),
+                halign='left',
+                valign='middle'
+            )
+            label.bind(size=label.setter('text_size'))
+            item_layout.add_widget(label)
+            
+            # 值
+            value = Label(
+                text=str(value_text),
                 font_size=responsive_font_size(12),
-                color=get_theme_color('error'),
-                size_hint=(1, 1),
-                halign='center',
+                color=get_theme_color('text'),
+                size_hint=(0.7, 1),
+                halign='left',
                 valign='middle'
             )
-            error_label.bind(size=error_label.setter('text_size'))
-            self.info_layout.add_widget(error_label)
+            value.bind(size=value.setter('text_size'))
+            item_layout.add_widget(value)
+            
+            self.info_layout.add_widget(item_layout)
+            yield
+
+    def _show_info_error(self, error: Exception):
+        """显示获取配置信息失败"""
+        self.info_layout.clear_widgets()
+        error_label = Label(
+            text=f"获取配置信息失败: {str(error)}",
+            font_size=responsive_font_size(12),
+            color=get_theme_color('error'),
+            size_hint=(1, 1),
+            halign='center',
+            valign='middle'
+        )
+        error_label.bind(size=error_label.setter('text_size'))
+        self.info_layout.add_widget(error_label)
     
     def refresh_info(self):
         """刷新配置信息"""
@@ -8,13 +8,14 @@
 import os
 import logging
 import threading
-import hashlib
 from typing import Optional
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.textinput import TextInput
 from kivy.uix.label import Label
 from kivy.uix.widget import Widget
+from io import BytesIO
 from kivy.uix.image import Image
+from kivy.core.image import Image as CoreImage
 from kivy.graphics import Color, Rectangle, Ellipse
 from kivy.clock import Clock
 
@@ -28,10 +29,12 @@ from ..components import (
 )
 from ...utils.font_manager import get_button_text
 from ...core.session import get_session_manager
+from ...core.account_status import get_account_status_service
 from ...core.auto_login import get_auto_login_manager
-from ...core.auth import CaptchaHandler, LoginManager
+from ...core.auth import CaptchaHandler, LoginManager, hash_password, build_login_form
 from ...core.api import make_request
 from ...core.config import get_config
+from ...utils.tracing import span, wrap_context
 
 logger = logging.getLogger(__name__)
 
@@ -240,15 +243,13 @@ class CaptchaWidget(BoxLayout):
         try:
             logger.info("开始加载验证码...")
 
-            # 强制刷新验证码
-            captcha_path = self.captcha_handler.get_captcha(refresh=True)
+            # 强制刷新验证码（内存中的JPEG字节）
+            captcha_data = self.captcha_handler.get_captcha(refresh=True)
 
-            if captcha_path and os.path.exists(captcha_path):
-                logger.info(f"验证码文件路径: {captcha_path}")
-
-                # 使用Clock.schedule_once确保在主线程中更新UI
+            if captcha_data:
+                # 使用Clock.schedule_once确保在主线程中创建纹理并更新UI
                 from kivy.clock import Clock
-                Clock.schedule_once(lambda dt: self._update_captcha_ui(captcha_path), 0)
+                Clock.schedule_once(lambda dt: self._update_captcha_ui(captcha_data), 0)
 
             else:
                 logger.error("验证码加载失败")
@@ -267,7 +268,7 @@ class CaptchaWidget(BoxLayout):
                 0
             )
 
-    def _update_captcha_ui(self, captcha_path):
+    def _update_captcha_ui(self, captcha_data: bytes):
         """在主线程中更新验证码UI"""
         try:
             # 获取图片容器
@@ -278,19 +279,16 @@ class CaptchaWidget(BoxLayout):
             if self.captcha_hint.parent:
                 image_wrapper.remove_widget(self.captcha_hint)
 
-            # 转换路径格式，确保Kivy能正确加载
-            import os
-            normalized_path = os.path.abspath(captcha_path).replace('\\', '/')
-
-            # 设置图片源和大小
-            self.captcha_image.source = normalized_path
+            # 直接从内存数据创建纹理，不经过文件系统
+            texture = CoreImage(BytesIO(captcha_data), ext='jpg').texture
+            self.captcha_image.texture = texture
             self.captcha_image.size = (responsive_size(120), responsive_size(40))
 
             # 如果图片还没有添加到容器中，则添加它
             if not self.captcha_image.parent:
                 image_wrapper.add_widget(self.captcha_image)
 
-            logger.info(f"验证码UI更新成功，路径: {normalized_path}")
+            logger.debug(f"验证码UI更新成功，纹理大小: {texture.size}")
         except Exception as e:
             logger.error(f"更新验证码UI时出错: {e}")
             show_popup("错误", f"验证码显示失败: {str(e)}", "error")
@@ -329,7 +327,7 @@ class CaptchaWidget(BoxLayout):
         """清理验证码"""
         try:
             self.captcha_input.text = ""
-            self.captcha_image.source = ""
+            self.captcha_image.texture = None
 
             # 获取图片容器
             captcha_container = self.children[1]  # 验证码图片容器
@@ -361,6 +359,10 @@ class LoginScreen(BoxLayout):
         self.login_manager = None
         self.keep_login_enabled = False
         
+        # 预热状态：预热进行中时提交登录会先等待其完成
+        self._warmup_done = threading.Event()
+        self._warmup_done.set()
+        
         # 设置背景色
         with self.canvas.before:
             Color(*get_theme_color('background'))
@@ -503,7 +505,7 @@ class LoginScreen(BoxLayout):
 
         # 保持登录选项
         self.keep_login_checkbox = ModernCheckbox(
-            text='保持登录状态（基于Token自动重新登录）',
+            text='保持登录（在本机加密保存密码摘要，用于自动重新登录）',
             checked=False,
             size_hint=(1, None),
             height=responsive_size(50)
@@ -554,6 +556,35 @@ class LoginScreen(BoxLayout):
         else:
             self._update_status('已禁用自动保持登录', 'info')
 
+    def _get_login_manager(self) -> LoginManager:
+        """获取登录管理器（与验证码组件共用同一个验证码处理器）"""
+        if self.login_manager is None:
+            self.login_manager = LoginManager(
+                captcha_handler=self.captcha_widget.captcha_handler,
+                session_manager=self.session_manager
+            )
+        return self.login_manager
+
+    def warmup(self):
+        """界面打开时在后台预取登录页tokenValue和验证码"""
+        if not self._warmup_done.is_set():
+            return
+
+        self._warmup_done.clear()
+        login_manager = self._get_login_manager()
+
+        def warmup_thread():
+            try:
+                captcha_data = login_manager.warmup()
+                if captcha_data:
+                    Clock.schedule_once(lambda dt: self.captcha_widget._update_captcha_ui(captcha_data), 0)
+            except Exception as e:
+                logger.error(f"登录预热失败: {e}")
+            finally:
+                self._warmup_done.set()
+
+        threading.Thread(target=wrap_context(warmup_thread), daemon=True).start()
+
     def login(self, instance):
         """执行登录操作"""
         student_id = self.student_id_input.text.strip()
@@ -566,36 +597,34 @@ class LoginScreen(BoxLayout):
 
         self._update_status('登录中...', 'info')
 
-        # 在后台线程中执行登录操作
+        # 在后台线程中执行登录操作（传递追踪上下文）
         threading.Thread(
-            target=self._login_thread,
+            target=wrap_context(self._login_thread),
             args=(student_id, password, captcha_code)
         ).start()
 
     def _login_thread(self, student_id, password, captcha_code):
         """后台登录线程"""
+        with span("login", account=student_id, source="gui") as login_span:
+            self._do_login(student_id, password, captcha_code, login_span)
+
+    def _do_login(self, student_id, password, captcha_code, login_span):
+        """执行登录请求并根据结果更新界面"""
         try:
-            # 创建登录管理器
-            self.login_manager = LoginManager(
-                captcha_handler=self.captcha_widget.captcha_handler,
-                session_manager=self.session_manager
-            )
+            # 等待进行中的预热完成，避免与预热请求交错
+            self._warmup_done.wait(timeout=20)
+            login_manager = self._get_login_manager()
 
-            # 初始化会话
-            if not self.login_manager.init_session():
+            # 初始化会话（预热已取得未使用的tokenValue时跳过）
+            if not login_manager.has_fresh_token() and not login_manager.init_session():
                 Clock.schedule_once(lambda dt: self._update_status('初始化会话失败', 'error'), 0)
                 return
 
             # MD5加密密码
-            md5_password = hashlib.md5(password.encode('utf-8')).hexdigest()
+            md5_password = hash_password(password)
 
             # 构造表单数据
-            form_data = {
-                "j_username": student_id,
-                "j_password": md5_password,
-                "j_captcha": captcha_code,
-                "tokenValue": self.login_manager.token_value
-            }
+            form_data = build_login_form(student_id, md5_password, captcha_code, login_manager.token_value)
 
             # 发送登录请求
             login_headers = {
@@ -603,25 +632,38 @@ class LoginScreen(BoxLayout):
                 "Content-Type": "application/x-www-form-urlencoded"
             }
 
-            response = make_request(
-                get_config("LOGIN_POST_URL"),
-                method="POST",
-                data=form_data,
-                headers=login_headers,
-                allow_redirects=False,
-                timeout=15
-            )
+            with span("login.post", account=student_id):
+                response = make_request(
+                    get_config("LOGIN_POST_URL"),
+                    method="POST",
+                    data=form_data,
+                    headers=login_headers,
+                    allow_redirects=False,
+                    timeout=15
+                )
+            login_manager.consume_token()
 
             # 检测登录结果
-            login_result = self.login_manager._check_login_response(response)
+            login_result = login_manager._check_login_response(response)
+            login_span.set_attribute("result", login_result)
 
             if login_result == "success":
                 # 保存会话
                 self.session_manager.save_session(student_id)
-                Clock.schedule_once(lambda dt: self.login_success(), 0)
+                get_account_status_service().invalidate(student_id)
+                # 保持登录时保存密码摘要，会话过期后用于无人值守重新登录
+                if self.keep_login_enabled:
+                    self.session_manager.save_credentials(student_id, md5_password)
+                # 后续的验证请求挂在同一条链路下
+                Clock.schedule_once(wrap_context(lambda dt: self.login_success()), 0)
             elif login_result == "captcha_error":
                 Clock.schedule_once(lambda dt: self._update_status('验证码错误，请重试', 'error'), 0)
-                Clock.schedule_once(lambda dt: self.captcha_widget.refresh_captcha(), 0.5)
+                # 在当前线程立即并行换取新的tokenValue和验证码，下一次提交无需再初始化
+                captcha_data = login_manager.refresh_after_captcha_error(student_id)
+                if captcha_data:
+                    Clock.schedule_once(lambda dt: self._swap_captcha(captcha_data), 0)
+                else:
+                    Clock.schedule_once(lambda dt: self.captcha_widget.refresh_captcha(), 0)
             elif login_result == "credential_error":
                 Clock.schedule_once(lambda dt: self._update_status('用户名或密码错误', 'error'), 0)
             else:
@@ -631,6 +673,11 @@ class LoginScreen(BoxLayout):
             logger.error(f"登录过程中出错: {e}")
             Clock.schedule_once(lambda dt: self._update_status('登录过程中出错，请重试', 'error'), 0)
 
+    def _swap_captcha(self, captcha_data: bytes):
+        """换上新的验证码并清空输入框"""
+        self.captcha_widget.captcha_input.text = ""
+        self.captcha_widget._update_captcha_ui(captcha_data)
+
     def login_success(self):
         """登录成功后的操作"""
         self._update_status('登录成功', 'success')
@@ -641,10 +688,10 @@ class LoginScreen(BoxLayout):
             student_id = self.student_id_input.text.strip()
             if student_id:
                 # 延迟0.5秒启用自动登录，确保会话保存完成
-                Clock.schedule_once(lambda dt: self._enable_auto_login(student_id), 0.5)
+                Clock.schedule_once(wrap_context(lambda dt: self._enable_auto_login(student_id)), 0.5)
 
         # 跳转到主界面
-        Clock.schedule_once(lambda dt: self.app.show_main_screen(), 1)
+        Clock.schedule_once(wrap_context(lambda dt: self.app.show_main_screen()), 1)
 
     def _enable_auto_login(self, student_id: str):
         """启用自动登录功能"""
@@ -24,9 +24,12 @@ from ..components import (
 )
 from ...utils.font_manager import get_button_text
 from ...core.session import get_session_manager
-from ...core.api import make_request, extract_student_name
-from ...core.config import get_config, get_network_status
+from ...core.account_status import (
+    get_account_status_service, AccountStatus, STATE_VALID, STATE_EXPIRED
+)
+from ...core.config import get_network_status
 from ...core.auto_login import get_auto_login_manager
+from ...utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -109,6 +112,8 @@ class MainScreen(BoxLayout):
         self.app = app
         self.session_manager = get_session_manager()
         self.auto_login_manager = get_auto_login_manager()
+        self.status_service = get_account_status_service()
+        self.status_service.subscribe(self._on_account_status)
 
         self.orientation = 'vertical'
         self.spacing = 0
@@ -381,6 +386,7 @@ class MainScreen(BoxLayout):
 
         parent_layout.add_widget(status_card)
 
+    @traced("main.update_account_info")
     def update_account_info(self):
         """更新当前账号信息"""
         # 更新网络状态
@@ -391,20 +397,9 @@ class MainScreen(BoxLayout):
 
         current_account = self.session_manager.get_current_account()
         if current_account:
-            # 尝试获取学生姓名
+            # 先显示缓存的状态，过期时在后台重新检查，结果通过 _on_account_status 更新
             try:
-                resp = make_request(get_config("SCORES_URL"), timeout=10)
-                if resp and resp.status_code == 200 and "login" not in resp.url:
-                    student_name = extract_student_name(resp.text)
-                    if student_name:
-                        self.account_info.text = f"当前登录: {student_name}({current_account})"
-                        self.account_info.color = get_theme_color('success')
-                    else:
-                        self.account_info.text = f"当前登录: {current_account}"
-                        self.account_info.color = get_theme_color('primary')
-                else:
-                    self.account_info.text = f"当前账号: {current_account} (会话可能已过期)"
-                    self.account_info.color = get_theme_color('error')
+                self._show_account_status(self.status_service.refresh(current_account))
             except Exception as e:
                 logger.error(f"更新账号信息失败: {e}")
                 self.account_info.text = f"当前账号: {current_account} (状态未知)"
@@ -413,6 +408,35 @@ class MainScreen(BoxLayout):
             self.account_info.text = "当前未登录"
             self.account_info.color = get_theme_color('text')
 
+    def _on_account_status(self, status: AccountStatus):
+        """账号状态后台检查完成（主线程）"""
+        if status.student_id == self.session_manager.get_current_account():
+            self._show_account_status(status)
+            # 自动登录状态中的会话状态也来自同一缓存
+            self._update_auto_login_status()
+
+    def _show_account_status(self, status: AccountStatus):
+        """显示账号状态"""
+        account = status.student_id
+        if status.state == STATE_VALID:
+            if status.name:
+                self.account_info.text = f"当前登录: {status.name}({account})"
+                self.account_info.color = get_theme_color('success')
+            else:
+                self.account_info.text = f"当前登录: {account}"
+                self.account_info.color = get_theme_color('primary')
+        elif status.refreshing:
+            # 正在检查时不显示上次的过期结果（重新登录后会话可能已经恢复）
+            label = f"{status.name}({account})" if status.name else account
+            self.account_info.text = f"当前账号: {label} (正在检查...)"
+            self.account_info.color = get_theme_color('text_secondary')
+        elif status.state == STATE_EXPIRED:
+            self.account_info.text = f"当前账号: {account} (会话可能已过期)"
+            self.account_info.color = get_theme_color('error')
+        else:
+            self.account_info.text = f"当前账号: {account} (状态未知)"
+            self.account_info.color = get_theme_color('warning')
+
     def _update_network_status(self):
         """更新网络状态显示"""
         try:
@@ -455,6 +479,10 @@ class MainScreen(BoxLayout):
                     self.toggle_auto_login_btn.text = "禁用自动登录"
                 else:
                     self.toggle_auto_login_btn.text = "启用自动登录"
+                # 没有验证码模型时不能启用（已启用的仍可禁用）
+                self.toggle_auto_login_btn.disabled = (
+                    not status.get('enabled', False) and not status.get('captcha_model', True)
+                )
 
         except Exception as e:
             logger.error(f"更新自动登录状态失败: {e}")
@@ -472,7 +500,8 @@ class MainScreen(BoxLayout):
         """自动登录成功回调"""
         try:
             show_popup("自动登录", "自动登录成功", "success")
-            # 更新账号信息
+            # 会话已更新，重新检查账号信息
+            self.status_service.invalidate(self.session_manager.get_current_account())
             self.update_account_info()
             logger.info("自动登录成功")
         except Exception as e:
@@ -551,6 +580,10 @@ class MainScreen(BoxLayout):
                     show_popup("错误", "禁用自动登录失败", "error")
             else:
                 # 启用自动登录
+                if not self.auto_login_manager.has_captcha_model():
+                    show_popup("提示", "自动登录需要验证码识别模型，请先用教务系统的验证码训练模型", "warning")
+                    return
+
                 if not self.session_manager.is_session_valid():
                     show_popup("提示", "当前会话无效，请重新登录后再启用自动登录", "warning")
                     return
@@ -581,7 +614,14 @@ class MainScreen(BoxLayout):
             status_info = []
             status_info.append(f"启用状态: {'是' if status.get('enabled') else '否'}")
             status_info.append(f"当前账号: {status.get('current_account', '无')}")
-            status_info.append(f"会话状态: {'有效' if status.get('session_valid') else '无效'}")
+            if status.get('session_valid'):
+                session_text = '有效'
+            elif status.get('session_state') == STATE_EXPIRED:
+                session_text = '无效'
+            else:
+                session_text = '未知'
+            status_info.append(f"会话状态: {session_text}")
+            status_info.append(f"验证码模型: {'已安装' if status.get('captcha_model') else '未找到'}")
             status_info.append(f"监控状态: {'运行中' if status.get('is_checking') else '未运行'}")
 
             last_check = status.get('last_check_time', 0)
@@ -24,6 +24,7 @@ from ..components import (
     PrimaryButton, SecondaryButton, AccentButton,
     ModernCard, show_popup, show_confirmation_dialog
 )
+from ..incremental import build_incrementally
 
 class NetworkTextInput(TextInput):
     """网络设置专用文本输入框"""
@@ -528,6 +529,8 @@ class NetworkScreen(BoxLayout):
         self.orientation = 'vertical'
         self.padding = responsive_spacing(16)
         self.spacing = responsive_spacing(12)
+        self.network_cards = {}
+        self._list_builder = None
 
         self._create_ui()
         self._refresh_network_list()
@@ -626,43 +629,53 @@ class NetworkScreen(BoxLayout):
             current_network = network_status["current_network"]
             available_networks = network_status["available_networks"]
             
-            # 创建网络卡片
+            # 分帧创建网络卡片
             self.network_cards = {}  # 保存卡片引用
-            for network_name in available_networks:
-                # 获取网络配置信息
-                network_configs = get_config("NETWORK_CONFIGS", {})
-                if network_name in network_configs:
-                    # 使用新的配置格式
-                    network_config = network_configs[network_name]
-                    url = network_config["base_url"]
-                    description = network_config.get("description", f"{network_name}网络环境")
-                else:
-                    # 兼容旧的配置格式
-                    network_urls = get_config("NETWORK_URLS", {})
-                    url = network_urls.get(network_name, "")
-                    description = f"{network_name}网络环境"
-
-                is_current = (network_name == current_network)
-
-                card = NetworkCard(
-                    network_name=network_name,
-                    url=url,
-                    description=description,
-                    is_current=is_current,
-                    on_select=self._on_network_select,
-                    on_edit=self._on_network_config,
-                    on_delete=self._on_network_delete,
-                    on_test=self._on_network_test,
-                    on_quick_edit=self._on_network_quick_edit
-                )
-                self.network_cards[network_name] = card
-                self.network_container.add_widget(card)
-            
-            logger.info(f"网络列表已刷新，当前网络: {current_network}")
+            self._list_builder = build_incrementally(
+                self._build_network_cards(available_networks, current_network),
+                previous=self._list_builder,
+                total=len(available_networks),
+                on_complete=lambda: logger.info(f"网络列表已刷新，当前网络: {current_network}"),
+                on_error=lambda e: show_popup("错误", f"刷新网络列表失败: {str(e)}", "error"),
+                name="network_list"
+            )
             
         except Exception as e:
             logger.error(f"刷新网络列表失败: {e}")
             show_popup("错误", f"刷新网络列表失败: {str(e)}", "error")
+
+    def _build_network_cards(self, available_networks, current_network):
+        """网络卡片的构建步骤，每步创建一张卡片"""
+        network_configs = get_config("NETWORK_CONFIGS", {})
+        for network_name in available_networks:
+            # 获取网络配置信息
+            if network_name in network_configs:
+                # 使用新的配置格式
+                network_config = network_configs[network_name]
+                url = network_config["base_url"]
+                description = network_config.get("description", f"{network_name}网络环境")
+            else:
+                # 兼容旧的配置格式
+                network_urls = get_config("NETWORK_URLS", {})
+                url = network_urls.get(network_name, "")
+                description = f"{network_name}网络环境"
+
+            is_current = (network_name == current_network)
+
+            card = NetworkCard(
+                network_name=network_name,
+                url=url,
+                description=description,
+                is_current=is_current,
+                on_select=self._on_network_select,
+                on_edit=self._on_network_config,
+                on_delete=self._on_network_delete,
+                on_test=self._on_network_test,
+                on_quick_edit=self._on_network_quick_edit
+            )
+            self.network_cards[network_name] = card
+            self.network_container.add_widget(card)
+            yield
     
     def _on_network_select(self, network_name: str):
         """选择网络"""
@@ -20,10 +20,12 @@ from ..themes import (
     responsive_font_size, get_grade_color_and_style
 )
 from ..components import (
-    PrimaryButton, SecondaryButton, show_popup, show_loading_dialog
+    PrimaryButton, SecondaryButton, ScoreTable, ScoreRenderModel, show_popup, show_loading_dialog
 )
+from ..text_metrics import get_text_metrics
 from ...core.api import query_scores, get_scores_data
 from ...core.session import get_session_manager
+from ...utils.profiler import profiled
 
 logger = logging.getLogger(__name__)
 
@@ -290,17 +292,19 @@ class QueryScoresScreen(BoxLayout):
         # 显示加载对话框
         self.loading_dialog = show_loading_dialog("查询中", "正在查询成绩，请稍候...")
         
-        # 在后台线程中执行查询
-        threading.Thread(target=self._query_thread).start()
+        # 在后台线程中执行查询（窗口宽度在主线程读取）
+        card_width = self._get_card_content_width()
+        threading.Thread(target=self._query_thread, args=(card_width,)).start()
     
-    def _query_thread(self):
-        """后台查询线程"""
+    def _query_thread(self, card_width: float):
+        """后台查询线程：获取成绩并预先计算渲染模型"""
         try:
             # 获取成绩数据
             success, scores_data, student_name = get_scores_data(debug_mode=False)
 
             if success:
-                Clock.schedule_once(lambda dt: self._query_success(scores_data, student_name), 0)
+                model = self._build_render_model(scores_data, student_name, card_width)
+                Clock.schedule_once(lambda dt: self._query_success(model), 0)
             else:
                 Clock.schedule_once(lambda dt: self._query_failed(), 0)
 
@@ -308,14 +312,14 @@ class QueryScoresScreen(BoxLayout):
             logger.error(f"查询成绩时出错: {e}")
             Clock.schedule_once(lambda dt: self._query_error(str(e)), 0)
     
-    def _query_success(self, scores_data: list, student_name: str):
+    def _query_success(self, model: ScoreRenderModel):
         """查询成功"""
         if self.loading_dialog:
             self.loading_dialog.dismiss()
 
         # 显示成绩数据
-        self._display_scores(scores_data, student_name)
-        show_popup("成功", f"成功查询到 {len(scores_data)} 门课程的成绩", "success")
+        self._display_scores(model)
+        show_popup("成功", f"成功查询到 {len(model.rows)} 门课程的成绩", "success")
     
     def _query_failed(self):
         """查询失败"""
@@ -349,31 +353,10 @@ class QueryScoresScreen(BoxLayout):
         self.results_content.height = responsive_size(40)
     
     def _calculate_text_width(self, text: str, font_size: float, bold: bool = False) -> float:
-        """精确计算文字的显示宽度"""
-        from kivy.uix.label import Label
-
+        """计算文字的显示宽度（使用文字度量缓存）"""
         if not text or text == '-':
             return responsive_size(20)  # 为空值或短横线预留最小宽度
-
-        # 创建临时标签来测量文字宽度，使用实际的字体设置
-        temp_label = Label(
-            text=str(text),
-            font_size=font_size,
-            bold=bold,
-            text_size=(None, None)
-        )
-        temp_label.texture_update()
-
-        # 获取实际宽度，如果无法获取则使用估算
-        if temp_label.texture_size:
-            actual_width = temp_label.texture_size[0]
-        else:
-            # 备用估算：中文字符按字体大小计算，英文字符按字体大小的0.6倍计算
-            chinese_chars = len([c for c in str(text) if ord(c) > 127])
-            english_chars = len(str(text)) - chinese_chars
-            actual_width = chinese_chars * font_size + english_chars * font_size * 0.6
-
-        return actual_width
+        return get_text_metrics().measure(str(text), font_size, bold)
 
     def _get_card_content_width(self) -> float:
         """获取卡片内容的实际宽度（与查询按钮宽度一致）"""
@@ -396,16 +379,12 @@ class QueryScoresScreen(BoxLayout):
         min_width = responsive_size(300)
         return max(card_content_width, min_width)
 
-    def _calculate_optimal_column_widths(self, scores_data: list) -> tuple[dict, float, bool]:
-        """计算最优的列宽分配，智能利用屏幕空间，必要时启用水平滚动"""
-        import logging
-        logger = logging.getLogger(__name__)
-
+    def _calculate_optimal_column_widths(self, scores_data: list, card_width: float) -> tuple[dict, float, bool, float]:
+        """计算最优的列宽分配，智能利用屏幕空间，必要时启用水平滚动（可在工作线程中调用）"""
         font_size = responsive_font_size(10)
         header_font_size = responsive_font_size(11)
 
-        # 获取卡片内容宽度（与查询按钮宽度一致）
-        card_width = self._get_card_content_width()
+        # 卡片内容宽度（与查询按钮宽度一致）
         logger.info(f"卡片内容宽度: {card_width:.1f}px")
 
         # 定义所有列的配置，移除绩点列
@@ -424,6 +403,7 @@ class QueryScoresScreen(BoxLayout):
             all_columns['type']['content_list'].append(str(score.get('课程属性', '')) if score.get('课程属性', '') else '-')
 
         # 第一步：计算每列的内容需求宽度
+        text_metrics = get_text_metrics()
         column_widths = {}
         total_content_width = 0
 
@@ -431,11 +411,11 @@ class QueryScoresScreen(BoxLayout):
             # 计算表头宽度
             header_width = self._calculate_text_width(col_info['header'], header_font_size, bold=True)
 
-            # 计算内容最大宽度
-            max_content_width = 0
-            for content in col_info['content_list']:
-                content_width = self._calculate_text_width(content, font_size, bold=(col_key == 'grade'))
-                max_content_width = max(max_content_width, content_width)
+            # 计算内容最大宽度：先按字形步进宽度估算，只精确测量最宽的几个候选
+            max_content_width = max(
+                responsive_size(20),
+                text_metrics.widest(col_info['content_list'], font_size, bold=(col_key == 'grade'))
+            )
 
             # 取表头和内容的最大宽度，并添加padding
             cell_padding = responsive_spacing(20)  # 增加padding让内容更舒适
@@ -455,7 +435,7 @@ class QueryScoresScreen(BoxLayout):
             }
             total_content_width += required_width
 
-            logger.info(f"{col_info['header']}列内容需求: {required_width:.1f}px")
+            logger.debug(f"{col_info['header']}列内容需求: {required_width:.1f}px")
 
         logger.info(f"内容总宽度: {total_content_width:.1f}px")
 
@@ -478,7 +458,7 @@ class QueryScoresScreen(BoxLayout):
         # 输出最终列宽
         for col_key, col_info in zip(column_widths.keys(), all_columns.values()):
             final_width = column_widths[col_key]['final_width']
-            logger.info(f"{col_info['header']}列最终宽度: {final_width:.1f}px")
+            logger.debug(f"{col_info['header']}列最终宽度: {final_width:.1f}px")
 
         logger.info(f"ScrollView宽度: {scroll_view_width:.1f}px")
         logger.info(f"表格内容宽度: {final_table_width:.1f}px")
@@ -486,12 +466,36 @@ class QueryScoresScreen(BoxLayout):
 
         return column_widths, final_table_width, needs_scroll, scroll_view_width
 
-    def _display_scores(self, scores_data: list, student_name: str):
-        """显示成绩数据"""
+    def _build_render_model(self, scores_data: list, student_name: str, card_width: float) -> ScoreRenderModel:
+        """在工作线程中计算列宽、单元格文本和成绩颜色，生成不可变的渲染模型"""
+        if not scores_data:
+            return ScoreRenderModel(f"{student_name}的本学期成绩", (), (), (), 0, card_width)
+
+        # 计算最优列宽
+        column_widths, final_table_width, needs_scroll, scroll_view_width = \
+            self._calculate_optimal_column_widths(scores_data, card_width)
+
+        # 对成绩数据进行排序（按课程名称排序）
+        sorted_scores = sorted(scores_data, key=lambda x: x.get('课程名', x.get('课程名称', '')))
+
+        # 表格列配置，移除绩点列
+        column_keys = ('course_name', 'credit', 'grade', 'type')
+        return ScoreRenderModel(
+            title=f"{student_name}的本学期成绩 (共{len(scores_data)}门课程)",
+            columns=(('课程名称', 'left'), ('学分', 'center'), ('成绩', 'center'), ('课程属性', 'center')),
+            widths=tuple(column_widths[key]['final_width'] for key in column_keys),
+            rows=tuple(self._build_score_cells(score) for score in sorted_scores),
+            table_width=final_table_width,
+            view_width=scroll_view_width
+        )
+
+    @profiled("display_scores")
+    def _display_scores(self, model: ScoreRenderModel):
+        """显示成绩数据：创建表格后按帧分批绑定行数据"""
         self.results_content.clear_widgets()
+        card_content_width = model.view_width
 
-        if not scores_data:
-            card_content_width = self._get_card_content_width()
+        if not model.rows:
             no_data_label = StyledLabel(
                 text="暂无成绩数据",
                 size_hint=(None, None),
@@ -509,12 +513,9 @@ class QueryScoresScreen(BoxLayout):
             self.results_content.width = card_content_width
             return
 
-        # 计算卡片内容宽度
-        card_content_width = self._get_card_content_width()
-
         # 添加标题
         title_label = StyledLabel(
-            text=f"{student_name}的本学期成绩 (共{len(scores_data)}门课程)",
+            text=model.title,
             size_hint=(None, None),
             width=card_content_width,
             height=responsive_size(40),
@@ -528,327 +529,47 @@ class QueryScoresScreen(BoxLayout):
         title_label.text_size = (card_content_width, None)
         self.results_content.add_widget(title_label)
 
-        # 计算最优列宽
-        column_widths, final_table_width, needs_scroll, scroll_view_width = self._calculate_optimal_column_widths(scores_data)
+        table = ScoreTable(
+            columns=model.columns,
+            widths=model.widths,
+            row_height=responsive_size(44),
+            header_height=responsive_size(42),
+            size_hint=(None, None)
+        )
+
+        # 计算表格的合适高度：10条以下数据时完全显示，否则限制最大高度，由RecycleView纵向滚动
+        total_table_height = table.content_height(len(model.rows))
+        if len(model.rows) <= 10:
+            scroll_height = total_table_height
+        else:
+            scroll_height = min(total_table_height, responsive_size(450))
+        table.height = scroll_height
 
-        # 创建双向滚动容器（固定宽度，与卡片宽度一致）
+        logger.info(f"成绩表: {len(model.rows)} 行，表格内容宽度 {model.table_width:.1f}px，"
+                    f"显示高度 {scroll_height:.1f}px")
+
+        # 水平滚动容器（固定宽度，与卡片宽度一致），表头和数据区一起横向滚动
         table_scroll = ScrollView(
             size_hint=(None, None),
-            width=scroll_view_width,  # 使用卡片宽度
-            height=responsive_size(400),
-            do_scroll_x=True,  # 启用水平滚动
-            do_scroll_y=True,  # 启用垂直滚动
-            scroll_type=['bars'],  # 始终显示滚动条
+            width=model.view_width,
+            height=scroll_height,
+            do_scroll_x=True,
+            do_scroll_y=False,
+            scroll_type=['bars', 'content'],
             bar_width=responsive_size(12),
             bar_color=get_theme_color('primary'),
             bar_inactive_color=get_theme_color('text_secondary'),
             scroll_timeout=1000,
             bar_margin=responsive_size(2)
         )
-
-        # 创建表格容器（使用实际内容宽度，高度将根据内容动态设置）
-        table_container = BoxLayout(
-            orientation='vertical',
-            size_hint=(None, None),
-            width=final_table_width,  # 使用实际内容宽度
-            spacing=0
-        )
-
-        # 创建表头（使用实际内容宽度）
-        header_layout = BoxLayout(
-            orientation='horizontal',
-            size_hint=(None, None),
-            width=final_table_width,  # 使用实际内容宽度
-            height=responsive_size(42),
-            spacing=0
-        )
-
-        # 添加表头背景色
-        with header_layout.canvas.before:
-            from kivy.graphics import Color, Rectangle
-            Color(0.95, 0.95, 0.95, 1)
-            self.header_bg_rect = Rectangle(pos=header_layout.pos, size=header_layout.size)
-        header_layout.bind(pos=self._update_header_bg, size=self._update_header_bg)
-
-        # 创建表头单元格，移除绩点列
-        header_configs = [
-            ('course_name', '课程名称', 'left'),
-            ('credit', '学分', 'center'),
-            ('grade', '成绩', 'center'),
-            ('type', '课程属性', 'center')
-        ]
-
-        for i, (col_key, header_text, align) in enumerate(header_configs):
-            final_width = column_widths[col_key]['final_width']
-
-            # 使用固定像素宽度（滚动模式）
-            header_cell = BoxLayout(
-                orientation='vertical',
-                size_hint=(None, 1),
-                width=final_width
-            )
-
-            # 添加右边框（除了最后一列）
-            if i < len(header_configs) - 1:
-                with header_cell.canvas.after:
-                    Color(0.8, 0.8, 0.8, 1)
-                    Rectangle(pos=(header_cell.right - 1, header_cell.y), size=(1, header_cell.height))
-                header_cell.bind(pos=self._update_cell_border, size=self._update_cell_border)
-
-            # 创建内容容器
-            content_container = BoxLayout(
-                orientation='vertical',
-                padding=[responsive_spacing(8), responsive_spacing(8), responsive_spacing(8), responsive_spacing(8)]
-            )
-
-            header_label = StyledLabel(
-                text=header_text,
-                size_hint=(1, 1),
-                font_size=responsive_font_size(11),
-                color=get_theme_color('text'),
-                bold=True,
-                halign=align,
-                valign='middle'
-            )
-
-            content_container.add_widget(header_label)
-            header_cell.add_widget(content_container)
-            header_layout.add_widget(header_cell)
-
-        # 创建数据容器（使用实际内容宽度）
-        data_container = BoxLayout(
-            orientation='vertical',
-            size_hint=(None, None),
-            width=final_table_width,  # 使用实际内容宽度
-            spacing=0
-        )
-
-        # 不添加测试标签，直接处理数据
-
-        # 对成绩数据进行排序（按课程名称排序）
-        sorted_scores = sorted(scores_data, key=lambda x: x.get('课程名', x.get('课程名称', '')))
-
-        # 调试：输出所有课程名称
-        logger.info("所有课程列表:")
-        for i, score in enumerate(sorted_scores):
-            course_name = score.get('课程名', score.get('课程名称', ''))
-            logger.info(f"  {i+1}. {course_name}")
-
-        # 先创建所有数据行，然后反向添加到容器中
-        data_rows = []
-        data_height = 0
-
-        # 创建所有数据行
-        for i, score in enumerate(sorted_scores):
-            course_name = score.get('课程名', score.get('课程名称', ''))
-            logger.info(f"正在处理第{i+1}行: {course_name}")
-
-            # 创建数据行（使用实际内容宽度）
-            row_height = responsive_size(44)
-            score_layout = BoxLayout(
-                orientation='horizontal',
-                size_hint=(None, None),
-                width=final_table_width,  # 使用实际内容宽度
-                height=row_height,
-                spacing=0
-            )
-
-
-
-            # 添加行背景色（交替显示）
-            bg_color = (0.98, 0.98, 0.98, 1) if i % 2 == 1 else (1, 1, 1, 1)
-            with score_layout.canvas.before:
-                from kivy.graphics import Color, Rectangle
-                Color(*bg_color)
-                self.row_bg_rect = Rectangle(pos=score_layout.pos, size=score_layout.size)
-            score_layout.bind(pos=self._update_row_bg, size=self._update_row_bg)
-
-            # 准备单元格数据
-            course_name = score.get('课程名', score.get('课程名称', ''))
-            credit = str(score.get('学分', '')) if score.get('学分', '') else '-'
-
-            # 处理成绩单元格（需要特殊颜色处理）
-            grade = score.get('成绩', '')
-            grade_text = str(grade) if grade else '-'
-            course_type = str(score.get('课程属性', '')) if score.get('课程属性', '') else '-'
-
-            # 处理成绩单元格（使用新的颜色分级系统）
-            grade = score.get('成绩', '')
-            grade_text = str(grade) if grade else '-'
-
-            # 使用新的成绩颜色分级函数
-            grade_color, grade_bold = get_grade_color_and_style(grade)
-
-            course_type = str(score.get('课程属性', '')) if score.get('课程属性', '') else '-'
-
-            # 创建数据单元格配置，移除绩点列
-            # 创建数据单元格配置，移除绩点列
-            cell_configs = [
-                ('course_name', course_name, 'left', get_theme_color('text'), False),
-                ('credit', credit, 'center', get_theme_color('text'), False),
-                ('grade', grade_text, 'center', grade_color, grade_bold),
-                ('type', course_type, 'center', get_theme_color('text_secondary'), False)
-            ]
-
-            # 添加数据单元格
-            for j, (col_key, text, align, color, bold) in enumerate(cell_configs):
-                final_width = column_widths[col_key]['final_width']
-
-                # 使用固定像素宽度（滚动模式）
-                cell_container = BoxLayout(
-                    orientation='vertical',
-                    size_hint=(None, 1),
-                    width=final_width
-                )
-
-                # 添加右边框（除了最后一列）
-                if j < len(cell_configs) - 1:
-                    with cell_container.canvas.after:
-                        Color(0.9, 0.9, 0.9, 1)
-                        Rectangle(pos=(cell_container.right - 1, cell_container.y), size=(1, cell_container.height))
-                    cell_container.bind(pos=self._update_cell_border, size=self._update_cell_border)
-
-                # 创建内容容器
-                content_container = BoxLayout(
-                    orientation='vertical',
-                    padding=[responsive_spacing(8), responsive_spacing(6), responsive_spacing(8), responsive_spacing(6)]
-                )
-
-                # 计算可用宽度
-                available_cell_width = final_width - responsive_spacing(16)
-
-                # 直接使用Kivy Label，避免StyledLabel的潜在问题
-                from kivy.uix.label import Label
-                cell_label = Label(
-                    text=text,
-                    size_hint=(1, 1),
-                    font_size=responsive_font_size(10),
-                    color=color,
-                    halign=align,
-                    valign='middle',
-                    bold=bold,
-                    text_size=(available_cell_width, None)  # 明确设置text_size
-                )
-
-
-
-                content_container.add_widget(cell_label)
-                cell_container.add_widget(content_container)
-                score_layout.add_widget(cell_container)
-
-            # 添加底部边框
-            with score_layout.canvas.after:
-                Color(0.9, 0.9, 0.9, 1)
-                Rectangle(pos=(score_layout.x, score_layout.y), size=(score_layout.width, 1))
-
-            # 将数据行添加到列表中，稍后统一添加到容器
-            data_rows.append((score_layout, course_name))
-            data_height += responsive_size(44)
-
-        # 反向添加数据行到容器中（最后一行先添加，第一行最后添加）
-        # 这样确保第一行能够正确显示
-        for score_layout, course_name in reversed(data_rows):
-            data_container.add_widget(score_layout)
-
-        # 设置数据容器高度
-        data_container.height = data_height
-
-        # 正确的顺序：先添加表头，再添加数据容器
-        table_container.add_widget(header_layout)
-        table_container.add_widget(data_container)
-
-        # 设置表格容器的总高度
-        total_table_height = responsive_size(42) + data_height  # 表头高度 + 数据高度
-        table_container.height = total_table_height
-
-        # 计算ScrollView的合适高度
-        # 根据数据量动态调整最大高度，确保能显示所有数据
-        base_max_height = 450  # 增加基础最大高度
-        if len(sorted_scores) <= 10:
-            # 10条以下数据时，让表格完全显示
-            max_scroll_height = total_table_height
-        else:
-            # 大量数据时，限制最大高度并启用滚动
-            max_scroll_height = responsive_size(base_max_height)
-
-        scroll_height = min(total_table_height, max_scroll_height)
-
-        # 记录高度计算信息
-        logger.info(f"原始数据行数: {len(scores_data)}")
-        logger.info(f"排序后数据行数: {len(sorted_scores)}")
-        logger.info(f"实际添加的行数: {i + 1}")
-        logger.info(f"数据容器高度: {data_height:.1f}px")
-        logger.info(f"表格总高度: {total_table_height:.1f}px")
-        logger.info(f"ScrollView高度: {scroll_height:.1f}px")
-        logger.info(f"需要垂直滚动: {'是' if total_table_height > max_scroll_height else '否'}")
-
-        # 更新ScrollView高度
-        table_scroll.height = scroll_height
-
-        # 将表格容器添加到滚动视图
-        table_scroll.add_widget(table_container)
-
-        # 确保ScrollView滚动到正确位置，显示表头和第一行数据
-        def scroll_to_show_data(*args):
-            content_height = table_container.height
-            viewport_height = table_scroll.height
-
-            if content_height > viewport_height:
-                # 第一行的y位置是950.4，表头的y位置是1029.6
-                # 视口范围是0.0-810.0，所以第一行不在视口内
-                # 我们需要调整滚动位置，让第一行进入视口
-
-                if data_container.children:
-                    first_row = data_container.children[-1]  # 最后添加的是第一个显示的
-                    first_row_y = first_row.y
-                    first_row_height = first_row.height
-
-                    # 计算需要的滚动位置，让第一行的底部刚好在视口顶部
-                    # scroll_y = 0 表示显示内容的底部，scroll_y = 1 表示显示内容的顶部
-                    # 我们需要让第一行的底部(y + height)在视口的顶部(810)
-                    target_y_top = first_row_y + first_row_height  # 第一行的顶部
-
-                    # 计算滚动比例：我们希望target_y_top对应视口的顶部
-                    # 视口顶部对应的内容y坐标应该是 viewport_height
-                    scroll_ratio = (content_height - target_y_top) / (content_height - viewport_height)
-                    table_scroll.scroll_y = max(0.0, min(1.0, scroll_ratio))
-                else:
-                    table_scroll.scroll_y = 1.0
-            else:
-                # 内容高度小于视口高度，不需要滚动
-                table_scroll.scroll_y = 1.0
-
-            logger.info("ScrollView已调整滚动位置")
-            logger.info(f"ScrollView内容高度: {content_height:.1f}px")
-            logger.info(f"ScrollView视口高度: {viewport_height:.1f}px")
-            logger.info(f"滚动位置: {table_scroll.scroll_y:.3f}")
-
-            # 检查表头和第一行数据的位置
-            logger.info(f"表头位置: y={header_layout.y:.1f}, height={header_layout.height:.1f}")
-            if data_container.children:
-                first_row = data_container.children[-1]  # Kivy中最后添加的是第一个显示的
-                logger.info(f"第一行位置: y={first_row.y:.1f}, height={first_row.height:.1f}")
-
-                # 计算实际的视口范围（相对于内容坐标系）
-                # scroll_y = 0 时显示内容底部，scroll_y = 1 时显示内容顶部
-                content_offset = (1.0 - table_scroll.scroll_y) * (content_height - viewport_height)
-                viewport_bottom = content_offset
-                viewport_top = content_offset + viewport_height
-                logger.info(f"ScrollView视口范围（内容坐标系）: {viewport_bottom:.1f} - {viewport_top:.1f}")
-                logger.info(f"第一行是否在视口内: {first_row.y >= viewport_bottom and first_row.y + first_row.height <= viewport_top}")
-
-        # 延迟执行滚动，确保UI完全加载后再滚动
-        from kivy.clock import Clock
-        Clock.schedule_once(scroll_to_show_data, 0.5)
+        table_scroll.add_widget(table)
 
         # 创建一个容器来确保ScrollView与卡片对齐
         scroll_container = BoxLayout(
             orientation='horizontal',
             size_hint=(1, None),
-            height=scroll_height  # 使用动态计算的高度
+            height=scroll_height
         )
-
-        # 添加ScrollView到容器中
         scroll_container.add_widget(table_scroll)
 
         # 将容器添加到结果内容
@@ -858,46 +579,26 @@ class QueryScoresScreen(BoxLayout):
         self.results_content.height = responsive_size(40) + scroll_height  # 标题 + 动态表格高度
         self.results_content.width = card_content_width  # 设置宽度与卡片内容宽度一致
 
-    def _update_header_bg(self, instance, value):
-        """更新表头背景"""
-        if hasattr(self, 'header_bg_rect'):
-            self.header_bg_rect.pos = instance.pos
-            self.header_bg_rect.size = instance.size
-
-    def _update_row_bg(self, instance, value):
-        """更新行背景"""
-        if hasattr(self, 'row_bg_rect'):
-            self.row_bg_rect.pos = instance.pos
-            self.row_bg_rect.size = instance.size
-
-    def _update_cell_bg(self, instance, value):
-        """更新单元格背景"""
-        if hasattr(instance, 'canvas') and instance.canvas.before:
-            instance.canvas.before.clear()
-            with instance.canvas.before:
-                from kivy.graphics import Color, Rectangle
-                # 根据行索引确定背景色
-                bg_color = (0.98, 0.98, 0.98, 1) if hasattr(instance, '_row_index') and instance._row_index % 2 == 1 else (1, 1, 1, 1)
-                Color(*bg_color)
-                Rectangle(pos=instance.pos, size=instance.size)
-
-    def _update_cell_border(self, instance, value):
-        """更新单元格边框"""
-        if hasattr(instance, 'canvas') and instance.canvas.after:
-            instance.canvas.after.clear()
-            with instance.canvas.after:
-                from kivy.graphics import Color, Rectangle
-                Color(0.9, 0.9, 0.9, 1)
-                Rectangle(pos=(instance.right - 1, instance.y), size=(1, instance.height))
-
-    def _update_separator(self, instance, value):
-        """更新分隔线"""
-        if hasattr(instance, 'canvas') and instance.canvas.before:
-            instance.canvas.before.clear()
-            with instance.canvas.before:
-                from kivy.graphics import Color, Rectangle
-                Color(0.9, 0.9, 0.9, 1)
-                Rectangle(pos=instance.pos, size=instance.size)
+        # 首批约一屏立即绑定，其余按帧时间预算分批绑定
+        table.bind_rows(model.rows)
+
+    def _build_score_cells(self, score: dict) -> tuple:
+        """生成一行成绩的单元格数据 (文本, 对齐方式, 颜色, 是否加粗)"""
+        course_name = score.get('课程名', score.get('课程名称', ''))
+        credit = str(score.get('学分', '')) if score.get('学分', '') else '-'
+        grade = score.get('成绩', '')
+        grade_text = str(grade) if grade else '-'
+        course_type = str(score.get('课程属性', '')) if score.get('课程属性', '') else '-'
+
+        # 使用成绩颜色分级
+        grade_color, grade_bold = get_grade_color_and_style(grade)
+
+        return (
+            (course_name, 'left', tuple(get_theme_color('text')), False),
+            (credit, 'center', tuple(get_theme_color('text')), False),
+            (grade_text, 'center', tuple(grade_color), grade_bold),
+            (course_type, 'center', tuple(get_theme_color('text_secondary')), False)
+        )
 
     def go_back(self, instance):
         """返回主界面"""
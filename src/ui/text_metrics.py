@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文字度量模块
+计算文字显示宽度，供表格列宽等布局计算使用：
+- 精确宽度用PIL按字体文件测量（不生成纹理），结果按 (文字, 字体, 字号, 粗体) 放入LRU缓存
+- 每种字体维护一张字形步进宽度表，逐字累加即可快速估算宽度
+- widest() 先用估算值筛出最宽的少数候选，只对它们做精确测量
+可在工作线程中使用：Kivy文字提供者的FreeType字体对象与主线程渲染共用且不是线程安全的，
+因此测量时每个线程使用自己的PIL字体对象，只从Kivy读取已注册字体的文件路径
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Iterable, Dict, Tuple
+
+from kivy.core.text import LabelBase, DEFAULT_FONT
+from kivy.resources import resource_find
+
+logger = logging.getLogger(__name__)
+
+# 字形步进宽度表的参考字号，估算时按字号线性缩放
+REFERENCE_FONT_SIZE = 100
+
+# 精确测量结果缓存条目数
+DEFAULT_CACHE_SIZE = 2048
+
+# 合成粗体（粗体与常规使用同一字体文件）时每个字形增加的宽度，相对字号
+SYNTHETIC_BOLD_RATIO = 0.1
+
+# 每个线程自己的PIL字体对象 {(字体文件, 字号): ImageFont}
+_thread_fonts = threading.local()
+
+# widest() 最多精确测量的候选数，以及候选估算值相对最大估算值的下限
+WIDEST_CANDIDATES = 3
+WIDEST_CANDIDATE_RATIO = 0.9
+
+class TextMetrics:
+    """文字度量服务"""
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple[str, str, float, bool], float]" = OrderedDict()
+        self._advances: Dict[Tuple[str, bool], Dict[str, float]] = {}
+        self._font_files: Dict[Tuple[str, bool], Tuple[Optional[str], bool]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'exact_measures': 0, 'glyph_measures': 0}
+
+    def measure(self, text: str, font_size: float, bold: bool = False,
+                font_name: Optional[str] = None) -> float:
+        """精确宽度（像素），优先从缓存读取"""
+        text = str(text)
+        font_name = font_name or DEFAULT_FONT
+        key = (text, font_name, float(font_size), bool(bold))
+        with self._lock:
+            width = self._cache.get(key)
+            if width is not None:
+                self._cache.move_to_end(key)
+                self.stats['hits'] += 1
+                return width
+            self.stats['misses'] += 1
+
+        width = self._measure_exact(text, font_size, bold, font_name)
+        with self._lock:
+            self._cache[key] = width
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return width
+
+    def estimate(self, text: str, font_size: float, bold: bool = False,
+                 font_name: Optional[str] = None) -> float:
+        """按字形步进宽度累加估算宽度（不含字距调整）"""
+        font_name = font_name or DEFAULT_FONT
+        advances = self._advances.setdefault((font_name, bool(bold)), {})
+        total = 0.0
+        for char in str(text):
+            advance = advances.get(char)
+            if advance is None:
+                advance = advances[char] = self._measure_glyph(char, bold, font_name)
+            total += advance
+        return total * font_size / REFERENCE_FONT_SIZE
+
+    def widest(self, texts: Iterable[str], font_size: float, bold: bool = False,
+               font_name: Optional[str] = None) -> float:
+        """一组文字中的最大精确宽度
+
+        先对所有不同的文字做估算，只精确测量估算值接近最大值的少数候选。
+        """
+        estimates = {}
+        for text in texts:
+            text = str(text)
+            if text and text not in estimates:
+                estimates[text] = self.estimate(text, font_size, bold, font_name)
+        if not estimates:
+            return 0.0
+
+        ranked = sorted(estimates.items(), key=lambda item: item[1], reverse=True)
+        threshold = ranked[0][1] * WIDEST_CANDIDATE_RATIO
+        candidates = [text for text, width in ranked[:WIDEST_CANDIDATES] if width >= threshold]
+        return max(self.measure(text, font_size, bold, font_name) for text in candidates)
+
+    def clear(self):
+        """清空缓存和字形表（更换字体后调用）"""
+        with self._lock:
+            self._cache.clear()
+            self._advances.clear()
+            self._font_files.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取缓存统计"""
+        with self._lock:
+            return dict(self.stats, entries=len(self._cache))
+
+    def _measure_exact(self, text: str, font_size: float, bold: bool, font_name: str) -> float:
+        with self._lock:
+            self.stats['exact_measures'] += 1
+        width = self._measure_with_font(text, font_size, bold, font_name)
+        return _fallback_width(text, font_size) if width is None else width
+
+    def _measure_glyph(self, char: str, bold: bool, font_name: str) -> float:
+        """参考字号下单个字符的步进宽度"""
+        with self._lock:
+            self.stats['glyph_measures'] += 1
+        width = self._measure_with_font(char, REFERENCE_FONT_SIZE, bold, font_name)
+        return _fallback_width(char, REFERENCE_FONT_SIZE) if width is None else width
+
+    def _measure_with_font(self, text: str, font_size: float, bold: bool, font_name: str) -> Optional[float]:
+        """用当前线程的PIL字体测量步进宽度，字体不可用时返回None"""
+        font_file, synthetic_bold = self._font_file(font_name, bold)
+        if font_file is None:
+            return None
+        try:
+            fonts = getattr(_thread_fonts, 'fonts', None)
+            if fonts is None:
+                fonts = _thread_fonts.fonts = {}
+            font = fonts.get((font_file, font_size))
+            if font is None:
+                from PIL import ImageFont
+                font = fonts[(font_file, font_size)] = ImageFont.truetype(font_file, font_size)
+            width = font.getlength(text)
+        except Exception as e:
+            logger.debug(f"测量文字宽度失败，使用估算值: {e}")
+            return None
+        if synthetic_bold:
+            width += len(text) * font_size * SYNTHETIC_BOLD_RATIO
+        return float(width)
+
+    def _font_file(self, font_name: str, bold: bool) -> Tuple[Optional[str], bool]:
+        """已注册字体的文件路径，以及粗体是否由常规字体合成"""
+        key = (font_name, bold)
+        with self._lock:
+            cached = self._font_files.get(key)
+        if cached is not None:
+            return cached
+
+        # LabelBase._fonts: {名称: (常规, 斜体, 粗体, 粗斜体)}
+        files = LabelBase._fonts.get(font_name)
+        if files:
+            path = files[2] if bold else files[0]
+            synthetic_bold = bold and files[2] == files[0]
+        else:
+            path, synthetic_bold = font_name, bold
+        font_file = resource_find(path) if path else None
+        if font_file is None:
+            logger.debug(f"找不到字体 {font_name} 的文件，使用估算宽度")
+        result = (font_file, synthetic_bold)
+        with self._lock:
+            self._font_files[key] = result
+        return result
+
+def _fallback_width(text: str, font_size: float) -> float:
+    """字体不可用时的估算：中文字符按字号计算，其他字符按字号的0.6倍计算"""
+    wide = sum(1 for char in text if ord(char) > 127)
+    return wide * font_size + (len(text) - wide) * font_size * 0.6
+
+# 全局文字度量实例
+_text_metrics = None
+
+def get_text_metrics() -> TextMetrics:
+    """获取文字度量实例"""
+    global _text_metrics
+    if _text_metrics is None:
+        _text_metrics = TextMetrics()
+    return _text_metrics
+
+def measure_text(text: str, font_size: float, bold: bool = False) -> float:
+    """测量文字宽度（便捷函数）"""
+    return get_text_metrics().measure(text, font_size, bold)
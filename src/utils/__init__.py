@@ -5,9 +5,15 @@
 包含字体管理、内存管理等工具功能
 """
 
-from .font_manager import FontManager, init_fonts, get_icon, get_button_text
-from .memory_manager import MemoryManager
-from .helpers import clean_history_files, ensure_directories
+from .lazy import lazy_exports
+
+# 子模块在首次访问导出名称时才导入
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'FontManager': '.font_manager', 'init_fonts': '.font_manager',
+    'get_icon': '.font_manager', 'get_button_text': '.font_manager',
+    'MemoryManager': '.memory_manager',
+    'clean_history_files': '.helpers', 'ensure_directories': '.helpers',
+})
 
 __all__ = [
     'FontManager', 'init_fonts', 'get_icon', 'get_button_text',
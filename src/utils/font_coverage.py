@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+字形覆盖模块
+读取TTF/TTC字体的cmap表，生成指定Unicode区间（中文、emoji等）的覆盖位图：
+每个码位一位，判断字体是否包含某个字符只需一次位运算。
+只读取文件头和cmap表，不加载整个字体文件。
+"""
+
+import base64
+import struct
+import logging
+from typing import Tuple, List, Dict, Any, BinaryIO, Optional
+
+logger = logging.getLogger(__name__)
+
+# 统计覆盖的Unicode区间 (名称, 起始码位, 结束码位)
+COVERAGE_RANGES: Tuple[Tuple[str, int, int], ...] = (
+    ('cjk_symbols', 0x3000, 0x303F),       # 中文标点
+    ('cjk', 0x4E00, 0x9FFF),               # 中日韩统一表意文字
+    ('fullwidth', 0xFF00, 0xFFEF),         # 全角字符
+    ('letterlike', 0x2100, 0x214F),        # 类字母符号（ℹ ™ 等）
+    ('arrows', 0x2190, 0x21FF),
+    ('misc_symbols', 0x2600, 0x27BF),      # 杂项符号和装饰符号（☐ ☑ ⚠ 等）
+    ('misc_arrows', 0x2B00, 0x2BFF),
+    ('emoji', 0x1F300, 0x1FAFF),           # 图形符号、表情、交通和扩展符号
+)
+
+# 不需要字形的格式字符：变体选择符和零宽连接符
+IGNORED_CODEPOINTS = frozenset([0xFE0E, 0xFE0F, 0x200D])
+
+class GlyphCoverage:
+    """字形覆盖位图"""
+
+    def __init__(self, ranges: Tuple[Tuple[str, int, int], ...] = COVERAGE_RANGES,
+                 bitmap: Optional[bytearray] = None):
+        self.ranges = tuple(tuple(item) for item in ranges)
+        # 每个区间在位图中的起始位
+        self._offsets: List[Tuple[int, int, int]] = []
+        bits = 0
+        for _, start, end in self.ranges:
+            self._offsets.append((start, end, bits))
+            bits += end - start + 1
+        self.size_bits = bits
+        self.bitmap = bitmap if bitmap is not None else bytearray((bits + 7) // 8)
+
+    def _bit_index(self, codepoint: int) -> int:
+        for start, end, offset in self._offsets:
+            if start <= codepoint <= end:
+                return offset + codepoint - start
+        return -1
+
+    def add(self, codepoint: int):
+        index = self._bit_index(codepoint)
+        if index >= 0:
+            self.bitmap[index >> 3] |= 1 << (index & 7)
+
+    def add_range(self, first: int, last: int):
+        """添加 [first, last] 中落在统计区间内的码位"""
+        for start, end, offset in self._offsets:
+            low, high = max(first, start), min(last, end)
+            for index in range(offset + low - start, offset + high - start + 1):
+                self.bitmap[index >> 3] |= 1 << (index & 7)
+
+    def covers(self, char: str) -> Optional[bool]:
+        """字体是否包含字符，字符不在统计区间内时返回None"""
+        index = self._bit_index(ord(char))
+        if index < 0:
+            return None
+        return bool(self.bitmap[index >> 3] & (1 << (index & 7)))
+
+    def covers_text(self, text: str, strict: bool = False) -> bool:
+        """字体是否包含文字中统计区间内的所有字符（忽略变体选择符等格式字符）
+
+        strict为True时，不在统计区间内的字符视为不包含（用于判断emoji图标等必须确认有字形的文字）
+        """
+        for char in text:
+            if ord(char) in IGNORED_CODEPOINTS:
+                continue
+            covered = self.covers(char)
+            if covered is False or (strict and covered is None):
+                return False
+        return True
+
+    def ratio(self, name: str) -> float:
+        """某个区间的覆盖比例"""
+        for (range_name, start, end), (_, _, offset) in zip(self.ranges, self._offsets):
+            if range_name == name:
+                covered = sum(
+                    1 for index in range(offset, offset + end - start + 1)
+                    if self.bitmap[index >> 3] & (1 << (index & 7))
+                )
+                return covered / (end - start + 1)
+        raise KeyError(name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'ranges': [list(item) for item in self.ranges],
+            'bitmap': base64.b64encode(bytes(self.bitmap)).decode('ascii'),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GlyphCoverage":
+        ranges = tuple(tuple(item) for item in data['ranges'])
+        coverage = cls(ranges, bytearray(base64.b64decode(data['bitmap'])))
+        if len(coverage.bitmap) != (coverage.size_bits + 7) // 8:
+            raise ValueError("覆盖位图长度与区间不一致")
+        return coverage
+
+def _read(f: BinaryIO, offset: int, size: int) -> bytes:
+    f.seek(offset)
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("字体文件不完整")
+    return data
+
+def _find_cmap(f: BinaryIO, font_index: int) -> int:
+    """返回cmap表在文件中的偏移"""
+    header = _read(f, 0, 12)
+    font_offset = 0
+    if header[:4] == b'ttcf':
+        num_fonts = struct.unpack('>I', header[8:12])[0]
+        if font_index >= num_fonts:
+            raise ValueError(f"字体集合中只有 {num_fonts} 个字体")
+        font_offset = struct.unpack('>I', _read(f, 12 + 4 * font_index, 4))[0]
+        header = _read(f, font_offset, 12)
+
+    num_tables = struct.unpack('>H', header[4:6])[0]
+    records = _read(f, font_offset + 12, 16 * num_tables)
+    for i in range(num_tables):
+        tag, _, offset, _ = struct.unpack('>4sIII', records[16 * i:16 * i + 16])
+        if tag == b'cmap':
+            return offset
+    raise ValueError("字体没有cmap表")
+
+def _select_subtable(f: BinaryIO, cmap_offset: int) -> Tuple[int, int]:
+    """选择Unicode子表，优先完整Unicode（格式12），返回 (格式, 偏移)"""
+    _, num_tables = struct.unpack('>HH', _read(f, cmap_offset, 4))
+    records = _read(f, cmap_offset + 4, 8 * num_tables)
+    candidates = {}
+    for i in range(num_tables):
+        platform_id, encoding_id, offset = struct.unpack('>HHI', records[8 * i:8 * i + 8])
+        if platform_id in (0, 3):
+            fmt = struct.unpack('>H', _read(f, cmap_offset + offset, 2))[0]
+            candidates.setdefault(fmt, cmap_offset + offset)
+    for fmt in (12, 4):
+        if fmt in candidates:
+            return fmt, candidates[fmt]
+    raise ValueError("字体没有支持的Unicode cmap子表")
+
+def _read_format12(f: BinaryIO, offset: int, coverage: GlyphCoverage):
+    num_groups = struct.unpack('>I', _read(f, offset + 12, 4))[0]
+    groups = _read(f, offset + 16, 12 * num_groups)
+    for start_char, end_char, _ in struct.iter_unpack('>III', groups):
+        coverage.add_range(start_char, end_char)
+
+def _codepoints_in_ranges(first: int, last: int, coverage: GlyphCoverage):
+    """[first, last] 中落在统计区间内的码位"""
+    for _, start, end in coverage.ranges:
+        yield from range(max(first, start), min(last, end) + 1)
+
+def _read_format4(f: BinaryIO, offset: int, coverage: GlyphCoverage):
+    length, _, seg_count_x2 = struct.unpack('>HHH', _read(f, offset + 2, 6))
+    data = _read(f, offset, length)
+    seg_count = seg_count_x2 // 2
+    ends_at = 14
+    starts_at = ends_at + seg_count_x2 + 2
+    deltas_at = starts_at + seg_count_x2
+    range_offsets_at = deltas_at + seg_count_x2
+
+    for i in range(seg_count):
+        end_code = struct.unpack_from('>H', data, ends_at + 2 * i)[0]
+        start_code = struct.unpack_from('>H', data, starts_at + 2 * i)[0]
+        id_delta = struct.unpack_from('>h', data, deltas_at + 2 * i)[0]
+        range_offset = struct.unpack_from('>H', data, range_offsets_at + 2 * i)[0]
+        if start_code == 0xFFFF:
+            continue
+        for codepoint in _codepoints_in_ranges(start_code, end_code, coverage):
+            if range_offset == 0:
+                glyph = (codepoint + id_delta) & 0xFFFF
+            else:
+                address = range_offsets_at + 2 * i + range_offset + 2 * (codepoint - start_code)
+                if address + 2 > len(data):
+                    continue
+                glyph = struct.unpack_from('>H', data, address)[0]
+                if glyph:
+                    glyph = (glyph + id_delta) & 0xFFFF
+            if glyph:
+                coverage.add(codepoint)
+
+def build_coverage(font_path: str, font_index: int = 0) -> GlyphCoverage:
+    """读取字体cmap表生成覆盖位图（TTC取第font_index个字体）"""
+    coverage = GlyphCoverage()
+    with open(font_path, 'rb') as f:
+        fmt, offset = _select_subtable(f, _find_cmap(f, font_index))
+        if fmt == 12:
+            _read_format12(f, offset, coverage)
+        else:
+            _read_format4(f, offset, coverage)
+    return coverage
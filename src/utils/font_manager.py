@@ -3,23 +3,76 @@
 """
 字体管理模块
 处理中文字体和emoji图标的显示问题
+
+找到的字体路径和字形覆盖位图保存在字体缓存文件中（按字体文件的修改时间和大小校验），
+之后启动时不再逐个探测候选字体；是否使用emoji图标由覆盖位图决定。
 """
 
 import os
 import sys
+import json
 import logging
-from typing import Dict, Optional
+from typing import Dict, Optional, Any
 from kivy.core.text import LabelBase, DEFAULT_FONT
 from kivy.resources import resource_add_path
 
+from .font_coverage import GlyphCoverage, build_coverage
+from ..core.config import get_config
+
 logger = logging.getLogger(__name__)
 
+# 字体缓存文件格式版本，格式或覆盖区间变化时递增
+FONT_CACHE_VERSION = 2
+
+# 图标的emoji和文字替代
+EMOJI_ICONS = {
+    'refresh': '🔄',
+    'login': '👤',
+    'switch': '🔄',
+    'query': '📊',
+    'manage': '⚙️',
+    'exit': '🚪',
+    'checkbox_empty': '☐',
+    'checkbox_checked': '☑',
+    'success': '✅',
+    'error': '❌',
+    'warning': '⚠️',
+    'info': 'ℹ️',
+    'home': '🏠',
+    'back': '⬅️',
+    'forward': '➡️',
+    'up': '⬆️',
+    'down': '⬇️'
+}
+
+TEXT_ICONS = {
+    'refresh': '刷新',
+    'login': '登录',
+    'switch': '切换',
+    'query': '查询',
+    'manage': '管理',
+    'exit': '退出',
+    'checkbox_empty': '□',
+    'checkbox_checked': '■',
+    'success': '成功',
+    'error': '错误',
+    'warning': '警告',
+    'info': '信息',
+    'home': '主页',
+    'back': '返回',
+    'forward': '前进',
+    'up': '上',
+    'down': '下'
+}
+
 class FontManager:
     """字体管理器"""
     
     def __init__(self):
         self.font_registered = False
         self.emoji_supported = False
+        self.font_path: Optional[str] = None
+        self.coverage: Optional[GlyphCoverage] = None
         self._icon_cache = {}
         self._button_text_cache = {}
         
@@ -39,7 +92,90 @@ class FontManager:
         return self.font_registered
     
     def _register_chinese_fonts(self) -> bool:
-        """注册中文字体"""
+        """注册中文字体，优先使用字体缓存中的路径"""
+        cached = self._load_font_cache()
+        if cached and self._register_font(cached['font_path']):
+            try:
+                self.coverage = GlyphCoverage.from_dict(cached['coverage'])
+            except Exception as e:
+                logger.debug(f"字体缓存中的覆盖位图无效: {e}")
+                self._update_coverage()
+                self._save_font_cache()
+            return True
+
+        for font_path in self._candidate_fonts():
+            if os.path.exists(font_path) and self._register_font(font_path):
+                self._update_coverage()
+                self._save_font_cache()
+                return True
+
+        logger.warning("警告: 未能加载任何中文字体，界面可能无法正确显示中文")
+        return self.font_registered
+
+    def _register_font(self, font_path: str) -> bool:
+        """注册默认字体"""
+        try:
+            LabelBase.register(DEFAULT_FONT, font_path)
+        except Exception as e:
+            logger.warning(f"加载字体 {font_path} 失败: {e}")
+            return False
+        logger.info(f"已加载字体: {font_path}")
+        self.font_path = font_path
+        self.font_registered = True
+        return True
+
+    def _update_coverage(self):
+        """读取已注册字体的cmap表生成覆盖位图"""
+        try:
+            self.coverage = build_coverage(self.font_path)
+            logger.info(f"字体中文覆盖率: {self.coverage.ratio('cjk'):.1%}，"
+                        f"emoji覆盖率: {self.coverage.ratio('emoji'):.1%}")
+        except Exception as e:
+            logger.warning(f"读取字体 {self.font_path} 的字形覆盖失败: {e}")
+            self.coverage = None
+
+    def _load_font_cache(self) -> Optional[Dict[str, Any]]:
+        """读取字体缓存，字体文件已改变或不存在时返回None"""
+        cache_file = get_config("FONT_CACHE_FILE", "data/font_cache.json")
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('version') != FONT_CACHE_VERSION or cached.get('platform') != sys.platform:
+                return None
+            stat = os.stat(cached['font_path'])
+            if stat.st_mtime != cached.get('mtime') or stat.st_size != cached.get('size'):
+                logger.info(f"字体文件已改变，重新探测: {cached['font_path']}")
+                return None
+            return cached
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"读取字体缓存失败: {e}")
+            return None
+
+    def _save_font_cache(self):
+        """保存字体路径和覆盖位图"""
+        cache_file = get_config("FONT_CACHE_FILE", "data/font_cache.json")
+        try:
+            stat = os.stat(self.font_path)
+            data = {
+                'version': FONT_CACHE_VERSION,
+                'platform': sys.platform,
+                'font_path': self.font_path,
+                'mtime': stat.st_mtime,
+                'size': stat.st_size,
+                'coverage': self.coverage.to_dict() if self.coverage else None,
+            }
+            os.makedirs(os.path.dirname(os.path.abspath(cache_file)), exist_ok=True)
+            temp_file = cache_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_file, cache_file)
+        except Exception as e:
+            logger.debug(f"保存字体缓存失败: {e}")
+
+    def _candidate_fonts(self) -> list:
+        """按优先级排列的候选字体路径"""
         # 本地字体文件
         local_fonts = [
             os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fonts', 'simhei.ttf'),
@@ -73,36 +209,29 @@ class FontManager:
         
         # 根据系统选择字体列表
         if sys.platform.startswith('win'):
-            font_list = windows_fonts + local_fonts
+            return windows_fonts + local_fonts
         elif sys.platform.startswith('linux'):
-            font_list = linux_fonts + local_fonts
+            return linux_fonts + local_fonts
         elif sys.platform.startswith('darwin'):
-            font_list = macos_fonts + local_fonts
-        else:
-            font_list = local_fonts
-        
-        # 尝试注册第一个存在的字体
-        for font_path in font_list:
-            if os.path.exists(font_path):
-                try:
-                    LabelBase.register(DEFAULT_FONT, font_path)
-                    logger.info(f"已加载字体: {font_path}")
-                    self.font_registered = True
-                    return True
-                except Exception as e:
-                    logger.warning(f"加载字体 {font_path} 失败: {e}")
-        
-        if not self.font_registered:
-            logger.warning("警告: 未能加载任何中文字体，界面可能无法正确显示中文")
-        
-        return self.font_registered
+            return macos_fonts + local_fonts
+        return local_fonts
     
     def _check_emoji_support(self) -> bool:
-        """检查当前字体是否支持emoji"""
-        # 这里可以添加emoji支持检测逻辑
-        # 暂时设为False，使用文字替代方案
-        self.emoji_supported = False
+        """检查当前字体是否包含所有emoji图标的字形
+
+        部分图标有字形、部分没有时图标风格会不一致，因此只在全部包含时使用emoji。
+        """
+        self.emoji_supported = self.coverage is not None and all(
+            self.coverage.covers_text(emoji, strict=True) for emoji in EMOJI_ICONS.values()
+        )
+        self._icon_cache.clear()
         return self.emoji_supported
+
+    def has_glyph(self, char: str) -> bool:
+        """当前字体是否包含字符的字形（只统计中文、符号和emoji区间，其他字符视为包含）"""
+        if self.coverage is None:
+            return False
+        return self.coverage.covers(char) is not False
     
     def get_icon_text(self, icon_type: str) -> str:
         """获取图标文本（emoji或文字替代）
@@ -118,48 +247,10 @@ class FontManager:
         
         if self.emoji_supported:
             # 如果支持emoji，返回emoji图标
-            emoji_map = {
-                'refresh': '🔄',
-                'login': '👤',
-                'switch': '🔄',
-                'query': '📊',
-                'manage': '⚙️',
-                'exit': '🚪',
-                'checkbox_empty': '☐',
-                'checkbox_checked': '☑',
-                'success': '✅',
-                'error': '❌',
-                'warning': '⚠️',
-                'info': 'ℹ️',
-                'home': '🏠',
-                'back': '⬅️',
-                'forward': '➡️',
-                'up': '⬆️',
-                'down': '⬇️'
-            }
-            result = emoji_map.get(icon_type, '')
+            result = EMOJI_ICONS.get(icon_type, '')
         else:
             # 如果不支持emoji，返回文字替代
-            text_map = {
-                'refresh': '刷新',
-                'login': '登录',
-                'switch': '切换',
-                'query': '查询',
-                'manage': '管理',
-                'exit': '退出',
-                'checkbox_empty': '□',
-                'checkbox_checked': '■',
-                'success': '成功',
-                'error': '错误',
-                'warning': '警告',
-                'info': '信息',
-                'home': '主页',
-                'back': '返回',
-                'forward': '前进',
-                'up': '上',
-                'down': '下'
-            }
-            result = text_map.get(icon_type, '')
+            result = TEXT_ICONS.get(icon_type, '')
         
         self._icon_cache[icon_type] = result
         return result
@@ -239,6 +330,10 @@ def is_emoji_supported() -> bool:
     """检查是否支持emoji"""
     return _font_manager.is_emoji_supported()
 
+def has_glyph(char: str) -> bool:
+    """检查当前字体是否包含字符"""
+    return _font_manager.has_glyph(char)
+
 def is_font_registered() -> bool:
     """检查字体是否注册成功"""
     return _font_manager.is_font_registered()
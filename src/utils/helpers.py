@@ -6,7 +6,6 @@
 """
 
 import os
-import json
 import logging
 from typing import List, Optional
 
@@ -103,33 +102,29 @@ def clean_history_files():
     _clean_invalid_sessions()
 
 def _clean_invalid_sessions():
-    """清理无效的会话文件"""
+    """清理无效的会话文件
+
+    会话已保存在账号存储中，迁移完成后会话目录里残留的旧文件都不再使用。
+    """
     from ..core.config import get_config
+    from ..core.store import get_account_store
     
-    accounts_file = get_config("ACCOUNTS_FILE")
     session_dir = get_config("SESSION_DIR")
-    
-    if not os.path.exists(accounts_file):
-        logger.debug("账号文件不存在，跳过会话文件清理")
+    if not os.path.exists(session_dir):
         return
     
     try:
-        with open(accounts_file, 'r', encoding='utf-8') as f:
-            accounts = json.load(f)
+        if not get_account_store().get_meta("legacy_files_migrated"):
+            logger.debug("旧版会话文件尚未迁移，跳过会话文件清理")
+            return
         
-        # 获取所有会话文件
-        if os.path.exists(session_dir):
-            session_files = [f for f in os.listdir(session_dir) if f.endswith(".session")]
-            for file in session_files:
-                # 提取学号
-                student_id = file.replace(".session", "")
-                # 如果学号不在账号列表中，删除会话文件
-                if student_id not in accounts:
-                    try:
-                        os.remove(os.path.join(session_dir, file))
-                        logger.info(f"已删除无效会话文件: {file}")
-                    except Exception as e:
-                        logger.error(f"删除无效会话文件失败: {file}, 错误: {str(e)}")
+        session_files = [f for f in os.listdir(session_dir) if f.endswith((".json", ".session", ".tmp"))]
+        for file in session_files:
+            try:
+                os.remove(os.path.join(session_dir, file))
+                logger.info(f"已删除无效会话文件: {file}")
+            except Exception as e:
+                logger.error(f"删除无效会话文件失败: {file}, 错误: {str(e)}")
     except Exception as e:
         logger.error(f"清理无效会话文件时出错: {str(e)}")
 
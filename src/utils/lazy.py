@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+延迟导入模块
+为包的 __init__ 提供按需导入的导出（PEP 562 模块级 __getattr__），
+导入包本身不加载子模块，首次访问导出名称时才导入对应模块
+"""
+
+import importlib
+from typing import Dict, Callable, List, Tuple, Any
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """生成包的 __getattr__ 和 __dir__
+
+    Args:
+        package: 包名（传入 __name__）
+        exports: {导出名称: 相对模块名}，例如 {'MainScreen': '.main_screen'}
+
+    Returns:
+        (__getattr__, __dir__)
+    """
+    def __getattr__(name: str) -> Any:
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package), name)
+        # 缓存到包的命名空间，之后的访问不再经过 __getattr__
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(importlib.import_module(package))) | set(exports))
+
+    return __getattr__, __dir__
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志管道模块
+基于QueueHandler/QueueListener的非阻塞日志配置：业务线程只把日志记录放入有界队列，
+由后台监听线程负责格式化、写文件、按大小和时间轮转以及压缩旧日志
+"""
+
+import os
+import sys
+import copy
+import glob
+import gzip
+import json
+import time
+import queue
+import random
+import shutil
+import atexit
+import logging
+import threading
+import logging.handlers
+from datetime import datetime, timezone
+from typing import Optional, Dict
+
+from .tracing import current_trace_ids
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_FILE_NAME = "app.log"
+JSON_LOG_FILE_NAME = "app.jsonl"
+
+# 结构化日志的稳定字段名，通过 logger.xxx(..., extra={...}) 传入
+STRUCTURED_FIELDS = ("account", "endpoint", "method", "status_code", "latency_ms", "outcome", "count",
+                     "trace_id", "span_id")
+
+# 当前登录账号，由会话管理器在切换账号时设置
+_log_account: Optional[str] = None
+
+# 支持的时间轮转单位（秒）
+_ROTATE_INTERVALS = {
+    "S": 1,
+    "M": 60,
+    "H": 3600,
+    "D": 86400,
+    "MIDNIGHT": 86400,
+}
+
+# 在调用线程中把异常格式化为文本
+_EXCEPTION_FORMATTER = logging.Formatter()
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """有界队列处理器，队列满时丢弃日志而不是阻塞调用线程
+
+    丢弃策略：普通日志直接丢弃；WARNING及以上的日志会先挤掉队首最旧的一条再入队，
+    尽量保证错误信息不丢失。丢弃数量会在队列恢复后以一条警告日志补报。
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super(DroppingQueueHandler, self).__init__(log_queue)
+        self.dropped = 0
+        self._reported = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """复制记录供监听线程使用：合并消息参数，异常堆栈格式化为exc_text
+
+        基类会把整条格式化结果（含堆栈）写进msg并清空异常信息，JSON日志就无法单独输出exc字段。
+        这里msg只保留消息本身，堆栈保存在exc_text中，文本格式化器仍会把它追加在消息后面。
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _EXCEPTION_FORMATTER.formatException(record.exc_info)
+            # 与基类一样不让队列中的记录持有回溯对象（及其引用的栈帧）
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.WARNING:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.put_nowait(record)
+                except (queue.Empty, queue.Full):
+                    pass
+            with self._lock:
+                self.dropped += 1
+            return
+
+        # 队列有空间时补报之前丢弃的数量
+        if self.dropped > self._reported:
+            with self._lock:
+                missed = self.dropped - self._reported
+                self._reported = self.dropped
+            notice = logging.LogRecord(
+                __name__, logging.WARNING, __file__, 0,
+                f"日志队列已满，丢弃了 {missed} 条日志", None, None
+            )
+            try:
+                self.queue.put_nowait(notice)
+            except queue.Full:
+                pass
+
+class ContextFilter(logging.Filter):
+    """为日志记录补充当前账号和链路追踪ID（在调用线程中执行）"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "account", None) is None:
+            record.account = _log_account
+        if getattr(record, "trace_id", None) is None:
+            ids = current_trace_ids()
+            record.trace_id = ids["trace_id"]
+            record.span_id = ids["span_id"]
+        return True
+
+class SamplingFilter(logging.Filter):
+    """按日志器名称采样，高频日志只保留一部分，WARNING及以上总是保留
+
+    rates 形如 {"src.core.api": 0.01}，匹配最长的日志器名前缀；
+    未配置的日志器全部保留。
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        super(SamplingFilter, self).__init__()
+        self.rates = dict(rates or {})
+        self._cache: Dict[str, float] = {}
+
+    def _rate_for(self, name: str) -> float:
+        rate = self._cache.get(name)
+        if rate is None:
+            rate = 1.0
+            prefix = name
+            while prefix:
+                if prefix in self.rates:
+                    rate = float(self.rates[prefix])
+                    break
+                prefix = prefix.rpartition('.')[0]
+            self._cache[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self._rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+class JsonFormatter(logging.Formatter):
+    """JSONL格式化器，每条日志一行，字段名固定便于检索和采集"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        # 经过队列的记录异常已格式化为exc_text（见DroppingQueueHandler.prepare）
+        exc_text = record.exc_text
+        if not exc_text and record.exc_info:
+            exc_text = self.formatException(record.exc_info)
+        if exc_text:
+            entry["exc"] = exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class SizedTimedRotatingFileHandler(logging.handlers.BaseRotatingHandler):
+    """同时按大小和时间轮转的文件处理器，可选gzip压缩旧文件
+
+    轮转后的文件名为 app.log.20250101-120000[.gz]，超过backup_count的旧文件会被删除。
+    该处理器只在日志监听线程中使用，轮转和压缩不会阻塞界面线程。
+    """
+
+    def __init__(self, filename: str, max_bytes: int = 5 * 1024 * 1024,
+                 when: str = "midnight", backup_count: int = 5,
+                 compress: bool = True, encoding: str = "utf-8"):
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        super(SizedTimedRotatingFileHandler, self).__init__(filename, 'a', encoding=encoding, delay=False)
+        self.max_bytes = max_bytes
+        self.when = when.upper()
+        self.backup_count = backup_count
+        self.compress = compress
+        self.interval = _ROTATE_INTERVALS.get(self.when, 86400)
+        self.rollover_at = self._compute_rollover(time.time())
+
+    def _compute_rollover(self, current_time: float) -> float:
+        """计算下一次按时间轮转的时间点"""
+        if self.when == "MIDNIGHT":
+            local = time.localtime(current_time)
+            seconds_today = local.tm_hour * 3600 + local.tm_min * 60 + local.tm_sec
+            return current_time - seconds_today + 86400
+        return current_time + self.interval
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if time.time() >= self.rollover_at:
+            return True
+        if self.max_bytes > 0 and self.stream is not None:
+            self.stream.seek(0, 2)
+            if self.stream.tell() >= self.max_bytes:
+                return True
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        suffix = time.strftime("%Y%m%d-%H%M%S")
+        target = f"{self.baseFilename}.{suffix}"
+        # 同一秒内多次轮转时追加序号，避免覆盖
+        index = 1
+        while os.path.exists(target) or os.path.exists(target + ".gz"):
+            target = f"{self.baseFilename}.{suffix}.{index}"
+            index += 1
+
+        if os.path.exists(self.baseFilename):
+            if self.compress:
+                self._compress(self.baseFilename, target + ".gz")
+            else:
+                os.rename(self.baseFilename, target)
+
+        self._delete_old_files()
+        self.stream = self._open()
+        self.rollover_at = self._compute_rollover(time.time())
+
+    @staticmethod
+    def _compress(source: str, dest: str):
+        """gzip压缩轮转出的文件"""
+        with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+    def _delete_old_files(self):
+        """删除超出保留数量的旧日志"""
+        if self.backup_count <= 0:
+            return
+        old_files = sorted(glob.glob(f"{glob.escape(self.baseFilename)}.*"), key=os.path.getmtime)
+        for path in old_files[:-self.backup_count]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+class _DrainingQueueListener(logging.handlers.QueueListener):
+    """停止时阻塞放入结束标记，保证有界队列满时也能正常退出"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+class _LogPipeline:
+    """已配置的日志管道"""
+
+    def __init__(self, queue_handler: DroppingQueueHandler, listener: logging.handlers.QueueListener,
+                 file_handler: logging.Handler):
+        self.queue_handler = queue_handler
+        self.listener = listener
+        self.file_handler = file_handler
+
+_pipeline: Optional[_LogPipeline] = None
+_setup_lock = threading.Lock()
+
+def _read_settings() -> dict:
+    """读取日志相关配置"""
+    try:
+        from ..core.config import get_config
+    except Exception:
+        get_config = lambda key, default=None: default
+
+    return {
+        "logs_dir": get_config("LOGS_DIR", "logs"),
+        "max_bytes": int(get_config("LOG_MAX_BYTES", 5 * 1024 * 1024)),
+        "backup_count": int(get_config("LOG_BACKUP_COUNT", 5)),
+        "when": str(get_config("LOG_ROTATE_WHEN", "midnight")),
+        "queue_size": int(get_config("LOG_QUEUE_SIZE", 10000)),
+        "compress": bool(get_config("LOG_COMPRESS", True)),
+        "format": str(get_config("LOG_FORMAT", "text")).lower(),
+        "sampling": get_config("LOG_SAMPLING", {}) or {},
+    }
+
+def setup_logging(level: Optional[int] = None) -> logging.handlers.QueueListener:
+    """配置全局日志管道（可重复调用，只生效一次）
+
+    Args:
+        level: 日志级别，默认根据环境变量DEBUG决定
+
+    Returns:
+        后台日志监听器
+    """
+    global _pipeline
+
+    with _setup_lock:
+        if _pipeline is not None:
+            if level is not None:
+                logging.getLogger().setLevel(level)
+            return _pipeline.listener
+
+        if level is None:
+            level = logging.DEBUG if os.getenv('DEBUG', '').lower() == 'true' else logging.INFO
+
+        settings = _read_settings()
+        formatter = logging.Formatter(LOG_FORMAT)
+
+        # 实际写出的处理器，只在监听线程中运行
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(formatter)
+        json_mode = settings["format"] == "json"
+        file_handler = SizedTimedRotatingFileHandler(
+            os.path.join(settings["logs_dir"], JSON_LOG_FILE_NAME if json_mode else LOG_FILE_NAME),
+            max_bytes=settings["max_bytes"],
+            when=settings["when"],
+            backup_count=settings["backup_count"],
+            compress=settings["compress"],
+        )
+        file_handler.setFormatter(JsonFormatter() if json_mode else formatter)
+
+        log_queue = queue.Queue(maxsize=settings["queue_size"])
+        queue_handler = DroppingQueueHandler(log_queue)
+        # 先采样再补充上下文，被丢弃的记录不做额外工作
+        queue_handler.addFilter(SamplingFilter(settings["sampling"]))
+        queue_handler.addFilter(ContextFilter())
+        listener = _DrainingQueueListener(
+            log_queue, console_handler, file_handler, respect_handler_level=True
+        )
+
+        # 替换根日志器上已有的同步处理器
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+            handler.close()
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+
+        # 设置第三方库的日志级别
+        logging.getLogger('kivy').setLevel(logging.WARNING)
+        logging.getLogger('PIL').setLevel(logging.WARNING)
+        logging.getLogger('urllib3').setLevel(logging.WARNING)
+        logging.getLogger('requests').setLevel(logging.WARNING)
+
+        listener.start()
+        atexit.register(shutdown_logging)
+
+        _pipeline = _LogPipeline(queue_handler, listener, file_handler)
+        return listener
+
+def set_log_account(account: Optional[str]):
+    """设置写入结构化日志的当前账号"""
+    global _log_account
+    _log_account = account
+
+def get_dropped_count() -> int:
+    """获取因队列满而丢弃的日志数量"""
+    return _pipeline.queue_handler.dropped if _pipeline else 0
+
+def shutdown_logging():
+    """停止监听线程并刷新剩余日志"""
+    global _pipeline
+
+    with _setup_lock:
+        if _pipeline is None:
+            return
+        try:
+            _pipeline.listener.stop()
+            _pipeline.file_handler.close()
+        except Exception:
+            pass
+        logging.getLogger().removeHandler(_pipeline.queue_handler)
+        _pipeline = None
@@ -3,41 +3,247 @@
 """
 内存管理模块
 优化应用性能，管理内存使用和纹理缓存
+
+垃圾回收采用自适应策略，不再定期执行完整回收：
+- 启动完成后 gc.freeze()，启动时创建的长期对象不再参与回收扫描
+- 每秒采样一次RSS（/proc/self/statm）、分配块数和第0代回收次数（换算为分配速率）
+- RSS或分配块数比上次完整回收时增长超过阈值、或分配速率连续多次采样都很高时，
+  才在空闲时执行完整回收；一直不空闲时最多推迟 cleanup_interval 秒
+- 空闲指连续多次采样之间没有输入事件（触摸、鼠标、键盘）且没有正在运行的动画，
+  不只看帧时间：滚动和动画时帧时间同样很短，在其中完整回收会造成卡顿
+- 只有RSS超过软上限（真正的内存压力）时才清空Kivy纹理和图片缓存
+
+纹理缓存按 宽×高×每像素字节数 统计显存占用，超过预算时淘汰最久未使用的纹理。
 """
 
 import gc
-import weakref
+import os
+import sys
 import logging
 import threading
 import time
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable
 from kivy.clock import Clock
 
+from ..core.config import get_config
+
 logger = logging.getLogger(__name__)
 
+# 自动回收阈值：提高第0代阈值减少小回收次数，第2代（完整回收）主要由监测在空闲时（无输入、无动画）触发
+GC_THRESHOLDS = (1000, 20, 100)
+
+# 监测采样间隔（秒）
+MONITOR_INTERVAL = 1.0
+
+# 空闲采样的最长帧时间（秒），以及需要连续空闲（无输入、无动画）的采样次数
+IDLE_FRAME_TIME = 1 / 30
+IDLE_SAMPLES = 3
+
+# 分配块数比上次完整回收时增长超过该值时需要回收
+GC_BLOCKS_GROWTH = 500000
+
+# 分配速率（容器对象/秒）连续 ALLOC_RATE_SAMPLES 次采样不低于该值时需要回收
+GC_ALLOC_RATE = 200000
+ALLOC_RATE_SAMPLES = 5
+
+# 各像素格式每像素字节数，未列出的按RGBA计算
+BYTES_PER_PIXEL = {
+    'rgba': 4, 'bgra': 4, 'rgb': 3, 'bgr': 3,
+    'luminance_alpha': 2, 'rg': 2, 'luminance': 1, 'alpha': 1, 'red': 1,
+}
+
+def texture_bytes(texture) -> int:
+    """估算纹理占用的显存（字节），生成了mipmap时多计1/3"""
+    width, height = texture.size
+    size = int(width) * int(height) * BYTES_PER_PIXEL.get(getattr(texture, 'colorfmt', 'rgba'), 4)
+    if getattr(texture, 'mipmap', False):
+        size = size * 4 // 3
+    return size
+
+class TextureLRUCache:
+    """按字节预算淘汰的纹理LRU缓存
+
+    只统计缓存自身持有的引用：被淘汰的纹理如果仍显示在控件上，会在控件释放后回收。
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = max(0, budget_bytes)
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'rejected': 0}
+
+    def get(self, key: str):
+        """获取纹理，不存在时返回None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[0]
+
+    def put(self, key: str, texture) -> bool:
+        """放入纹理，超出预算时淘汰最久未使用的纹理；单个纹理超过预算时不缓存"""
+        size = texture_bytes(texture)
+        with self._lock:
+            self._pop(key)
+            if size > self.budget_bytes:
+                self.stats['rejected'] += 1
+                return False
+            self._entries[key] = (texture, size)
+            self.total_bytes += size
+            self._evict_to(self.budget_bytes)
+            return True
+
+    def get_or_create(self, key: str, factory: Callable[[], Any]):
+        """获取纹理，不存在时调用factory创建并放入缓存"""
+        texture = self.get(key)
+        if texture is None:
+            texture = factory()
+            self.put(key, texture)
+        return texture
+
+    def remove(self, key: str) -> bool:
+        with self._lock:
+            return self._pop(key)
+
+    def trim(self, budget_bytes: int):
+        """淘汰到不超过指定字节数（内存紧张时调用）"""
+        with self._lock:
+            self._evict_to(budget_bytes)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def set_budget(self, budget_bytes: int):
+        with self._lock:
+            self.budget_bytes = max(0, budget_bytes)
+            self._evict_to(self.budget_bytes)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return dict(
+                self.stats,
+                entries=len(self._entries),
+                bytes=self.total_bytes,
+                budget_bytes=self.budget_bytes,
+                hit_ratio=round(self.stats['hits'] / lookups, 3) if lookups else 0.0
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def _pop(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.total_bytes -= entry[1]
+        return True
+
+    def _evict_to(self, budget_bytes: int):
+        while self._entries and self.total_bytes > budget_bytes:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            self.stats['evictions'] += 1
+
+def read_rss() -> Optional[int]:
+    """当前进程的常驻内存（字节），无法获取时返回None"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
 class MemoryManager:
     """内存管理器 - 帮助优化应用性能"""
 
     def __init__(self):
-        self.texture_cache = weakref.WeakValueDictionary()
-        self.cleanup_interval = 30  # 30秒清理一次
+        self.texture_cache = TextureLRUCache(int(get_config("TEXTURE_CACHE_MB", 16) * 1024 * 1024))
+        self.cleanup_interval = 30  # 需要回收时最多等待空闲的时间（秒）
         self.last_cleanup_time = 0
         self.cleanup_scheduled = False
-        self.memory_stats = {
+        self.memory_stats = self._new_stats()
+        self._lock = threading.Lock()
+
+        self.rss_growth_limit = int(get_config("GC_RSS_GROWTH_MB", 32)) * 1024 * 1024
+        self.rss_soft_limit = int(get_config("MEMORY_SOFT_LIMIT_MB", 256)) * 1024 * 1024
+        self._monitor_event = None
+        self._baseline_rss: Optional[int] = None
+        self._baseline_blocks = 0
+        self._last_gen0_collections = 0
+        self._last_sample_time = 0.0
+        self._idle_samples = 0
+        self._high_alloc_samples = 0
+        self._input_seen = False
+        self._window = None
+        self._pending_since: Optional[float] = None
+        self._last_relief_time = 0.0
+        self._last_relief_rss = 0
+        self.rss: Optional[int] = None
+        self.rss_peak = 0
+        self.alloc_rate = 0.0
+        self.frozen = False
+
+    @staticmethod
+    def _new_stats() -> Dict[str, Any]:
+        return {
             'texture_cleanups': 0,
             'gc_collections': 0,
-            'cache_clears': 0
+            'cache_clears': 0,
+            'idle_collections': 0,
+            'deferred_collections': 0,
+            'pressure_evictions': 0,
+            'last_gc_pause_ms': 0.0,
+            'max_gc_pause_ms': 0.0
         }
-        self._lock = threading.Lock()
+
+    def collect(self, reason: str = "") -> int:
+        """执行一次完整垃圾回收，并以回收后的内存作为新的增长基准"""
+        start_time = time.perf_counter()
+        collected = gc.collect()
+        pause_ms = (time.perf_counter() - start_time) * 1000
+        with self._lock:
+            self.memory_stats['gc_collections'] += 1
+            self.memory_stats['last_gc_pause_ms'] = round(pause_ms, 2)
+            self.memory_stats['max_gc_pause_ms'] = max(self.memory_stats['max_gc_pause_ms'], round(pause_ms, 2))
+            self.last_cleanup_time = time.time()
+            self._pending_since = None
+            self._high_alloc_samples = 0
+            self._reset_baseline()
+        logger.debug(f"完整垃圾回收（{reason or '手动'}）: 回收对象 {collected}，用时 {pause_ms:.1f}ms")
+        return collected
+
+    def _reset_baseline(self):
+        self._baseline_rss = read_rss()
+        self._baseline_blocks = sys.getallocatedblocks()
+
+    def freeze_startup_objects(self):
+        """回收启动期间的垃圾，并把存活的对象移到永久代，之后的回收不再扫描它们"""
+        if self.frozen or not hasattr(gc, 'freeze'):
+            return
+        self.collect("启动完成")
+        gc.freeze()
+        self.frozen = True
+        logger.info(f"已冻结启动对象: {gc.get_freeze_count()} 个")
 
     def cleanup_textures(self):
-        """清理未使用的纹理"""
+        """清理未使用的纹理（清空Kivy纹理和图片缓存后完整回收，只应在内存紧张时调用）"""
+        self._clear_caches()
+        self.collect("清理纹理")
+
+    def _clear_caches(self):
+        """清空Kivy纹理和图片缓存（之后用到的纹理需要重新上传）"""
         with self._lock:
             try:
-                # 强制垃圾回收
-                collected = gc.collect()
-                self.memory_stats['gc_collections'] += 1
-                
                 # 清理Kivy的纹理缓存
                 try:
                     from kivy.cache import Cache
@@ -49,41 +255,139 @@ class MemoryManager:
                     pass
                 except Exception as cache_error:
                     logger.debug(f"清理Kivy缓存时出错: {cache_error}")
+                self.texture_cache.clear()
 
                 self.memory_stats['texture_cleanups'] += 1
-                self.last_cleanup_time = time.time()
-                
-                logger.debug(f"已执行纹理清理，回收对象数: {collected}")
             except Exception as e:
                 logger.error(f"纹理清理失败: {e}")
 
     def schedule_cleanup(self):
-        """定期清理内存"""
+        """启动内存监测（按需回收，不做定期完整回收）"""
         if not self.cleanup_scheduled:
             try:
-                Clock.schedule_interval(lambda dt: self.cleanup_textures(), self.cleanup_interval)
+                self._reset_baseline()
+                self._last_gen0_collections = self._collections()
+                self._last_sample_time = time.perf_counter()
+                self._bind_input()
+                self._monitor_event = Clock.schedule_interval(self._monitor, MONITOR_INTERVAL)
                 self.cleanup_scheduled = True
-                logger.debug(f"已启动定期内存清理，间隔: {self.cleanup_interval}秒")
+                logger.debug(f"已启动内存监测，RSS增长阈值 {self.rss_growth_limit // (1024 * 1024)}MB，"
+                             f"软上限 {self.rss_soft_limit // (1024 * 1024)}MB")
             except Exception as e:
-                logger.error(f"启动定期清理失败: {e}")
+                logger.error(f"启动内存监测失败: {e}")
+
+    def _bind_input(self):
+        """监听窗口的输入事件，用于判断是否空闲"""
+        try:
+            from kivy.core.window import Window
+            Window.bind(on_motion=self._on_input, on_key_down=self._on_input)
+            self._window = Window
+        except Exception as e:
+            logger.debug(f"监听输入事件失败，只按帧时间判断空闲: {e}")
+
+    def _on_input(self, *args):
+        # 只做标记，不消费事件
+        self._input_seen = True
+
+    @staticmethod
+    def _animating() -> bool:
+        """是否有正在运行的动画"""
+        try:
+            from kivy.animation import Animation
+            return bool(Animation._instances)
+        except Exception:
+            return False
+
+    def _is_idle_sample(self) -> bool:
+        """本次采样间隔内没有输入、没有动画且帧时间正常"""
+        input_seen, self._input_seen = self._input_seen, False
+        return not input_seen and not self._animating() and Clock.frametime <= IDLE_FRAME_TIME
+
+    def _monitor(self, dt):
+        """采样内存状态，决定是否回收以及是否清理缓存"""
+        try:
+            now = time.perf_counter()
+            gen0_collections = self._collections()
+            elapsed = max(now - self._last_sample_time, 1e-6)
+            # 每次第0代回收大约对应 threshold0 次容器对象分配
+            self.alloc_rate = (gen0_collections - self._last_gen0_collections) * gc.get_threshold()[0] / elapsed
+            self._last_gen0_collections = gen0_collections
+            self._last_sample_time = now
+            self._high_alloc_samples = self._high_alloc_samples + 1 if self.alloc_rate >= GC_ALLOC_RATE else 0
+
+            self.rss = read_rss()
+            if self.rss is not None:
+                self.rss_peak = max(self.rss_peak, self.rss)
+            self._idle_samples = self._idle_samples + 1 if self._is_idle_sample() else 0
+
+            if self._under_pressure(now):
+                self._relieve_pressure(now)
+                return
+
+            if not self._needs_collection():
+                self._pending_since = None
+                return
+            if self._pending_since is None:
+                self._pending_since = now
+            if self._idle_samples >= IDLE_SAMPLES:
+                self.memory_stats['idle_collections'] += 1
+                self.collect("空闲")
+            elif now - self._pending_since >= self.cleanup_interval:
+                # 一直不空闲，不再等待
+                self.memory_stats['deferred_collections'] += 1
+                self.collect("等待空闲超时")
+        except Exception as e:
+            logger.error(f"内存监测出错: {e}")
+
+    @staticmethod
+    def _collections() -> int:
+        """各代回收次数之和（每次都由第0代计数溢出触发）"""
+        return sum(generation['collections'] for generation in gc.get_stats())
+
+    def _needs_collection(self) -> bool:
+        """内存或分配块数自上次完整回收以来增长是否超过阈值，或分配速率是否持续偏高"""
+        if self._high_alloc_samples >= ALLOC_RATE_SAMPLES:
+            return True
+        if self.rss is not None and self._baseline_rss is not None:
+            if self.rss - self._baseline_rss >= self.rss_growth_limit:
+                return True
+        return sys.getallocatedblocks() - self._baseline_blocks >= GC_BLOCKS_GROWTH
+
+    def _under_pressure(self, now: float) -> bool:
+        """内存是否超过软上限
+
+        分配器通常不会把释放的内存还给系统，处理一次之后RSS可能仍在上限之上；
+        此后只有RSS继续增长或超过最长等待时间才再次处理，避免每次采样都完整回收。
+        """
+        if self.rss is None or self.rss < self.rss_soft_limit:
+            return False
+        if self._last_relief_time == 0:
+            return True
+        return (self.rss - self._last_relief_rss >= self.rss_growth_limit or
+                now - self._last_relief_time >= self.cleanup_interval)
+
+    def _relieve_pressure(self, now: float):
+        """内存超过软上限：先回收，仍然超过时清空缓存"""
+        self.collect("内存压力")
+        rss = read_rss()
+        if rss is not None and rss >= self.rss_soft_limit:
+            self.memory_stats['pressure_evictions'] += 1
+            logger.warning(f"内存 {rss / (1024 * 1024):.0f}MB 超过软上限，清空纹理缓存")
+            self._clear_caches()
+            rss = read_rss()
+        self._last_relief_time = now
+        self._last_relief_rss = rss or 0
 
     def force_cleanup(self):
         """强制执行内存清理"""
         logger.info("执行强制内存清理")
-        self.cleanup_textures()
-        
-        # 额外的深度清理
         try:
-            # 清理弱引用字典
+            # 清空纹理缓存
             self.texture_cache.clear()
-            
-            # 多次垃圾回收以确保彻底清理
-            for _ in range(3):
-                gc.collect()
-            
-            logger.info("强制内存清理完成")
         except Exception as e:
             logger.error(f"强制清理时出错: {e}")
+        self.cleanup_textures()
+        logger.info("强制内存清理完成")
 
     def get_memory_stats(self) -> Dict[str, Any]:
         """获取内存管理统计信息"""
@@ -92,42 +396,44 @@ class MemoryManager:
             stats.update({
                 'last_cleanup_time': self.last_cleanup_time,
                 'cleanup_scheduled': self.cleanup_scheduled,
-                'texture_cache_size': len(self.texture_cache)
+                'texture_cache_size': len(self.texture_cache),
+                'texture_cache': self.texture_cache.get_stats(),
+                'rss_bytes': self.rss,
+                'rss_peak_bytes': self.rss_peak,
+                'rss_soft_limit_bytes': self.rss_soft_limit,
+                'alloc_rate': round(self.alloc_rate, 1),
+                'frozen_objects': gc.get_freeze_count() if hasattr(gc, 'get_freeze_count') else 0
             })
             return stats
 
     def reset_stats(self):
         """重置统计信息"""
         with self._lock:
-            self.memory_stats = {
-                'texture_cleanups': 0,
-                'gc_collections': 0,
-                'cache_clears': 0
-            }
+            self.memory_stats = self._new_stats()
             logger.debug("内存管理统计信息已重置")
 
     def set_cleanup_interval(self, interval: int):
-        """设置清理间隔
+        """设置需要回收时等待空闲的最长时间
         
         Args:
-            interval: 清理间隔（秒）
+            interval: 最长等待时间（秒）
         """
         if interval > 0:
             self.cleanup_interval = interval
-            logger.info(f"内存清理间隔已设置为: {interval}秒")
+            logger.info(f"内存回收最长等待时间已设置为: {interval}秒")
         else:
             logger.warning("清理间隔必须大于0")
 
     def add_texture_reference(self, key: str, texture):
-        """添加纹理引用到缓存
+        """添加纹理到缓存（计入纹理缓存预算）
         
         Args:
             key: 纹理键
             texture: 纹理对象
         """
         try:
-            self.texture_cache[key] = texture
-            logger.debug(f"已添加纹理引用: {key}")
+            if self.texture_cache.put(key, texture):
+                logger.debug(f"已添加纹理引用: {key}")
         except Exception as e:
             logger.debug(f"添加纹理引用失败: {e}")
 
@@ -149,8 +455,7 @@ class MemoryManager:
             key: 纹理键
         """
         try:
-            if key in self.texture_cache:
-                del self.texture_cache[key]
+            if self.texture_cache.remove(key):
                 logger.debug(f"已移除纹理引用: {key}")
         except Exception as e:
             logger.debug(f"移除纹理引用失败: {e}")
@@ -181,7 +486,7 @@ class MemoryManager:
         """优化垃圾回收设置"""
         try:
             # 调整垃圾回收阈值以提高性能
-            gc.set_threshold(700, 10, 10)
+            gc.set_threshold(*GC_THRESHOLDS)
             logger.debug("已优化垃圾回收设置")
         except Exception as e:
             logger.error(f"优化垃圾回收设置失败: {e}")
@@ -189,16 +494,17 @@ class MemoryManager:
     def cleanup(self):
         """清理内存管理器资源"""
         try:
-            # 取消定期清理
-            if self.cleanup_scheduled:
-                try:
-                    Clock.unschedule(self.cleanup_textures)
-                except:
-                    pass
-                self.cleanup_scheduled = False
+            # 停止内存监测
+            if self._monitor_event is not None:
+                self._monitor_event.cancel()
+                self._monitor_event = None
+            if self._window is not None:
+                self._window.unbind(on_motion=self._on_input, on_key_down=self._on_input)
+                self._window = None
+            self.cleanup_scheduled = False
             
-            # 最后一次清理
-            self.force_cleanup()
+            # 清理纹理引用（应用退出，不需要再回收）
+            self.texture_cache.clear()
             
             logger.info("内存管理器已清理")
         except Exception as e:
@@ -230,13 +536,18 @@ def schedule_cleanup():
     """启动定期清理（便捷函数）"""
     _memory_manager.schedule_cleanup()
 
+def get_texture_cache() -> TextureLRUCache:
+    """获取纹理缓存（便捷函数）"""
+    return _memory_manager.texture_cache
+
 def get_memory_stats() -> Dict[str, Any]:
     """获取内存统计信息（便捷函数）"""
     return _memory_manager.get_memory_stats()
 
 def optimize_memory():
-    """优化内存设置（便捷函数）"""
+    """优化内存设置（便捷函数，在启动完成后调用）"""
     _memory_manager.optimize_gc()
+    _memory_manager.freeze_startup_objects()
     _memory_manager.schedule_cleanup()
 
 # 兼容性：保持原有接口
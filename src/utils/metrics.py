@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+指标监控模块
+进程内指标注册表，并可选地通过本地HTTP端点以OpenMetrics文本格式导出
+"""
+
+import math
+import time
+import logging
+import threading
+from typing import Dict, Optional, Tuple, List, Any
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# OpenMetrics 响应类型
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# 默认延迟分桶（秒），覆盖教务系统从正常到严重卡顿的响应时间
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+
+def _escape_label_value(value: str) -> str:
+    """转义标签值中的特殊字符"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_value(value: float) -> str:
+    """格式化样本值"""
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _format_labels(label_names: Tuple[str, ...], label_values: Tuple[str, ...],
+                   extra: Optional[Tuple[str, str]] = None) -> str:
+    """格式化标签集合"""
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape_label_value(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    """指标基类"""
+
+    metric_type = "unknown"
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _label_key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        """根据标签名顺序生成样本键"""
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"指标 {self.name} 的标签应为 {self.label_names}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        """渲染为OpenMetrics文本行"""
+        raise NotImplementedError
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        super(Counter, self).__init__(name, help_text, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        """增加计数"""
+        if amount < 0:
+            raise ValueError("计数器只能增加")
+        key = self._label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        """获取当前计数"""
+        with self._lock:
+            return self._values.get(self._label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}_total{_format_labels(self.label_names, key)} {_format_value(value)}"
+                for key, value in items]
+
+class Gauge(_Metric):
+    """可增可减的瞬时值"""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        super(Gauge, self).__init__(name, help_text, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        """设置当前值"""
+        key = self._label_key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        """增加当前值"""
+        key = self._label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        """减少当前值"""
+        self.inc(-amount, **labels)
+
+    def remove(self, **labels):
+        """移除某组标签的样本（例如删除账号后）"""
+        key = self._label_key(labels)
+        with self._lock:
+            self._values.pop(key, None)
+
+    def get(self, **labels) -> float:
+        """获取当前值"""
+        with self._lock:
+            return self._values.get(self._label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+                for key, value in items]
+
+class Histogram(_Metric):
+    """分桶直方图"""
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        super(Histogram, self).__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # 每组标签: [各桶计数..., 总和]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        """记录一次观测值"""
+        key = self._label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [0] * len(self.buckets) + [0.0]
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-1] += value
+
+    def time(self, **labels) -> "_HistogramTimer":
+        """返回用于计时的上下文管理器"""
+        return _HistogramTimer(self, labels)
+
+    def get_count(self, **labels) -> int:
+        """获取观测次数"""
+        with self._lock:
+            state = self._values.get(self._label_key(labels))
+            return int(sum(state[:-1])) if state else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state[:-1]):
+                cumulative += count
+                le = repr(float(bound)) if bound != math.inf else "+Inf"
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(state[-1])}")
+        return lines
+
+class _HistogramTimer:
+    """直方图计时上下文"""
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+        self.start_time = 0.0
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.histogram.observe(time.perf_counter() - self.start_time, **self.labels)
+        return False
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, metric_class, name: str, help_text: str, label_names, **kwargs):
+        """获取已注册的指标，不存在时创建"""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = metric_class(name, help_text, tuple(label_names), **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"指标 {name} 已以 {metric.metric_type} 类型注册")
+            return metric
+
+    def counter(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        """注册或获取计数器"""
+        return self._get_or_create(Counter, name, help_text, label_names)
+
+    def gauge(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> Gauge:
+        """注册或获取瞬时值"""
+        return self._get_or_create(Gauge, name, help_text, label_names)
+
+    def histogram(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        """注册或获取直方图"""
+        return self._get_or_create(Histogram, name, help_text, label_names, buckets=buckets)
+
+    def get_metric(self, name: str) -> Optional[_Metric]:
+        """按名称获取指标"""
+        with self._lock:
+            return self._metrics.get(name)
+
+    def render(self) -> str:
+        """渲染全部指标为OpenMetrics文本"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.extend(metric.render())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    """/metrics 请求处理器"""
+
+    registry: MetricsRegistry = None
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """抓取请求频繁，降为调试日志"""
+        logger.debug(f"指标端点访问: {self.address_string()} {format % args}")
+
+class MetricsExporter:
+    """本地HTTP指标导出器"""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, host: str = "127.0.0.1", port: int = 9464) -> bool:
+        """在后台线程中启动导出端点"""
+        if self._server is not None:
+            return True
+
+        try:
+            handler = type('MetricsRequestHandler', (_MetricsRequestHandler,), {'registry': self.registry})
+            self._server = ThreadingHTTPServer((host, port), handler)
+            self._server.daemon_threads = True
+            self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-exporter", daemon=True)
+            self._thread.start()
+            logger.info(f"指标导出端点已启动: http://{host}:{port}/metrics")
+            return True
+        except Exception as e:
+            logger.error(f"启动指标导出端点失败: {e}")
+            self._server = None
+            return False
+
+    def stop(self):
+        """停止导出端点"""
+        if self._server is None:
+            return
+        try:
+            self._server.shutdown()
+            self._server.server_close()
+            logger.info("指标导出端点已停止")
+        except Exception as e:
+            logger.error(f"停止指标导出端点失败: {e}")
+        finally:
+            self._server = None
+            self._thread = None
+
+    def is_running(self) -> bool:
+        """导出端点是否在运行"""
+        return self._server is not None
+
+# 全局注册表和导出器
+_registry = MetricsRegistry()
+_exporter = MetricsExporter(_registry)
+
+# 应用指标
+HTTP_REQUEST_DURATION = _registry.histogram(
+    "qqhru_http_request_duration_seconds", "教务系统HTTP请求耗时",
+    ("method", "endpoint", "outcome")
+)
+SESSION_VALID = _registry.gauge(
+    "qqhru_session_valid", "账号会话是否有效（1有效，0无效）", ("account",)
+)
+LOGIN_ATTEMPTS = _registry.counter(
+    "qqhru_login_attempts", "登录请求结果计数", ("result",)
+)
+CAPTCHA_ATTEMPTS = _registry.counter(
+    "qqhru_captcha_fetch_attempts", "验证码获取尝试计数", ("result",)
+)
+POLL_CYCLE_DURATION = _registry.histogram(
+    "qqhru_poll_cycle_duration_seconds", "自动登录轮询周期耗时"
+)
+SCORE_CHANGE_EVENTS = _registry.counter(
+    "qqhru_score_change_events", "检测到成绩变化的次数", ("account",)
+)
+
+def get_registry() -> MetricsRegistry:
+    """获取全局指标注册表"""
+    return _registry
+
+def endpoint_of(url: str) -> str:
+    """从URL中提取用作标签的路径（去除查询参数，控制标签基数）"""
+    try:
+        return urlparse(url).path or "/"
+    except Exception:
+        return "unknown"
+
+def observe_request(method: str, url: str, duration: float, outcome: str):
+    """记录一次HTTP请求耗时（便捷函数）"""
+    HTTP_REQUEST_DURATION.observe(duration, method=method.upper(), endpoint=endpoint_of(url), outcome=outcome)
+
+def start_metrics_exporter(host: Optional[str] = None, port: Optional[int] = None) -> bool:
+    """按配置启动指标导出端点（便捷函数）"""
+    from ..core.config import get_config
+
+    host = host or get_config("METRICS_HOST", "127.0.0.1")
+    port = port or get_config("METRICS_PORT", 9464)
+    return _exporter.start(host, int(port))
+
+def stop_metrics_exporter():
+    """停止指标导出端点（便捷函数）"""
+    _exporter.stop()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能分析模块
+为选定的入口函数提供可在运行时开关的cProfile分析，
+每次调用的分析结果和按入口累计的统计都写入日志目录下的profiles子目录
+"""
+
+import os
+import io
+import time
+import pstats
+import cProfile
+import logging
+import threading
+import functools
+from typing import Optional, Dict, Callable, Any
+
+logger = logging.getLogger(__name__)
+
+# 开启分析的环境变量（与DEBUG一致，取值为true/1时开启）
+PROFILE_ENV_VAR = "PROFILE"
+PROFILES_SUBDIR = "profiles"
+
+class Profiler:
+    """性能分析器"""
+
+    def __init__(self):
+        self._enabled: Optional[bool] = None
+        self._aggregates: Dict[str, pstats.Stats] = {}
+        self._call_counts: Dict[str, int] = {}
+        self._total_times: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # 同一线程同时只能运行一个cProfile，嵌套的入口直接执行
+        self._local = threading.local()
+
+    def is_enabled(self) -> bool:
+        """是否开启分析（环境变量或配置项，首次调用时读取）"""
+        if self._enabled is None:
+            env_value = os.getenv(PROFILE_ENV_VAR, "").lower()
+            if env_value in ("true", "1"):
+                self._enabled = True
+            else:
+                try:
+                    from ..core.config import get_config
+                    self._enabled = bool(get_config("PROFILING_ENABLED", False))
+                except Exception:
+                    self._enabled = False
+        return self._enabled
+
+    def set_enabled(self, enabled: bool):
+        """运行时开启或关闭分析"""
+        self._enabled = bool(enabled)
+        logger.info(f"性能分析已{'开启' if enabled else '关闭'}")
+
+    def get_output_dir(self) -> str:
+        """获取分析结果目录"""
+        try:
+            from ..core.config import get_config
+            logs_dir = get_config("LOGS_DIR", "logs")
+        except Exception:
+            logs_dir = "logs"
+        output_dir = os.path.join(logs_dir, PROFILES_SUBDIR)
+        os.makedirs(output_dir, exist_ok=True)
+        return output_dir
+
+    def run(self, name: str, func: Callable, *args, **kwargs) -> Any:
+        """在分析器下执行函数"""
+        if getattr(self._local, "active", False):
+            return func(*args, **kwargs)
+
+        profile = cProfile.Profile()
+        self._local.active = True
+        start_time = time.perf_counter()
+        try:
+            profile.enable()
+        except ValueError:
+            # 其他分析工具已占用（如外部调试器），不再重复分析
+            self._local.active = False
+            return func(*args, **kwargs)
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            self._local.active = False
+            self._record(name, profile, time.perf_counter() - start_time)
+
+    def _record(self, name: str, profile: cProfile.Profile, elapsed: float):
+        """保存单次分析结果并累加到汇总统计"""
+        try:
+            output_dir = self.get_output_dir()
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
+            sequence = self._call_counts.get(name, 0) + 1
+            call_file = os.path.join(output_dir, f"{name}_{timestamp}_{sequence}_{int(elapsed * 1000)}ms.prof")
+            profile.dump_stats(call_file)
+
+            with self._lock:
+                aggregate = self._aggregates.get(name)
+                if aggregate is None:
+                    self._aggregates[name] = pstats.Stats(profile)
+                else:
+                    aggregate.add(profile)
+                self._call_counts[name] = self._call_counts.get(name, 0) + 1
+                self._total_times[name] = self._total_times.get(name, 0.0) + elapsed
+                self._write_aggregate(name, output_dir)
+
+            logger.debug(f"性能分析 {name}: {elapsed * 1000:.1f}ms，已保存到 {call_file}")
+        except Exception as e:
+            logger.error(f"保存性能分析结果失败: {e}")
+
+    def _write_aggregate(self, name: str, output_dir: str):
+        """写出某个入口的累计统计（.prof 和可读文本）"""
+        aggregate = self._aggregates[name]
+        aggregate.dump_stats(os.path.join(output_dir, f"{name}_aggregate.prof"))
+
+        buffer = io.StringIO()
+        calls = self._call_counts[name]
+        total = self._total_times[name]
+        buffer.write(f"{name}: {calls} 次调用，累计 {total * 1000:.1f}ms，平均 {total * 1000 / calls:.1f}ms\n\n")
+        pstats.Stats(os.path.join(output_dir, f"{name}_aggregate.prof"), stream=buffer) \
+            .sort_stats("cumulative").print_stats(40)
+        with open(os.path.join(output_dir, f"{name}_aggregate.txt"), "w", encoding="utf-8") as f:
+            f.write(buffer.getvalue())
+
+    def get_summary(self) -> Dict[str, Dict[str, float]]:
+        """获取各入口的调用次数和耗时汇总"""
+        with self._lock:
+            return {
+                name: {
+                    "calls": self._call_counts[name],
+                    "total_ms": round(self._total_times[name] * 1000, 1),
+                    "avg_ms": round(self._total_times[name] * 1000 / self._call_counts[name], 1),
+                }
+                for name in self._call_counts
+            }
+
+    def reset(self):
+        """清空累计统计"""
+        with self._lock:
+            self._aggregates.clear()
+            self._call_counts.clear()
+            self._total_times.clear()
+
+# 全局分析器实例
+_profiler = Profiler()
+
+def get_profiler() -> Profiler:
+    """获取全局分析器"""
+    return _profiler
+
+def profiled(name: Optional[str] = None):
+    """对函数进行可开关性能分析的装饰器，关闭时几乎没有额外开销"""
+    def decorator(func: Callable) -> Callable:
+        profile_name = name or func.__qualname__.replace(".", "_")
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _profiler.is_enabled():
+                return func(*args, **kwargs)
+            return _profiler.run(profile_name, func, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def set_profiling_enabled(enabled: bool):
+    """运行时开启或关闭性能分析（便捷函数）"""
+    _profiler.set_enabled(enabled)
+
+def is_profiling_enabled() -> bool:
+    """性能分析是否开启（便捷函数）"""
+    return _profiler.is_enabled()
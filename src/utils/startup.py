@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动计时模块
+记录从进程启动到首帧渲染各阶段的时间点，用于观察和回归检测冷启动耗时
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import List, Tuple, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+def _process_age() -> float:
+    """进程已运行的时间（秒），包括解释器启动；无法获取时返回0"""
+    try:
+        with open("/proc/self/stat", "r") as f:
+            # 进程名可能含空格，从最后一个右括号之后开始按空格切分
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+        with open("/proc/uptime", "r") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except Exception:
+        return 0.0
+
+# 进程启动时刻（perf_counter时间轴）
+_PROCESS_START = time.perf_counter() - _process_age()
+
+_marks: List[Tuple[str, float]] = []
+_lock = threading.Lock()
+
+def mark(name: str) -> float:
+    """记录启动阶段时间点，返回距进程启动的秒数"""
+    elapsed = time.perf_counter() - _PROCESS_START
+    with _lock:
+        _marks.append((name, elapsed))
+    return elapsed
+
+def get_marks() -> List[Tuple[str, float]]:
+    """获取已记录的 [(阶段名, 距进程启动的秒数), ...]"""
+    with _lock:
+        return list(_marks)
+
+def get_mark(name: str) -> Optional[float]:
+    """获取某个时间点，未记录时返回None"""
+    with _lock:
+        for mark_name, elapsed in _marks:
+            if mark_name == name:
+                return elapsed
+    return None
+
+def get_phases() -> Dict[str, float]:
+    """相邻时间点之间的耗时 {阶段名: 秒}"""
+    phases = {}
+    previous = 0.0
+    for name, elapsed in get_marks():
+        phases[name] = elapsed - previous
+        previous = elapsed
+    return phases
+
+def log_summary():
+    """输出启动耗时汇总"""
+    marks = get_marks()
+    if not marks:
+        return
+    details = ", ".join(f"{name}={duration * 1000:.0f}ms" for name, duration in get_phases().items())
+    logger.info(f"启动耗时 {marks[-1][1] * 1000:.0f}ms ({details})")
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+链路追踪模块
+基于contextvars的轻量级Span追踪，支持跨线程、Clock回调和asyncio的上下文传递，
+已完成的Span以JSONL格式写入日志目录，可转换为时间线/火焰图查看
+"""
+
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import contextvars
+import functools
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Callable, List
+
+logger = logging.getLogger(__name__)
+
+# 当前活动的Span
+_current_span: contextvars.ContextVar = contextvars.ContextVar("qqhru_current_span", default=None)
+
+# 追踪文件名（位于LOGS_DIR下）
+TRACE_FILE_NAME = "traces.jsonl"
+
+def _new_id(num_bytes: int) -> str:
+    """生成随机十六进制ID"""
+    return os.urandom(num_bytes).hex()
+
+class Span:
+    """一次计时的操作"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes",
+                 "start_time", "_start_perf", "duration", "status", "thread_name", "thread_id")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else _new_id(16)
+        self.span_id = _new_id(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes) if attributes else {}
+        self.start_time = time.time()
+        self._start_perf = time.perf_counter()
+        self.duration = 0.0
+        self.status = "ok"
+        current_thread = threading.current_thread()
+        self.thread_name = current_thread.name
+        self.thread_id = current_thread.ident
+
+    def set_attribute(self, key: str, value: Any):
+        """设置Span属性"""
+        self.attributes[key] = value
+
+    def set_status(self, status: str):
+        """设置Span状态"""
+        self.status = status
+
+    def finish(self):
+        """结束计时"""
+        self.duration = time.perf_counter() - self._start_perf
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为导出记录"""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ts": round(self.start_time, 6),
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": self.status,
+            "thread": self.thread_name,
+            "thread_id": self.thread_id,
+            "attributes": self.attributes,
+        }
+
+class _NoopSpan:
+    """追踪关闭时使用的空Span"""
+
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_status(self, status: str):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class JsonlSpanExporter:
+    """在后台线程中将Span追加写入JSONL文件"""
+
+    def __init__(self, file_path: str, max_queue_size: int = 10000):
+        self.file_path = file_path
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def export(self, span: Span):
+        """提交一个已完成的Span，队列满时丢弃"""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(span.to_dict())
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """写入循环，尽量批量写入以减少磁盘操作"""
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+            batch = [record]
+            while True:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    self._write(batch)
+                    return
+                batch.append(record)
+            self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        try:
+            os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+            with open(self.file_path, "a", encoding="utf-8") as f:
+                for record in batch:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        except Exception as e:
+            logger.error(f"写入追踪数据失败: {e}")
+
+    def shutdown(self, timeout: float = 2.0):
+        """刷新并停止写入线程"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+            self._thread.join(timeout=timeout)
+        except Exception as e:
+            logger.debug(f"停止追踪写入线程失败: {e}")
+        self._thread = None
+
+class Tracer:
+    """追踪器"""
+
+    def __init__(self):
+        self._enabled: Optional[bool] = None
+        self._exporter: Optional[JsonlSpanExporter] = None
+        self._lock = threading.Lock()
+
+    def is_enabled(self) -> bool:
+        """追踪是否开启（首次调用时读取配置）"""
+        if self._enabled is None:
+            try:
+                from ..core.config import get_config
+                self._enabled = bool(get_config("TRACING_ENABLED", False))
+            except Exception:
+                self._enabled = False
+        return self._enabled
+
+    def set_enabled(self, enabled: bool):
+        """运行时开启或关闭追踪"""
+        self._enabled = bool(enabled)
+        logger.info(f"链路追踪已{'开启' if enabled else '关闭'}")
+
+    def _get_exporter(self) -> JsonlSpanExporter:
+        if self._exporter is None:
+            with self._lock:
+                if self._exporter is None:
+                    from ..core.config import get_config
+                    file_path = os.path.join(get_config("LOGS_DIR", "logs"), TRACE_FILE_NAME)
+                    self._exporter = JsonlSpanExporter(file_path)
+        return self._exporter
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """创建子Span的上下文管理器"""
+        if not self.is_enabled():
+            yield _NOOP_SPAN
+            return
+
+        current = Span(name, _current_span.get(), attributes)
+        token = _current_span.set(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.set_status("error")
+            current.set_attribute("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            current.finish()
+            _current_span.reset(token)
+            self._get_exporter().export(current)
+
+    def shutdown(self):
+        """刷新未写入的Span"""
+        if self._exporter is not None:
+            self._exporter.shutdown()
+
+# 全局追踪器实例
+_tracer = Tracer()
+atexit.register(_tracer.shutdown)
+
+def get_tracer() -> Tracer:
+    """获取全局追踪器"""
+    return _tracer
+
+def span(name: str, **attributes):
+    """创建Span（便捷函数）
+
+    用法:
+        with span("login.post", account=student_id) as s:
+            ...
+            s.set_attribute("result", result)
+    """
+    return _tracer.span(name, **attributes)
+
+def traced(name: Optional[str] = None):
+    """将函数调用包装为Span的装饰器"""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _tracer.is_enabled():
+                return func(*args, **kwargs)
+            with _tracer.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def current_span() -> Optional[Span]:
+    """获取当前活动的Span"""
+    return _current_span.get()
+
+def current_trace_ids() -> Dict[str, Optional[str]]:
+    """获取当前trace_id和span_id，用于日志关联"""
+    active = _current_span.get()
+    if active is None:
+        return {"trace_id": None, "span_id": None}
+    return {"trace_id": active.trace_id, "span_id": active.span_id}
+
+def wrap_context(func: Callable) -> Callable:
+    """捕获当前上下文，使func在其他线程或Clock回调中执行时保持同一条链路
+
+    threading.Thread、Clock.schedule_once 和 run_in_executor 不会自动传递
+    contextvars，需要用此函数包装；asyncio 任务会自动复制上下文，无需包装。
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # 每次调用使用上下文副本，允许同一回调并发或重复执行
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
+
+def set_tracing_enabled(enabled: bool):
+    """运行时开启或关闭追踪（便捷函数）"""
+    _tracer.set_enabled(enabled)
+
+def shutdown_tracing():
+    """刷新并关闭追踪写入（便捷函数）"""
+    _tracer.shutdown()
+
+def to_chrome_trace(jsonl_path: str) -> List[Dict[str, Any]]:
+    """将JSONL追踪文件转换为Chrome Trace事件列表（可在Perfetto/chrome://tracing中查看）"""
+    events = []
+    pid = os.getpid()
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            args = dict(record.get("attributes") or {})
+            args.update({
+                "trace_id": record["trace_id"],
+                "span_id": record["span_id"],
+                "parent_id": record["parent_id"],
+                "status": record["status"],
+            })
+            events.append({
+                "name": record["name"],
+                "cat": record["trace_id"][:8],
+                "ph": "X",
+                "ts": int(record["start_ts"] * 1_000_000),
+                "dur": int(record["duration_ms"] * 1000),
+                "pid": pid,
+                "tid": record.get("thread_id") or record.get("thread"),
+                "args": args,
+            })
+    return events